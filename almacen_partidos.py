@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Almacén SQLite de partidos (sustituye al snapshot partidos_anteriores.json)
+
+Guarda el estado actual de cada partido, todas sus versiones y de qué hoja de
+jornada salió. Los consumidores piden solo lo que necesitan (vigentes, de un club,
+de una categoría) y se sigue exportando el JSON para docs/ y la página de admin.
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Collection, Dict, List, Optional, Union
+
+from partido import (Partido, como_partido, indexar_por_id, deduplicar_partidos,
+                     codigo_equipo, normalizar_categoria, ZONA_CANARIAS)
+from escritura_atomica import escribir_atomico
+
+# En la caché del scraper (la que conserva actions/cache), no en el repositorio: cambia en
+# cada ejecución. Si se pierde, se reconstruye desde partidos_anteriores.json (ver importar_json)
+RUTA_ALMACEN = Path("cache") / "partidos.db"
+
+# Campos cuyo cambio crea una versión nueva ('origen' y 'hoja' son procedencia, no contenido)
+CAMPOS_VERSIONADOS = tuple(c for c in Partido.CAMPOS if c not in ('origen', 'hoja'))
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS partidos (
+    id              TEXT PRIMARY KEY,   -- partido.id_estable() (indexar_por_id)
+    dia             TEXT NOT NULL,
+    hora            TEXT NOT NULL,
+    categoria       TEXT NOT NULL,
+    local           TEXT NOT NULL,
+    visitante       TEXT NOT NULL,
+    lugar           TEXT NOT NULL,
+    origen          TEXT NOT NULL,
+    jornada_tipo    TEXT,
+    hoja            TEXT,               -- título de la hoja de jornada de la que salió
+    inicio          TEXT,               -- ISO 8601 en UTC (ordenable como texto)
+    club_local      TEXT,
+    club_visitante  TEXT,
+    categoria_norm  TEXT NOT NULL,
+    activo          INTEGER NOT NULL,   -- 1 si salió en la última ejecución
+    version         INTEGER NOT NULL,
+    primera_vez     TEXT NOT NULL,
+    ultima_vez      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_partidos_inicio ON partidos (activo, inicio);
+CREATE INDEX IF NOT EXISTS idx_partidos_club_local ON partidos (club_local);
+CREATE INDEX IF NOT EXISTS idx_partidos_club_visitante ON partidos (club_visitante);
+CREATE INDEX IF NOT EXISTS idx_partidos_categoria ON partidos (categoria_norm);
+
+CREATE TABLE IF NOT EXISTS versiones (
+    partido_id  TEXT NOT NULL,
+    version     INTEGER NOT NULL,
+    datos       TEXT NOT NULL,          -- JSON de Partido.a_dict()
+    ejecucion   INTEGER NOT NULL,
+    PRIMARY KEY (partido_id, version)
+);
+
+CREATE TABLE IF NOT EXISTS jornadas (
+    hoja          TEXT PRIMARY KEY,     -- título de la hoja de jornada en el listado
+    jornada_tipo  TEXT,
+    partidos      INTEGER NOT NULL,
+    primera_vez   TEXT NOT NULL,
+    ultima_vez    TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha     TEXT NOT NULL,
+    partidos  INTEGER NOT NULL
+);
+"""
+
+_COLUMNAS_PARTIDO = ('dia', 'hora', 'categoria', 'local', 'visitante', 'lugar', 'origen', 'jornada_tipo', 'hoja',
+                     'inicio')
+
+
+def _inicio_utc(inicio: Optional[datetime]) -> Optional[str]:
+    return inicio.astimezone(timezone.utc).isoformat() if inicio else None
+
+
+class AlmacenPartidos:
+    """
+    Almacén de partidos en SQLite. Se usa como gestor de contexto:
+
+        with AlmacenPartidos() as almacen:
+            anteriores = almacen.activos()
+            almacen.guardar_ejecucion(partidos)
+    """
+
+    def __init__(self, ruta: Union[str, Path] = RUTA_ALMACEN):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.conexion = sqlite3.connect(self.ruta)
+        self.conexion.row_factory = sqlite3.Row
+        self.conexion.executescript(ESQUEMA)
+
+    def __enter__(self) -> 'AlmacenPartidos':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    def cerrar(self) -> None:
+        self.conexion.close()
+
+    # --- Escritura ---
+
+    def vacio(self) -> bool:
+        """True si todavía no se ha guardado ninguna ejecución."""
+        return self.conexion.execute("SELECT 1 FROM ejecuciones LIMIT 1").fetchone() is None
+
+    def importar_json(self, ruta: Union[str, Path]) -> int:
+        """
+        Carga un snapshot JSON antiguo como primera ejecución (migración desde
+        partidos_anteriores.json). Devuelve los partidos importados; 0 si no hay fichero.
+        """
+        ruta = Path(ruta)
+        if not ruta.exists():
+            return 0
+        contenido = ruta.read_text(encoding='utf-8').strip()
+        if not contenido:
+            return 0
+        partidos = json.loads(contenido)
+        self.guardar_ejecucion(partidos)
+        return len(partidos)
+
+    def guardar_ejecucion(self, partidos: List[Union[Partido, Dict]], ahora: Optional[datetime] = None,
+                          hojas_sin_leer: Collection[str] = ()) -> int:
+        """
+        Guarda los partidos de una ejecución en una sola transacción (upsert por identidad).
+        Los que cambian suben de versión y la versión nueva queda en 'versiones';
+        los que ya no aparecen se marcan como inactivos (no se borran).
+        Los de hojas_sin_leer (hojas del listado que la ejecución no pudo leer) se quedan
+        como estaban, igual que en cambios_partidos.diferenciar.
+        Devuelve el id de la ejecución.
+        """
+        ahora = (ahora or datetime.now(ZONA_CANARIAS)).isoformat()
+        partidos = list(partidos)
+        if hojas_sin_leer:
+            partidos += [p for p in self.activos() if p.hoja in hojas_sin_leer]
+        actuales = [como_partido(p) for p in deduplicar_partidos(partidos)]
+
+        with self.conexion:
+            cur = self.conexion.execute(
+                "INSERT INTO ejecuciones (fecha, partidos) VALUES (?, ?)", (ahora, len(actuales)))
+            ejecucion = cur.lastrowid
+
+            existentes = {fila['id']: fila for fila in self.conexion.execute(
+                f"SELECT id, version, {', '.join(CAMPOS_VERSIONADOS)} FROM partidos")}
+            self.conexion.execute("UPDATE partidos SET activo = 0 WHERE activo = 1")
+
+            filas, versiones = [], []
+            for pid, p in indexar_por_id(actuales).items():
+                anterior = existentes.get(pid)
+                if anterior is None:
+                    version = 1
+                elif any(anterior[c] != getattr(p, c) for c in CAMPOS_VERSIONADOS):
+                    version = anterior['version'] + 1
+                else:
+                    version = anterior['version']
+                if anterior is None or version != anterior['version']:
+                    versiones.append((pid, version, json.dumps(p.a_dict(), ensure_ascii=False), ejecucion))
+                filas.append((pid, p.dia, p.hora, p.categoria, p.local, p.visitante, p.lugar, p.origen,
+                              p.jornada_tipo, p.hoja, _inicio_utc(p.inicio), codigo_equipo(p.local),
+                              codigo_equipo(p.visitante), normalizar_categoria(p.categoria),
+                              version, ahora, ahora))
+
+            self.conexion.executemany("""
+                INSERT INTO partidos (id, dia, hora, categoria, local, visitante, lugar, origen,
+                                      jornada_tipo, hoja, inicio, club_local, club_visitante, categoria_norm,
+                                      activo, version, primera_vez, ultima_vez)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    dia = excluded.dia, hora = excluded.hora, categoria = excluded.categoria,
+                    local = excluded.local, visitante = excluded.visitante, lugar = excluded.lugar,
+                    origen = excluded.origen, jornada_tipo = excluded.jornada_tipo,
+                    hoja = excluded.hoja, inicio = excluded.inicio, club_local = excluded.club_local,
+                    club_visitante = excluded.club_visitante, categoria_norm = excluded.categoria_norm,
+                    activo = 1, version = excluded.version, ultima_vez = excluded.ultima_vez
+            """, filas)
+            self.conexion.executemany(
+                "INSERT INTO versiones (partido_id, version, datos, ejecucion) VALUES (?, ?, ?, ?)", versiones)
+
+            # Procedencia: qué hojas de jornada aportaron partidos en esta ejecución
+            por_hoja = {}
+            for p in actuales:
+                if p.hoja:
+                    tipo, n = por_hoja.get(p.hoja, (p.jornada_tipo, 0))
+                    por_hoja[p.hoja] = (tipo, n + 1)
+            self.conexion.executemany("""
+                INSERT INTO jornadas (hoja, jornada_tipo, partidos, primera_vez, ultima_vez)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (hoja) DO UPDATE SET
+                    jornada_tipo = excluded.jornada_tipo, partidos = excluded.partidos,
+                    ultima_vez = excluded.ultima_vez
+            """, [(hoja, tipo, n, ahora, ahora) for hoja, (tipo, n) in por_hoja.items()])
+
+        return ejecucion
+
+    # --- Consultas ---
+
+    def _consultar(self, condicion: str = "1", parametros: tuple = ()) -> List[Partido]:
+        filas = self.conexion.execute(
+            f"SELECT {', '.join(_COLUMNAS_PARTIDO)} FROM partidos WHERE activo = 1 AND ({condicion}) "
+            "ORDER BY inicio IS NULL, inicio, id", parametros)
+        return [Partido.desde_dict(dict(fila)) for fila in filas]
+
+    def activos(self) -> List[Partido]:
+        """Partidos de la última ejecución (lo que antes era el snapshot), por fecha."""
+        return self._consultar()
+
+    def vigentes(self, margen: timedelta = timedelta(hours=2), ahora: Optional[datetime] = None) -> List[Partido]:
+        """Partidos que no han terminado (mismo criterio que partido_vigente), usando el índice por fecha."""
+        limite = (ahora or datetime.now(ZONA_CANARIAS)) - margen
+        return self._consultar("inicio IS NULL OR inicio > ?", (_inicio_utc(limite),))
+
+    def de_club(self, codigo: str) -> List[Partido]:
+        """Partidos en los que juega el club con ese código federativo."""
+        return self._consultar("club_local = ? OR club_visitante = ?", (codigo, codigo))
+
+    def de_categoria(self, categoria: str) -> List[Partido]:
+        """Partidos de una categoría (sin el número de partido delante)."""
+        return self._consultar("categoria_norm = ?", (normalizar_categoria(categoria),))
+
+    def versiones(self, partido_id: str) -> List[Dict]:
+        """Historial de un partido: sus versiones de la más antigua a la más reciente."""
+        filas = self.conexion.execute(
+            "SELECT version, datos, ejecucion FROM versiones WHERE partido_id = ? ORDER BY version",
+            (partido_id,))
+        return [{'version': f['version'], 'ejecucion': f['ejecucion'], **json.loads(f['datos'])} for f in filas]
+
+    def exportar_json(self, ruta: Union[str, Path]) -> int:
+        """Exporta los partidos activos al formato de partidos_anteriores.json. Devuelve cuántos."""
+        partidos = [p.a_dict() for p in self.activos()]
+        escribir_atomico(ruta, json.dumps(partidos, ensure_ascii=False, indent=2))
+        return len(partidos)
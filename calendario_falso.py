@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Google Calendar en memoria para probar y medir la sincronización sin cuenta de servicio.
+
+Imita lo que usa calendario_google de la API v3: events().list (paginación, syncToken,
+eventos cancelados en los listados incrementales, 410 con un token caducado),
+insert/update/delete, extendedProperties y new_batch_http_request. Cuenta las
+peticiones HTTP por verbo (un batch es una sola petición) y las operaciones.
+
+    servicio = CalendarioFalso()
+    scraper.sincronizar_google_calendar(partidos, service=servicio, calendar_id='prueba')
+    servicio.llamadas   # Counter({'list': 1, 'batch': 20})
+"""
+
+import copy
+import itertools
+import json
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+
+def _error_http(estado: int, motivo: str, mensaje: str = ''):
+    """HttpError como los de googleapiclient (mismo tipo, mismo contenido JSON)."""
+    import httplib2
+    from googleapiclient.errors import HttpError
+
+    contenido = json.dumps({'error': {'code': estado, 'message': mensaje or motivo,
+                                      'errors': [{'reason': motivo, 'message': mensaje or motivo}]}})
+    return HttpError(httplib2.Response({'status': str(estado)}), contenido.encode('utf-8'))
+
+
+_DIAS_SEMANA = ('Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo')
+
+
+def generar_partidos(n: int, desde: Optional[date] = None) -> List[Dict]:
+    """
+    n partidos distintos con el formato de las hojas de jornada, repartidos en fines de
+    semana a partir de 'desde' (por defecto, mañana): datos para pruebas y benchmarks.
+    """
+    desde = desde or date.today() + timedelta(days=1)
+    partidos = []
+    for i in range(n):
+        fecha = desde + timedelta(days=7 * (i // 40) + (i % 2))
+        partidos.append({
+            'dia': f"{_DIAS_SEMANA[fecha.weekday()]} {fecha:%d/%m/%Y}",
+            'hora': f"{9 + (i // 2) % 12:02d}:{30 * (i % 2):02d}",
+            'categoria': f"Categoría {i % 15}",
+            'local': f"Valsequillo {i}",
+            'visitante': f"Rival {i}",
+            'lugar': f"Pabellón {i % 7}",
+            'jornada_tipo': 'DEFINITIVA',
+        })
+    return partidos
+
+
+class _Peticion:
+    """Petición preparada: se ejecuta sola (execute) o dentro de un batch."""
+
+    def __init__(self, servicio: 'CalendarioFalso', verbo: str, funcion: Callable[[], Dict]):
+        self.servicio = servicio
+        self.verbo = verbo
+        self.funcion = funcion
+
+    def execute(self):
+        self.servicio._contar_llamada(self.verbo)
+        return self.servicio._operar(self.verbo, self.funcion)
+
+
+class _Lote:
+    def __init__(self, servicio: 'CalendarioFalso', callback: Optional[Callable] = None):
+        self.servicio = servicio
+        self.callback = callback
+        self.peticiones = []
+
+    def add(self, peticion: _Peticion, callback: Optional[Callable] = None, request_id: Optional[str] = None):
+        self.peticiones.append((request_id or str(len(self.peticiones) + 1), peticion, callback))
+
+    def execute(self, http=None):
+        self.servicio._contar_llamada('batch')
+        for request_id, peticion, callback in self.peticiones:
+            try:
+                respuesta, error = self.servicio._operar(peticion.verbo, peticion.funcion), None
+            except Exception as e:
+                respuesta, error = None, e
+            (callback or self.callback)(request_id, respuesta, error)
+
+
+class _Eventos:
+    def __init__(self, servicio: 'CalendarioFalso'):
+        self.servicio = servicio
+
+    def list(self, calendarId: str, syncToken: Optional[str] = None, pageToken: Optional[str] = None,
+             maxResults: int = 250, **_):
+        return _Peticion(self.servicio, 'list', lambda: self.servicio._listar(syncToken, pageToken, maxResults))
+
+    def insert(self, calendarId: str, body: Dict, **_):
+        return _Peticion(self.servicio, 'insert', lambda: self.servicio._insertar(body))
+
+    def update(self, calendarId: str, eventId: str, body: Dict, **_):
+        return _Peticion(self.servicio, 'update', lambda: self.servicio._actualizar(eventId, body))
+
+    def delete(self, calendarId: str, eventId: str, **_):
+        return _Peticion(self.servicio, 'delete', lambda: self.servicio._borrar(eventId))
+
+
+class CalendarioFalso:
+    """
+    Un calendario en memoria con la interfaz de googleapiclient (service = build('calendar', 'v3')).
+    Se puede usar desde varios hilos.
+
+    - llamadas: peticiones HTTP por verbo ('list', 'insert', 'update', 'delete', 'batch')
+    - operaciones: cambios aplicados por verbo (dentro o fuera de un batch)
+    - fallar(verbo, error, veces): las próximas operaciones de ese verbo fallan con 'error'
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._eventos: Dict[str, Dict] = {}
+        self._secuencia = itertools.count(1)
+        self._ids = itertools.count(1)
+        self._tokens_validos_desde = 0
+        self._fallos: Dict[str, List[Exception]] = {}
+        self.llamadas: Counter = Counter()
+        self.operaciones: Counter = Counter()
+
+    # --- Interfaz de googleapiclient ---
+
+    def events(self) -> _Eventos:
+        return _Eventos(self)
+
+    def new_batch_http_request(self, callback: Optional[Callable] = None) -> _Lote:
+        return _Lote(self, callback)
+
+    # --- Utilidades para pruebas ---
+
+    def eventos(self) -> List[Dict]:
+        """Eventos vivos (no cancelados), como los devolvería la API."""
+        with self._lock:
+            return [self._publico(e) for e in self._eventos.values() if e['status'] != 'cancelled']
+
+    def fallar(self, verbo: str, error: Optional[Exception] = None, veces: int = 1) -> None:
+        """Las próximas 'veces' operaciones de 'verbo' fallan (por defecto 403 rateLimitExceeded)."""
+        error = error or _error_http(403, 'rateLimitExceeded', 'Rate Limit Exceeded')
+        with self._lock:
+            self._fallos.setdefault(verbo, []).extend([error] * veces)
+
+    def caducar_tokens(self) -> None:
+        """Los syncToken emitidos hasta ahora dejan de valer (la API responde 410)."""
+        with self._lock:
+            self._tokens_validos_desde = next(self._secuencia)
+
+    def reiniciar_contadores(self) -> None:
+        self.llamadas.clear()
+        self.operaciones.clear()
+
+    # --- Implementación ---
+
+    def _contar_llamada(self, verbo: str) -> None:
+        with self._lock:
+            self.llamadas[verbo] += 1
+
+    def _operar(self, verbo: str, funcion: Callable[[], Dict]):
+        with self._lock:
+            fallos = self._fallos.get(verbo)
+            if fallos:
+                raise fallos.pop(0)
+            respuesta = funcion()
+            if verbo != 'list':
+                self.operaciones[verbo] += 1
+            return respuesta
+
+    @staticmethod
+    def _publico(evento: Dict) -> Dict:
+        return {k: copy.deepcopy(v) for k, v in evento.items() if not k.startswith('_')}
+
+    def _guardar(self, evento: Dict) -> Dict:
+        evento['updated'] = datetime.now(timezone.utc).isoformat()
+        evento['_secuencia'] = next(self._secuencia)
+        self._eventos[evento['id']] = evento
+        return self._publico(evento)
+
+    def _listar(self, sync_token: Optional[str], page_token: Optional[str], por_pagina: int) -> Dict:
+        if sync_token is not None:
+            desde = int(sync_token)
+            if desde < self._tokens_validos_desde:
+                raise _error_http(410, 'fullSyncRequired', 'Sync token is no longer valid, a full sync is required.')
+            # Incremental: todo lo cambiado después del token, cancelados incluidos (solo con su id)
+            candidatos = [e if e['status'] != 'cancelled' else {'id': e['id'], 'status': 'cancelled'}
+                          for e in self._eventos.values() if e['_secuencia'] > desde]
+        else:
+            candidatos = [e for e in self._eventos.values() if e['status'] != 'cancelled']
+        # El token de la respuesta se fija en la primera página (como hace la API)
+        posicion, token = (int(x) for x in page_token.split(':')) if page_token else (0, next(self._secuencia))
+        pagina = candidatos[posicion:posicion + max(1, por_pagina)]
+        respuesta = {'kind': 'calendar#events', 'items': [self._publico(e) for e in pagina]}
+        if posicion + len(pagina) < len(candidatos):
+            respuesta['nextPageToken'] = f"{posicion + len(pagina)}:{token}"
+        else:
+            respuesta['nextSyncToken'] = str(token)
+        return respuesta
+
+    def _insertar(self, cuerpo: Dict) -> Dict:
+        evento = copy.deepcopy(cuerpo)
+        evento.update({'id': f"ev{next(self._ids):06d}", 'status': 'confirmed',
+                       'created': datetime.now(timezone.utc).isoformat()})
+        return self._guardar(evento)
+
+    def _existente(self, evento_id: str) -> Dict:
+        evento = self._eventos.get(evento_id)
+        if evento is None:
+            raise _error_http(404, 'notFound', 'Not Found')
+        if evento['status'] == 'cancelled':
+            raise _error_http(410, 'deleted', 'Resource has been deleted')
+        return evento
+
+    def _actualizar(self, evento_id: str, cuerpo: Dict) -> Dict:
+        anterior = self._existente(evento_id)
+        evento = copy.deepcopy(cuerpo)
+        evento.update({'id': evento_id, 'status': 'confirmed', 'created': anterior['created']})
+        return self._guardar(evento)
+
+    def _borrar(self, evento_id: str) -> Dict:
+        evento = self._existente(evento_id)
+        # Se queda como cancelado para los listados incrementales
+        self._guardar({'id': evento_id, 'status': 'cancelled', 'created': evento['created']})
+        return {}
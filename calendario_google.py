@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sincronización con Google Calendar: espejo local de los eventos y envío de cambios
+con peticiones batch.
+
+EspejoCalendar guarda en cache/ una copia de los eventos del calendario y la mantiene
+al día con listados incrementales (syncToken): en una ejecución normal solo se
+descargan los eventos que han cambiado desde la anterior.
+
+La sincronización calcula primero un plan (lista de Operacion: crear, actualizar o
+borrar eventos) a partir de un mapa partido_id -> (partido, inicio) que se construye
+una sola vez; cada evento lleva en extendedProperties la huella de su contenido, así
+que los que no han cambiado no se tocan.
+
+El plan se envía con service.new_batch_http_request(), hasta TAM_LOTE operaciones por
+petición HTTP, con varios lotes a la vez y un limitador de tasa (token bucket) ajustado
+a la cuota de la API. Cada operación tiene su propia respuesta dentro del lote: las que
+fallan por cuota o por un error transitorio se reintentan en otra pasada tras una
+espera exponencial, el resto se devuelven como fallidas.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from escritura_atomica import escribir_atomico
+from partido import Partido, como_partido, ZONA_CANARIAS
+
+logger = logging.getLogger(__name__)
+
+# Espejo local de los eventos del calendario (en el directorio de caché del scraper)
+RUTA_ESPEJO = Path("cache") / "calendar_espejo.json"
+
+# Eventos por página al listar el calendario (máximo de la API: 2500)
+EVENTOS_POR_PAGINA = 250
+
+# Duración de los eventos de partido
+DURACION_EVENTO = timedelta(hours=1, minutes=45)
+
+# Operaciones por petición batch (Google recomienda no pasar de 50)
+TAM_LOTE = 50
+
+# Pasadas adicionales para las operaciones que fallan por un error transitorio
+MAX_REINTENTOS = 5
+
+# Espera antes de cada pasada de reintentos: ESPERA_BASE * 2^n segundos (con jitter), hasta ESPERA_MAXIMA
+ESPERA_BASE = 1.0
+ESPERA_MAXIMA = 32.0
+
+# Operaciones por segundo (cuota por defecto de la API: 600 peticiones por minuto y usuario;
+# cada operación de un batch cuenta como una petición)
+OPERACIONES_POR_SEGUNDO = 10
+
+# Lotes que se envían a la vez
+HILOS_ENVIO = 4
+
+# Errores HTTP transitorios (el 403 solo si es por cuota, ver es_reintentable)
+_ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class Operacion:
+    """Un cambio sobre un evento: 'insert' (cuerpo), 'update' (evento_id y cuerpo) o 'delete' (evento_id)."""
+    verbo: str
+    evento_id: Optional[str] = None
+    cuerpo: Optional[Dict] = None
+    descripcion: str = ''
+    # Para el resumen: 'legacy' u 'obsoleto' en los borrados
+    motivo: str = ''
+    # Evento devuelto por la API al aplicarla (insert y update)
+    respuesta: Optional[Dict] = None
+
+
+@dataclass
+class ResultadoEnvio:
+    hechas: List[Operacion] = field(default_factory=list)
+    fallidas: List[Tuple[Operacion, BaseException]] = field(default_factory=list)
+    lotes: int = 0
+    reintentos: int = 0
+    # Operaciones rechazadas por cuota (403/429 rateLimitExceeded), en todas las pasadas
+    limitadas: int = 0
+    # Segundos de envío en total, de espera en el limitador y de espera entre pasadas
+    segundos: float = 0.0
+    espera_limitador: float = 0.0
+    espera_reintentos: float = 0.0
+
+    def contar(self, verbo: str, motivo: Optional[str] = None) -> int:
+        return sum(1 for op in self.hechas if op.verbo == verbo and (motivo is None or op.motivo == motivo))
+
+    @property
+    def operaciones_por_segundo(self) -> float:
+        return len(self.hechas) / self.segundos if self.segundos > 0 else 0.0
+
+    def resumen(self) -> str:
+        return (f"{len(self.hechas)} operaciones en {self.segundos:.1f}s ({self.operaciones_por_segundo:.1f} op/s), "
+                f"{self.lotes} lotes, {self.reintentos} reintentos ({self.limitadas} por cuota), "
+                f"esperas: {self.espera_limitador:.1f}s limitador + {self.espera_reintentos:.1f}s reintentos")
+
+
+class LimitadorTasa:
+    """
+    Token bucket: 'por_segundo' fichas por segundo, hasta 'capacidad' acumuladas.
+    tomar(n) reserva n fichas y espera lo que falte; las reservas de varios hilos se
+    encolan (cada una espera a que se repongan las suyas).
+    """
+
+    def __init__(self, por_segundo: float, capacidad: Optional[float] = None,
+                 reloj: Callable[[], float] = time.monotonic, dormir: Callable[[float], None] = time.sleep):
+        if por_segundo <= 0:
+            raise ValueError("La tasa debe ser positiva")
+        self.por_segundo = por_segundo
+        self.capacidad = capacidad if capacidad is not None else por_segundo
+        self.reloj = reloj
+        self.dormir = dormir
+        self._fichas = self.capacidad
+        self._ultimo = reloj()
+        self._lock = threading.Lock()
+
+    def tomar(self, n: float = 1) -> float:
+        """Reserva n fichas, esperando si hace falta. Devuelve los segundos esperados."""
+        with self._lock:
+            ahora = self.reloj()
+            self._fichas = min(self.capacidad, self._fichas + (ahora - self._ultimo) * self.por_segundo)
+            self._ultimo = ahora
+            self._fichas -= n
+            espera = -self._fichas / self.por_segundo if self._fichas < 0 else 0.0
+        if espera > 0:
+            self.dormir(espera)
+        return espera
+
+
+def espera_reintento(pasada: int) -> float:
+    """Espera antes de la pasada de reintentos n (1, 2...): exponencial con jitter."""
+    return min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** (pasada - 1)) * random.uniform(0.5, 1.0)
+
+
+def estado_http(error: BaseException) -> Optional[int]:
+    """Código HTTP de un HttpError de googleapiclient (None si no viene de una respuesta)."""
+    estado = getattr(getattr(error, 'resp', None), 'status', None)
+    return int(estado) if estado is not None else None
+
+
+def es_limite_de_cuota(error: BaseException) -> bool:
+    """403/429 con motivo rateLimitExceeded o userRateLimitExceeded."""
+    if estado_http(error) == 429:
+        return True
+    if estado_http(error) != 403:
+        return False
+    contenido = getattr(error, 'content', b'') or b''
+    if isinstance(contenido, bytes):
+        contenido = contenido.decode('utf-8', errors='replace')
+    try:
+        motivos = [e.get('reason', '') for e in json.loads(contenido)['error'].get('errors', [])]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        motivos = [contenido]
+    return any('ratelimitexceeded' in m.lower() for m in motivos)
+
+
+def es_reintentable(error: BaseException) -> bool:
+    """Fallo de red (sin respuesta HTTP), límite de cuota o error 5xx/429."""
+    estado = estado_http(error)
+    return estado is None or estado in _ESTADOS_REINTENTABLES or es_limite_de_cuota(error)
+
+
+def peticion_operacion(service, calendar_id: str, op: Operacion):
+    """Petición de la API (sin ejecutar) para una operación."""
+    eventos = service.events()
+    if op.verbo == 'insert':
+        return eventos.insert(calendarId=calendar_id, body=op.cuerpo)
+    if op.verbo == 'update':
+        return eventos.update(calendarId=calendar_id, eventId=op.evento_id, body=op.cuerpo)
+    if op.verbo == 'delete':
+        return eventos.delete(calendarId=calendar_id, eventId=op.evento_id)
+    raise ValueError(f"Operación desconocida: {op.verbo}")
+
+
+def _ejecutar(verbo: str, peticion):
+    return peticion.execute()
+
+
+class _ConHttp:
+    """Petición batch que se ejecuta con una conexión propia (httplib2 no admite hilos)."""
+
+    def __init__(self, batch, http):
+        self.batch = batch
+        self.http = http
+
+    def execute(self):
+        return self.batch.execute(http=self.http)
+
+
+def _enviar_lote(service, calendar_id: str, lote: List[Operacion],
+                 llamar: Callable[[str, Any], Any], http=None) -> Dict[int, BaseException]:
+    """Envía un lote en una petición batch. Devuelve {posición en el lote: error} de las fallidas."""
+    respuestas: Dict[int, Optional[BaseException]] = {}
+
+    def recibir(request_id, respuesta, excepcion):
+        respuestas[int(request_id)] = excepcion
+        if excepcion is None and isinstance(respuesta, dict):
+            lote[int(request_id)].respuesta = respuesta
+
+    batch = service.new_batch_http_request(callback=recibir)
+    for n, op in enumerate(lote):
+        batch.add(peticion_operacion(service, calendar_id, op), request_id=str(n))
+    try:
+        llamar('batch', batch if http is None else _ConHttp(batch, http))
+    except Exception as e:
+        # La petición batch entera falló (red, autenticación...): todas sus operaciones
+        return {n: e for n in range(len(lote))}
+    errores = {}
+    for n in range(len(lote)):
+        if n not in respuestas:
+            errores[n] = RuntimeError("Operación sin respuesta en el lote")
+        elif respuestas[n] is not None:
+            errores[n] = respuestas[n]
+    return errores
+
+
+def enviar_plan(service, calendar_id: str, operaciones: List[Operacion], tam_lote: int = TAM_LOTE,
+                max_reintentos: int = MAX_REINTENTOS,
+                llamar: Callable[[str, Any], Any] = _ejecutar, hilos: int = 1,
+                limitador: Optional[LimitadorTasa] = None, nueva_http: Optional[Callable[[], Any]] = None,
+                dormir: Optional[Callable[[float], None]] = None) -> ResultadoEnvio:
+    """
+    Envía las operaciones en lotes de hasta tam_lote, 'hilos' lotes a la vez. Antes de
+    cada lote se toman del limitador tantas fichas como operaciones lleva. Las que fallan
+    con un error reintentable se vuelven a enviar juntas tras una espera exponencial
+    (hasta max_reintentos pasadas más). Borrar un evento que ya no existe (404/410) cuenta
+    como hecho.
+
+    'llamar(verbo, peticion)' ejecuta cada petición batch (para contarlas y medirlas).
+    'nueva_http()' crea la conexión de cada hilo (necesario con varios hilos y el servicio
+    real de googleapiclient; sin ella se usa la del servicio).
+    """
+    resultado = ResultadoEnvio()
+    conexiones = threading.local()
+    inicio_envio = time.perf_counter()
+
+    def enviar(lote: List[Operacion]) -> Dict[int, BaseException]:
+        if limitador is not None:
+            espera = limitador.tomar(len(lote))
+            with bloqueo:
+                resultado.espera_limitador += espera
+        http = None
+        if nueva_http is not None:
+            if not hasattr(conexiones, 'http'):
+                conexiones.http = nueva_http()
+            http = conexiones.http
+        return _enviar_lote(service, calendar_id, lote, llamar, http)
+
+    bloqueo = threading.Lock()
+    pendientes = list(operaciones)
+    with ThreadPoolExecutor(max_workers=max(1, hilos)) as pool:
+        for intento in range(max_reintentos + 1):
+            if not pendientes:
+                break
+            if intento:
+                espera = espera_reintento(intento)
+                resultado.reintentos += len(pendientes)
+                resultado.espera_reintentos += espera
+                logger.info(f"🔁 Reintentando {len(pendientes)} operación(es) de Calendar en {espera:.1f}s "
+                            f"(pasada {intento + 1})")
+                (dormir or time.sleep)(espera)
+            lotes = [pendientes[n:n + max(1, tam_lote)] for n in range(0, len(pendientes), max(1, tam_lote))]
+            reintentar = []
+            for lote, errores in zip(lotes, pool.map(enviar, lotes)):
+                resultado.lotes += 1
+                for n, op in enumerate(lote):
+                    error = errores.get(n)
+                    if error is not None and es_limite_de_cuota(error):
+                        resultado.limitadas += 1
+                    if error is None or (op.verbo == 'delete' and estado_http(error) in (404, 410)):
+                        resultado.hechas.append(op)
+                    elif es_reintentable(error) and intento < max_reintentos:
+                        reintentar.append(op)
+                    else:
+                        resultado.fallidas.append((op, error))
+            pendientes = reintentar
+    resultado.segundos = time.perf_counter() - inicio_envio
+    return resultado
+
+
+def _ejecutar_listado(service, llamar, **parametros) -> Tuple[List[Dict], Optional[str]]:
+    """Todas las páginas de un events().list. Devuelve (eventos, nextSyncToken)."""
+    eventos = []
+    pagina = None
+    while True:
+        pagina_actual = {'pageToken': pagina} if pagina else {}
+        respuesta = llamar('list', service.events().list(**parametros, **pagina_actual))
+        eventos.extend(respuesta.get('items', []))
+        pagina = respuesta.get('nextPageToken')
+        if not pagina:
+            return eventos, respuesta.get('nextSyncToken')
+
+
+def inicio_evento(evento: Dict) -> Optional[datetime]:
+    """Inicio de un evento como datetime con zona (los de día completo, a las 00:00 en Canarias)."""
+    inicio = evento.get('start') or {}
+    try:
+        if inicio.get('dateTime'):
+            fecha = datetime.fromisoformat(inicio['dateTime'])
+            return fecha if fecha.tzinfo else fecha.replace(tzinfo=ZONA_CANARIAS)
+        if inicio.get('date'):
+            return datetime.fromisoformat(inicio['date']).replace(tzinfo=ZONA_CANARIAS)
+    except ValueError:
+        pass
+    return None
+
+
+class EspejoCalendar:
+    """
+    Copia local de los eventos de un calendario y el syncToken con el que pedir solo
+    los cambios. Se guarda por id de evento (los borrados del listado incremental solo
+    traen el id); por_partido() da la vista por partido_id que usa la sincronización.
+
+        espejo = EspejoCalendar(ruta, calendar_id)
+        espejo.actualizar(service)       # listado completo la primera vez, incremental después
+        eventos, sobrantes = espejo.por_partido(desde)
+        ...
+        espejo.aplicar(resultado.hechas)
+        espejo.guardar()
+    """
+
+    def __init__(self, ruta: Union[str, Path], calendar_id: str):
+        self.ruta = Path(ruta)
+        self.calendar_id = calendar_id
+        self.sync_token: Optional[str] = None
+        self.eventos: Dict[str, Dict] = {}
+        try:
+            datos = json.loads(self.ruta.read_text(encoding='utf-8'))
+            if datos.get('calendar_id') == calendar_id:
+                self.sync_token = datos.get('sync_token')
+                self.eventos = datos.get('eventos', {})
+        except (OSError, ValueError):
+            pass  # Sin espejo (o ilegible): la primera actualización lista el calendario entero
+
+    def actualizar(self, service, llamar: Callable[[str, Any], Any] = _ejecutar) -> int:
+        """
+        Trae los cambios del calendario. Con syncToken solo llegan los eventos modificados
+        o borrados desde la última vez; si Google lo da por caducado (410), listado completo.
+        Devuelve cuántos eventos se recibieron.
+        """
+        if self.sync_token:
+            try:
+                cambios, token = _ejecutar_listado(service, llamar, calendarId=self.calendar_id,
+                                                   syncToken=self.sync_token, singleEvents=True,
+                                                   maxResults=EVENTOS_POR_PAGINA)
+            except Exception as e:
+                if estado_http(e) != 410:
+                    raise
+                logger.info("🔄 syncToken de Google Calendar caducado: se vuelve a listar el calendario completo")
+            else:
+                for evento in cambios:
+                    if evento.get('status') == 'cancelled':
+                        self.eventos.pop(evento['id'], None)
+                    else:
+                        self.eventos[evento['id']] = evento
+                self.sync_token = token or self.sync_token
+                return len(cambios)
+
+        eventos, token = _ejecutar_listado(service, llamar, calendarId=self.calendar_id,
+                                           singleEvents=True, maxResults=EVENTOS_POR_PAGINA)
+        self.eventos = {e['id']: e for e in eventos if e.get('status') != 'cancelled'}
+        self.sync_token = token
+        return len(eventos)
+
+    def por_partido(self, desde: Optional[datetime] = None) -> Tuple[Dict[str, Dict], List[Dict]]:
+        """
+        Eventos que empiezan a partir de 'desde' (todos si es None):
+        ({partido_id: evento}, sobrantes). Sobrantes son los eventos sin partido_id
+        (del sistema anterior) y los repetidos de un mismo partido, que hay que borrar.
+        """
+        por_id: Dict[str, Dict] = {}
+        sobrantes = []
+        for evento in sorted(self.eventos.values(), key=lambda e: (e.get('created', ''), e['id'])):
+            if desde is not None:
+                inicio = inicio_evento(evento)
+                if inicio is not None and inicio < desde:
+                    continue
+            partido_id = ((evento.get('extendedProperties') or {}).get('private') or {}).get('partido_id')
+            if partido_id and partido_id not in por_id:
+                por_id[partido_id] = evento
+            else:
+                sobrantes.append(evento)
+        return por_id, sobrantes
+
+    def aplicar(self, hechas: List[Operacion]) -> None:
+        """Refleja en el espejo las operaciones ya aplicadas en Google Calendar."""
+        for op in hechas:
+            if op.verbo == 'delete':
+                self.eventos.pop(op.evento_id, None)
+            elif op.respuesta and op.respuesta.get('id'):
+                self.eventos[op.respuesta['id']] = op.respuesta
+
+    def guardar(self) -> None:
+        escribir_atomico(self.ruta, json.dumps({'calendar_id': self.calendar_id, 'sync_token': self.sync_token,
+                                                'eventos': self.eventos}, ensure_ascii=False))
+
+
+# --- Plan de sincronización ---
+
+def id_partido(partido: Dict) -> str:
+    """
+    ID del partido en extendedProperties (md5 de equipos, categoría, día y hora). Es el
+    que llevan los eventos ya creados: cambiarlo duplicaría todo el calendario.
+    """
+    info = f"{partido['local']}|{partido['visitante']}|{partido['categoria']}|{partido['dia']}|{partido['hora']}"
+    return hashlib.md5(info.encode('utf-8')).hexdigest()
+
+
+def mapa_partidos(partidos: List[Dict]) -> Dict[str, Tuple[Partido, datetime]]:
+    """
+    {partido_id: (partido, inicio)}, calculado una vez por sincronización. Los partidos
+    sin fecha u hora reconocibles no pueden ir al calendario y se quedan fuera.
+    """
+    mapa = {}
+    for p in partidos:
+        p = como_partido(p)
+        inicio = p.inicio
+        if inicio is None:
+            logger.warning(f"No se pudo parsear fecha para: {p['local']} vs {p['visitante']}")
+            continue
+        mapa.setdefault(id_partido(p), (p, inicio))
+    return mapa
+
+
+def huella_evento(cuerpo: Dict) -> str:
+    """Huella del contenido de un evento (sin sus extendedProperties)."""
+    contenido = {k: v for k, v in cuerpo.items() if k != 'extendedProperties'}
+    return hashlib.sha256(json.dumps(contenido, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def cuerpo_evento(p: Dict, partido_id: str, inicio: datetime) -> Dict:
+    """Evento de Google Calendar para un partido, con su partido_id y la huella del contenido."""
+    # Determinar si es provisional o definitivo
+    es_provisional = p.get('jornada_tipo') == 'PROVISIONAL'
+    titulo_prefix = "⚠️ PROVISIONAL: " if es_provisional else ""
+
+    cuerpo = {
+        'summary': f"{titulo_prefix}🏀 {p['local']} vs {p['visitante']}",
+        'location': p['lugar'],
+        'description': f"Categoría: {p['categoria']}\nTipo: {p.get('jornada_tipo', 'N/A')}\nCompetición: CB Valsequillo\n\nCalendario actualizado automáticamente cada día a las 8 AM.",
+        'start': {
+            'dateTime': inicio.isoformat(),
+            'timeZone': 'Atlantic/Canary',
+        },
+        'end': {
+            'dateTime': (inicio + DURACION_EVENTO).isoformat(),
+            'timeZone': 'Atlantic/Canary',
+        },
+        'reminders': {
+            'useDefault': False,
+            'overrides': [
+                {'method': 'popup', 'minutes': 24 * 60},  # 1 día antes
+                {'method': 'popup', 'minutes': 120},       # 2 horas antes
+            ],
+        },
+    }
+    cuerpo['extendedProperties'] = {
+        'private': {
+            'partido_id': partido_id,
+            'local': p['local'],
+            'visitante': p['visitante'],
+            'categoria': p['categoria'],
+            'huella': huella_evento(cuerpo),
+        }
+    }
+    return cuerpo
+
+
+def _sin_cambios(existente: Dict, cuerpo: Dict) -> bool:
+    """
+    El evento del calendario ya tiene este contenido. Los creados antes de guardar la
+    huella se comparan por título, lugar e inicio (como instante, no como texto).
+    """
+    privadas = (existente.get('extendedProperties') or {}).get('private') or {}
+    if privadas.get('huella'):
+        return privadas['huella'] == cuerpo['extendedProperties']['private']['huella']
+    return (existente.get('summary') == cuerpo['summary'] and existente.get('location') == cuerpo['location']
+            and inicio_evento(existente) == datetime.fromisoformat(cuerpo['start']['dateTime']))
+
+
+def planificar(partidos: Dict[str, Tuple[Partido, datetime]], eventos: Dict[str, Dict],
+               sobrantes: List[Dict] = ()) -> Tuple[List[Operacion], int]:
+    """
+    Plan para dejar el calendario como la lista de partidos:
+      - borrar los eventos sobrantes (sin partido_id o repetidos);
+      - crear los partidos sin evento y actualizar los que cambiaron;
+      - borrar los eventos de partidos que ya no están, salvo los posteriores al último
+        partido de la lista (jornadas aún no publicadas en las hojas que se procesan).
+
+    'partidos' es el resultado de mapa_partidos y 'eventos' el de EspejoCalendar.por_partido.
+    Devuelve (operaciones, eventos sin cambios).
+    """
+    plan = [Operacion('delete', e['id'], descripcion=e.get('summary', 'Sin título'), motivo='legacy')
+            for e in sobrantes]
+    sin_cambios = 0
+    for partido_id, (p, inicio) in partidos.items():
+        cuerpo = cuerpo_evento(p, partido_id, inicio)
+        existente = eventos.get(partido_id)
+        if existente is None:
+            plan.append(Operacion('insert', cuerpo=cuerpo, descripcion=cuerpo['summary']))
+        elif _sin_cambios(existente, cuerpo):
+            sin_cambios += 1
+        else:
+            plan.append(Operacion('update', existente['id'], cuerpo, descripcion=cuerpo['summary']))
+
+    fecha_max: Optional[date] = max((inicio.date() for _, inicio in partidos.values()), default=None)
+    for partido_id, evento in eventos.items():
+        if partido_id in partidos:
+            continue
+        inicio = inicio_evento(evento)
+        if fecha_max and inicio and inicio.astimezone(ZONA_CANARIAS).date() > fecha_max:
+            logger.debug(f"Saltando eliminación de evento futuro lejano: {evento.get('summary')}")
+            continue
+        plan.append(Operacion('delete', evento['id'], descripcion=evento.get('summary', 'Sin título'),
+                              motivo='obsoleto'))
+    return plan, sin_cambios
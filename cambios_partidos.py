@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detección de cambios entre ejecuciones, campo a campo, sobre la identidad estable
+de cada partido (partido.id_estable), e historial de cambios en JSON Lines.
+
+Cada ejecución con cambios añade una línea a historial_cambios.jsonl:
+    {"fecha": "...", "eventos": [{"tipo": "modificado", "id": "...", "cambios": {...}, ...}]}
+para que los avisos (email, Telegram...) lean solo los deltas.
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Collection, Dict, Iterator, List, Optional, Union
+
+from partido import (Partido, como_partido, indexar_por_id, deduplicar_partidos,
+                     identidad_partido, partido_vigente, ZONA_CANARIAS)
+
+RUTA_HISTORIAL = Path("historial_cambios.jsonl")
+
+# Campos que se comparan entre ejecuciones ('origen' es procedencia, no contenido)
+CAMPOS_COMPARADOS = ('dia', 'hora', 'lugar', 'jornada_tipo', 'local', 'visitante', 'categoria')
+
+# Campos que se avisan en el email y en el log, con su etiqueta
+ETIQUETAS_AVISO = {'dia': 'Día', 'hora': 'Hora', 'lugar': 'Lugar', 'jornada_tipo': 'Estado'}
+
+
+def diferenciar(anteriores: List[Union[Partido, Dict]], actuales: List[Union[Partido, Dict]],
+                hojas_sin_leer: Collection[str] = ()) -> List[Dict]:
+    """
+    Eventos de cambio entre dos ejecuciones, en tiempo lineal (índices por id_estable):
+      - 'alta': partido nuevo
+      - 'baja': partido que ya no aparece
+      - 'modificado': mismo partido con algún campo distinto; 'cambios' = {campo: [antes, después]}
+    Cada evento lleva el 'id' estable y el 'partido' (el actual, o el anterior en las bajas).
+    
+    hojas_sin_leer: hojas del listado que esta ejecución no pudo descargar o extraer. Sus
+    partidos anteriores cuentan como actuales: ni bajas ni cambios por una descarga fallida.
+    """
+    anteriores = [como_partido(p) for p in anteriores]
+    actuales = list(actuales) + [p for p in anteriores if p.hoja in hojas_sin_leer]
+    previos = indexar_por_id(deduplicar_partidos(anteriores))
+    nuevos = indexar_por_id([como_partido(p) for p in deduplicar_partidos(actuales)])
+
+    eventos = []
+    for pid, actual in nuevos.items():
+        anterior = previos.get(pid)
+        if anterior is None:
+            eventos.append({'tipo': 'alta', 'id': pid, 'partido': actual.a_dict()})
+            continue
+        cambios = {c: [anterior.get(c), actual.get(c)] for c in CAMPOS_COMPARADOS
+                   if anterior.get(c) != actual.get(c)}
+        if cambios:
+            eventos.append({'tipo': 'modificado', 'id': pid, 'partido': actual.a_dict(), 'cambios': cambios})
+    for pid, anterior in previos.items():
+        if pid not in nuevos:
+            eventos.append({'tipo': 'baja', 'id': pid, 'partido': anterior.a_dict()})
+    return eventos
+
+
+def resumen_cambios(eventos: List[Dict], ahora: Optional[datetime] = None) -> List[Dict]:
+    """
+    Cambios que merecen aviso, en el formato que usan el email y el log:
+    {'partido', 'local', 'visitante', 'cambios': ['Hora: 18:00 → 19:30', ...]}.
+    Incluye las modificaciones de día, hora, lugar o estado y las bajas de partidos que
+    aún no se han jugado (las de partidos pasados son las jornadas que salen del listado).
+    Las altas no se avisan: cada jornada nueva trae partidos nuevos.
+    """
+    resumen = []
+    for evento in eventos:
+        p = evento['partido']
+        if evento['tipo'] == 'modificado':
+            lineas = [f"{etiqueta}: {evento['cambios'][campo][0] or 'DESCONOCIDO'} → {evento['cambios'][campo][1] or 'DESCONOCIDO'}"
+                      for campo, etiqueta in ETIQUETAS_AVISO.items() if campo in evento['cambios']]
+        elif evento['tipo'] == 'baja' and partido_vigente(p, ahora=ahora):
+            lineas = ["Partido eliminado de las hojas de jornada"]
+        else:
+            continue
+        if lineas:
+            resumen.append({
+                'partido': identidad_partido(p),
+                'local': p['local'],
+                'visitante': p['visitante'],
+                'cambios': lineas,
+            })
+    return resumen
+
+
+def registrar_historial(eventos: List[Dict], ruta: Union[str, Path] = RUTA_HISTORIAL,
+                        fecha: Optional[datetime] = None) -> bool:
+    """
+    Añade los eventos de una ejecución como una línea compacta. Sin eventos no escribe nada.
+    Si una ejecución interrumpida dejó una línea a medias, la nueva empieza en su propia línea
+    (leer_historial descarta la dañada).
+    """
+    if not eventos:
+        return False
+    linea = json.dumps({'fecha': (fecha or datetime.now(ZONA_CANARIAS)).isoformat(), 'eventos': eventos},
+                       ensure_ascii=False, separators=(',', ':')) + '\n'
+    ruta = Path(ruta)
+    with open(ruta, 'ab') as f:
+        if f.tell() > 0:
+            with open(ruta, 'rb') as lectura:
+                lectura.seek(-1, os.SEEK_END)
+                if lectura.read(1) != b'\n':
+                    linea = '\n' + linea
+        f.write(linea.encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+    return True
+
+
+def leer_historial(ruta: Union[str, Path] = RUTA_HISTORIAL, desde: Optional[datetime] = None) -> Iterator[Dict]:
+    """Ejecuciones del historial (las posteriores a 'desde' si se indica). Ignora líneas dañadas."""
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return
+    with open(ruta, encoding='utf-8', errors='replace') as f:
+        for linea in f:
+            try:
+                ejecucion = json.loads(linea)
+            except json.JSONDecodeError:
+                continue
+            if desde is None or datetime.fromisoformat(ejecucion['fecha']) > desde:
+                yield ejecucion
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lectura de config.ini (solo lo que usa el código; el resto del fichero es orientativo)
+"""
+
+import configparser
+from pathlib import Path
+from typing import List
+
+RUTA_CONFIG = Path("config.ini")
+EQUIPOS_POR_DEFECTO = ["Valsequillo"]
+
+
+def cargar_equipos(ruta: Path = RUTA_CONFIG) -> List[str]:
+    """
+    Equipos a buscar según la sección [FILTRADO] de config.ini.
+    'equipos' (lista separada por comas) tiene prioridad sobre 'equipo'. Cada entrada
+    puede ser un nombre ("Agüimes") o un código federativo ("35008831").
+    Si no hay fichero o no hay nada configurado, se busca Valsequillo.
+    """
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(ruta, encoding='utf-8')
+
+    valor = config.get('FILTRADO', 'equipos', fallback='') or config.get('FILTRADO', 'equipo', fallback='')
+    equipos = [e.strip() for e in valor.split(',') if e.strip()]
+    return equipos or list(EQUIPOS_POR_DEFECTO)
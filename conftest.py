@@ -0,0 +1,25 @@
+# conftest.py
+import pytest
+
+
+def _partido(**campos):
+    """Partido como lo entrega descargar_y_extraer (escáner de líneas + tipo y título de la hoja)."""
+    base = {
+        "dia": "Sábado 21/03/26",
+        "hora": "18:00",
+        "categoria": "78270 Senior Masc S-A",
+        "local": "CB Valsequillo (35008831)",
+        "visitante": "Gran Canaria B (35004700)",
+        "lugar": "Pab Municipal Valsequillo",
+        "origen": "Página 1",
+        "jornada_tipo": "PROVISIONAL",
+        "hoja": "Jornada 25 (16-22 Mar) PROVISIONAL",
+    }
+    base.update(campos)
+    return base
+
+
+@pytest.fixture
+def partido():
+    """Fábrica de partidos: partido(hora="20:00", ...) cambia solo los campos indicados."""
+    return _partido
@@ -0,0 +1,66 @@
+from scraper_baloncesto import ScraperBaloncesto
+from calendario_falso import CalendarioFalso, generar_partidos
+from metricas import Metricas
+import logging
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Solo errores: el log de cada evento distorsiona los tiempos
+logging.getLogger('scraper_baloncesto').setLevel(logging.ERROR)
+logging.getLogger('calendario_google').setLevel(logging.ERROR)
+
+def debug_calendar():
+    """
+    Mide la sincronización con Google Calendar contra el calendario en memoria:
+    peticiones HTTP por verbo y operaciones de cada escenario. Sin limitador de tasa,
+    salvo en el último (cuota de la API con rechazos 429 y reintentos).
+    Uso: python debug_calendar.py [número de partidos]   (por defecto 1000)
+    """
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    servicio = CalendarioFalso()
+    partidos = generar_partidos(n)
+
+    with tempfile.TemporaryDirectory() as cache:
+        scraper = ScraperBaloncesto()
+        scraper.cache_dir = Path(cache)
+        scraper.operaciones_por_segundo_calendar = 0
+
+        def escenario(nombre, lista):
+            servicio.reiniciar_contadores()
+            scraper.metricas = Metricas()
+            inicio = time.perf_counter()
+            correcto = scraper.sincronizar_google_calendar(lista, service=servicio, calendar_id='benchmark')
+            ms = (time.perf_counter() - inicio) * 1000
+            peticiones = ', '.join(f"{v} {k}" for k, v in sorted(servicio.llamadas.items())) or '-'
+            operaciones = ', '.join(f"{v} {k}" for k, v in sorted(servicio.operaciones.items())) or '-'
+            print(f"   {'✅' if correcto else '❌'} {nombre:<28} {sum(servicio.llamadas.values()):>5} peticiones "
+                  f"({peticiones})  |  operaciones: {operaciones}  |  {ms:8.1f} ms")
+            if scraper.metricas.valor('calendar_reintentos'):
+                print(f"      🔁 {scraper.metricas.valor('calendar_reintentos'):.0f} reintentos "
+                      f"({scraper.metricas.valor('calendar_limitadas'):.0f} por cuota), "
+                      f"{sum(servicio.operaciones.values()) / (ms / 1000):.0f} op/s")
+
+        print(f"\n📅 Sincronización de {n} partidos (calendario en memoria)")
+        escenario("Inicio de temporada", partidos)
+        escenario("Eco de las escrituras", partidos)
+        escenario("Estado estable", partidos)
+
+        # Tormenta de aplazamientos: el 20% cambia de hora (nuevo partido_id) y el 10% de pabellón
+        tormenta = [dict(p, hora='21:45') if i % 5 == 0 else dict(p, lugar='Pabellón nuevo') if i % 10 == 1 else p
+                    for i, p in enumerate(partidos)]
+        escenario("Tormenta de aplazamientos", tormenta)
+        escenario("Eco de las escrituras", tormenta)
+
+        servicio.caducar_tokens()
+        escenario("syncToken caducado (410)", tormenta)
+
+        # Otra temporada con el limitador a 500 op/s y la API rechazando 100 altas por cuota
+        scraper.operaciones_por_segundo_calendar = 500
+        servicio.fallar('insert', veces=100)
+        escenario("Nueva temporada con cuota", generar_partidos(n, desde=date.today() + timedelta(days=3)))
+
+if __name__ == "__main__":
+    debug_calendar()
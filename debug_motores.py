@@ -0,0 +1,54 @@
+from scraper_baloncesto import ScraperBaloncesto, MOTORES
+from partido import clave_partido
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Solo errores: el log de cada partido encontrado distorsiona los tiempos
+logging.getLogger('scraper_baloncesto').setLevel(logging.ERROR)
+
+REPETICIONES = 5
+
+def debug_motores():
+    """
+    Compara los motores de extracción sobre los mismos PDFs: tiempo y diferencias.
+    Uso: python debug_motores.py [pdf ...]   (sin argumentos descarga las jornadas recientes)
+    """
+    scraper = ScraperBaloncesto()
+    scraper.usar_cache_parseo = False  # Medir la extracción de verdad, no la caché
+    todos = '--todos' in sys.argv
+    rutas = [Path(a) for a in sys.argv[1:] if not a.startswith('--')]
+
+    if not rutas:
+        print("\n🔍 Descargando PDFs...")
+        rutas = [info['path'] for info in scraper.descargar_pdfs_recientes()]
+    if not rutas:
+        print("❌ No hay PDFs que comparar")
+        return
+
+    for ruta in rutas:
+        print(f"\n📄 {ruta}{' (liga completa)' if todos else ''}")
+        resultados = {}
+        for motor in MOTORES:
+            inicio = time.perf_counter()
+            for _ in range(REPETICIONES):
+                partidos = scraper.extraer_partidos_pdf(ruta, todos=todos, motor=motor)
+            ms = (time.perf_counter() - inicio) / REPETICIONES * 1000
+            resultados[motor] = partidos
+            print(f"   ⏱️ {motor:<12} {len(partidos):>4} partidos  {ms:8.1f} ms")
+
+        # Diferencias entre motores (por clave canónica)
+        claves = {m: {clave_partido(p) for p in ps} for m, ps in resultados.items()}
+        base, otro = MOTORES
+        solo_base = claves[base] - claves[otro]
+        solo_otro = claves[otro] - claves[base]
+        if not solo_base and not solo_otro:
+            print("   ✅ Ambos motores extraen los mismos partidos")
+            continue
+        for motor, diferencia in ((base, solo_base), (otro, solo_otro)):
+            for dia, hora, local, visitante, categoria in sorted(diferencia):
+                print(f"   ⚠️ Solo {motor}: {dia} {hora} | {categoria} | {local} vs {visitante}")
+
+if __name__ == "__main__":
+    debug_motores()
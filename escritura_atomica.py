@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Escritura de ficheros a prueba de cortes: fichero temporal en el mismo directorio,
+fsync y renombrado atómico (os.replace). Un fichero nunca queda a medias: o está
+la versión anterior o la nueva.
+
+Incluye la marca de ejecución en curso: se crea al empezar y se borra al terminar
+bien, así la siguiente ejecución sabe si la anterior se interrumpió.
+"""
+
+import json
+import os
+import re
+import secrets
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Union
+
+# Marca de ejecución en curso (write-ahead): si existe al arrancar, la anterior no terminó
+RUTA_MARCA_EJECUCION = Path(".ejecucion_en_curso")
+
+# Los temporales se llaman '.<nombre>.<8 hex>.tmp<extensión>' (la extensión se conserva
+# para las librerías que deciden el formato por ella, como pandas con .xlsx)
+_PREFIJO_TEMPORAL = '.'
+_MARCA_TEMPORAL = '.tmp'
+_BYTES_ALEATORIOS = 4
+# Nombre completo de un temporal: grupo 1 el nombre del destino, grupo 2 su extensión
+_PATRON_TEMPORAL = re.compile(re.escape(_PREFIJO_TEMPORAL) + r'(.+)\.[0-9a-f]{%d}' % (2 * _BYTES_ALEATORIOS)
+                              + re.escape(_MARCA_TEMPORAL) + r'(\.[^.]*)?')
+
+
+def _sincronizar_directorio(directorio: Path) -> None:
+    """fsync del directorio para que el renombrado sobreviva a un corte de luz (no en Windows)."""
+    if os.name != 'posix':
+        return
+    fd = os.open(directorio, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def abrir_temporal(ruta: Union[str, Path]) -> BinaryIO:
+    """
+    Crea y abre (binario, para escribir) un temporal junto a 'ruta' con el nombre que
+    reconoce limpiar_temporales. Se crea con los permisos de un fichero nuevo (0666
+    menos la umask del proceso), sin tocar la umask: mkstemp los dejaría en 0600.
+    """
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        aleatorio = secrets.token_hex(_BYTES_ALEATORIOS)
+        tmp = ruta.parent / f"{_PREFIJO_TEMPORAL}{ruta.name}.{aleatorio}{_MARCA_TEMPORAL}{ruta.suffix}"
+        try:
+            return open(tmp, 'xb')  # O_EXCL: nunca reutiliza un temporal de otro hilo
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def destino_atomico(ruta: Union[str, Path]) -> Iterator[Path]:
+    """
+    Ruta temporal donde escribir; al salir sin error se sincroniza y sustituye a 'ruta'.
+    Para librerías que escriben por nombre de fichero (reportlab, pandas):
+
+        with destino_atomico("salida.pdf") as tmp:
+            SimpleDocTemplate(str(tmp)).build(elementos)
+    """
+    ruta = Path(ruta)
+    with abrir_temporal(ruta) as f:
+        tmp = Path(f.name)
+    try:
+        yield tmp
+        with open(tmp, 'rb+') as f:
+            os.fsync(f.fileno())
+        if ruta.exists():
+            os.chmod(tmp, ruta.stat().st_mode & 0o777)
+        os.replace(tmp, ruta)
+        _sincronizar_directorio(ruta.parent)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def escribir_atomico(ruta: Union[str, Path], contenido: Union[str, bytes], encoding: str = 'utf-8') -> Path:
+    """Escribe el fichero completo de forma atómica. Devuelve la ruta."""
+    datos = contenido.encode(encoding) if isinstance(contenido, str) else contenido
+    with destino_atomico(ruta) as tmp:
+        tmp.write_bytes(datos)
+    return Path(ruta)
+
+
+def copiar_atomico(origen: Union[str, Path], destino: Union[str, Path]) -> Path:
+    """Copia un fichero de forma atómica (el destino nunca queda a medias)."""
+    return escribir_atomico(destino, Path(origen).read_bytes())
+
+
+def _es_temporal(nombre: str) -> bool:
+    """True si el nombre es exactamente el de un temporal de abrir_temporal (no un .env.tmpl)."""
+    m = _PATRON_TEMPORAL.fullmatch(nombre)
+    return bool(m) and Path(m.group(1)).suffix == (m.group(2) or '')
+
+
+def limpiar_temporales(directorios: Iterable[Union[str, Path]]) -> int:
+    """Borra los temporales que dejó una ejecución interrumpida. Devuelve cuántos."""
+    borrados = 0
+    for directorio in directorios:
+        directorio = Path(directorio)
+        if not directorio.is_dir():
+            continue
+        for tmp in directorio.glob(f"{_PREFIJO_TEMPORAL}*{_MARCA_TEMPORAL}*"):
+            if tmp.is_file() and _es_temporal(tmp.name):
+                tmp.unlink(missing_ok=True)
+                borrados += 1
+    return borrados
+
+
+def iniciar_marca(ruta: Union[str, Path] = RUTA_MARCA_EJECUCION) -> Optional[Dict]:
+    """
+    Crea la marca de ejecución en curso.
+    Devuelve la marca anterior si la había (la ejecución anterior se interrumpió) o None.
+    """
+    ruta = Path(ruta)
+    anterior = None
+    if ruta.exists():
+        try:
+            anterior = json.loads(ruta.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            anterior = {'inicio': None}  # Marca ilegible: interrumpida igualmente
+    escribir_atomico(ruta, json.dumps({'inicio': datetime.now().isoformat(timespec='seconds'),
+                                       'pid': os.getpid()}))
+    return anterior
+
+
+def finalizar_marca(ruta: Union[str, Path] = RUTA_MARCA_EJECUCION) -> None:
+    """Borra la marca: la ejecución ha terminado bien."""
+    Path(ruta).unlink(missing_ok=True)
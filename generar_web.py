@@ -6,19 +6,31 @@ Para publicar en GitHub Pages
 
 import json
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 
-def generar_web_publica(partidos_definitivos=None, partidos_provisionales=None):
+from partido import deduplicar_partidos, normalizar_categoria, FiltroEquipos, como_partido, partido_vigente, ZONA_CANARIAS
+from configuracion import cargar_equipos
+from almacen_partidos import AlmacenPartidos, RUTA_ALMACEN
+from escritura_atomica import escribir_atomico, copiar_atomico
+
+def generar_web_publica(partidos_definitivos=None, partidos_provisionales=None, filtro=None):
     """
     Genera index.html con diseño PREMIUM
     Muestra tanto definitivos como provisionales
+    Las tarjetas de los equipos del filtro (config.ini por defecto) se destacan
     """
+    if filtro is None:
+        filtro = FiltroEquipos(cargar_equipos())
     
     # 1. Obtener datos
     if partidos_definitivos is None and partidos_provisionales is None:
         snapshot_path = Path("partidos_anteriores.json")
         partidos = []
-        if snapshot_path.exists():
+        if RUTA_ALMACEN.exists():
+            # Solo los vigentes: el resto no se va a mostrar
+            with AlmacenPartidos(RUTA_ALMACEN) as almacen:
+                partidos = almacen.vigentes(margen=timedelta(hours=12))
+        elif snapshot_path.exists():
             try:
                 with open(snapshot_path, 'r', encoding='utf-8') as f:
                     content = f.read().strip()
@@ -34,78 +46,21 @@ def generar_web_publica(partidos_definitivos=None, partidos_provisionales=None):
     partidos_prov = partidos_provisionales if partidos_provisionales else []
     
     # Eliminar duplicados (un partido puede estar varias veces en la federación)
-    # Usar combinación de día+hora+local+visitante como clave única
-    partidos_unicos = {}
-    for p in partidos_def + partidos_prov:
-        # Crear clave única
-        clave = f"{p.get('dia', '')}_{p.get('hora', '')}_{p.get('local', '')}_{p.get('visitante', '')}_{p.get('categoria', '')}"
-        # Si ya existe, priorizar DEFINITIVA sobre PROVISIONAL
-        if clave not in partidos_unicos:
-            partidos_unicos[clave] = p
-        else:
-            # Si el nuevo es DEFINITIVA y el existente es PROVISIONAL, reemplazar
-            if p.get('jornada_tipo') == 'DEFINITIVA' and partidos_unicos[clave].get('jornada_tipo') == 'PROVISIONAL':
-                partidos_unicos[clave] = p
-    
-    todos_partidos = list(partidos_unicos.values())
+    # Misma clave canónica que el scraper; si se repite, gana la DEFINITIVA
+    # Como Partido: la fecha de inicio viene ya calculada (los del snapshot la traen en JSON)
+    todos_partidos = [como_partido(p) for p in deduplicar_partidos(partidos_def + partidos_prov)]
     
-    # Funciones de utilidad para ordenación y display
-    def parsear_fecha(partido):
-        """Convierte 'Viernes 09/01/26' a objeto datetime para ordenar"""
-        try:
-            dia_str = partido.get('dia', '')
-            # Extraer solo la parte de fecha DD/MM/YY
-            import re
-            match = re.search(r'(\d{2})/(\d{2})/(\d{2})', dia_str)
-            if match:
-                dia, mes, anio = match.groups()
-                # Asumir siglo 20XX
-                from datetime import datetime
-                return datetime(2000 + int(anio), int(mes), int(dia))
-            return datetime(2099, 12, 31)  # Fecha muy lejana si no se puede parsear
-        except:
-            from datetime import datetime
-            return datetime(2099, 12, 31)
-
-    # Ordenar por: 1. Tipo (DEFINITIVA primero), 2. Fecha, 3. Hora
+    # Ordenar por: 1. Tipo (DEFINITIVA primero), 2. Fecha y hora (sin fecha, al final)
+    sin_fecha = datetime(2099, 12, 31, tzinfo=ZONA_CANARIAS)
     def sorting_key(p):
         tipo_score = 0 if p.get('jornada_tipo') == 'DEFINITIVA' else 1
-        return (tipo_score, parsear_fecha(p), p.get('hora', '00:00'))
+        return (tipo_score, p.inicio or sin_fecha, p.get('hora', '00:00'))
     
     todos_partidos.sort(key=sorting_key)
     
-    # Filtrar partidos que ya terminaron (más de 2 horas después del inicio)
-    from datetime import datetime, timedelta
-    import re
-    
-    partidos_vigentes = []
-    ahora = datetime.now()
-    
-    for p in todos_partidos:
-        try:
-            # Parsear fecha y hora del partido
-            match_fecha = re.search(r'(\d{2})/(\d{2})/(\d{2})', p.get('dia', ''))
-            match_hora = re.search(r'(\d{1,2}):(\d{2})', p.get('hora', ''))
-            
-            if match_fecha and match_hora:
-                dia, mes, anio = match_fecha.groups()
-                hora, minuto = match_hora.groups()
-                
-                fecha_partido = datetime(2000 + int(anio), int(mes), int(dia), int(hora), int(minuto))
-                # Considerar vigentes partidos desde ayer hasta el futuro
-                # (Para no vaciar la web justo cuando termina el último de la jornada)
-                umbral_pasado = ahora - timedelta(hours=12)
-                
-                if fecha_partido > umbral_pasado:
-                    partidos_vigentes.append(p)
-            else:
-                # Si no se puede parsear, incluirlo por seguridad
-                partidos_vigentes.append(p)
-        except:
-            # Si hay error, incluir el partido
-            partidos_vigentes.append(p)
-    
-    todos_partidos = partidos_vigentes
+    # Filtrar partidos que ya terminaron. Se mantienen hasta 12h después del inicio
+    # (para no vaciar la web justo cuando termina el último de la jornada)
+    todos_partidos = [p for p in todos_partidos if partido_vigente(p, margen=timedelta(hours=12))]
     
     # 2. Generar HTML con diseño mejorado
     html = """<!DOCTYPE html>
@@ -607,34 +562,20 @@ def generar_web_publica(partidos_definitivos=None, partidos_provisionales=None):
     dias_restantes = None
     
     if todos_partidos:
-        from datetime import datetime, timedelta
-        hoy = datetime.now()
+        hoy = datetime.now(ZONA_CANARIAS)
         
         # Buscar el partido más cercano
         for p in todos_partidos:
-            try:
-                # Parsear fecha
-                fecha_str = p.get('dia', '')
-                import re
-                match = re.search(r'(\d{1,2}/\d{1,2}/\d{2,4})', fecha_str)
-                if match:
-                    fecha_pura = match.group(1)
-                    partes = fecha_pura.split('/')
-                    if len(partes[2]) == 2:
-                        partes[2] = "20" + partes[2]
-                    
-                    dia, mes, año = partes
-                    fecha_partido = datetime(int(año), int(mes), int(dia))
-                    
-                    # Solo partidos futuros
-                    if fecha_partido >= hoy.replace(hour=0, minute=0, second=0, microsecond=0):
-                        if proximo_partido is None or fecha_partido < proximo_partido['fecha']:
-                            proximo_partido = {
-                                'fecha': fecha_partido,
-                                'partido': p
-                            }
-            except:
-                continue
+            if p.inicio:
+                fecha_partido = p.inicio.replace(hour=0, minute=0, second=0, microsecond=0)
+                
+                # Solo partidos futuros
+                if fecha_partido >= hoy.replace(hour=0, minute=0, second=0, microsecond=0):
+                    if proximo_partido is None or fecha_partido < proximo_partido['fecha']:
+                        proximo_partido = {
+                            'fecha': fecha_partido,
+                            'partido': p
+                        }
         
         # Calcular días restantes desde inicio del día actual
         if proximo_partido:
@@ -679,21 +620,12 @@ def generar_web_publica(partidos_definitivos=None, partidos_provisionales=None):
     </div>
 """
     
-    # Función para normalizar categorías (quitar códigos numéricos)
-    def normalizar_categoria(cat):
-        import re
-        # Eliminar códigos numéricos del inicio (ej: "78270 Junior Masc S-B" -> "Junior Masc S-B")
-        return re.sub(r'^\d+\s+', '', cat).strip()
-    
     # Extraer categorías únicas NORMALIZADAS
     categorias = set()
     if todos_partidos:
         for p in todos_partidos:
             cat = p.get('categoria', 'Sin categoría')
-            cat_normalizada = normalizar_categoria(cat)
-            categorias.add(cat_normalizada)
-            # Añadir categoría normalizada al partido para filtrado
-            p['categoria_filtro'] = cat_normalizada
+            categorias.add(normalizar_categoria(cat))
     
     # Generar botones de filtro si hay partidos
     if todos_partidos:
@@ -731,8 +663,8 @@ def generar_web_publica(partidos_definitivos=None, partidos_provisionales=None):
     else:
         for p in todos_partidos:
             es_provisional = p.get('jornada_tipo') == 'PROVISIONAL'
-            es_casa = "valsequillo" in p.get('local', '').lower()
-            es_visitante = "valsequillo" in p.get('visitante', '').lower()
+            es_casa = filtro.coincide(p.get('local', ''))
+            es_visitante = filtro.coincide(p.get('visitante', ''))
             es_partido_valsequillo = es_casa or es_visitante
             
             # Clase de card según tipo y ubicación
@@ -749,7 +681,7 @@ def generar_web_publica(partidos_definitivos=None, partidos_provisionales=None):
                 badge_class = "badge-casa" if es_casa else "badge-fuera"
                 badge_text = "🏠 EN CASA" if es_casa else "✈️ VISITANTE"
             
-            # Añadir clase destacado si juega Valsequillo
+            # Añadir clase destacado si juega uno de nuestros equipos
             if es_partido_valsequillo:
                 clases.append("valsequillo-destacado")
             
@@ -767,7 +699,7 @@ def generar_web_publica(partidos_definitivos=None, partidos_provisionales=None):
             tipo_jornada = "DEFINITIVA" if not es_provisional else "PROVISIONAL"
             
             html += f"""
-            <div class="card {clase_card}" data-category="{p.get('categoria_filtro', p['categoria'])}" data-type="{p.get('jornada_tipo', 'DEFINITIVA')}">
+            <div class="card {clase_card}" data-category="{normalizar_categoria(p.get('categoria', 'Sin categoría'))}" data-type="{p.get('jornada_tipo', 'DEFINITIVA')}">
                 <div class="card-badge {badge_class}">{badge_text}</div>
                 
                 <div class="date-row">
@@ -825,21 +757,19 @@ def generar_web_publica(partidos_definitivos=None, partidos_provisionales=None):
     
     # Guardar
     output_path = Path("docs/index.html")
-    output_path.parent.mkdir(exist_ok=True)
-    output_path.write_text(html, encoding='utf-8')
+    escribir_atomico(output_path, html)
     
     # Copiar logo a docs/ si existe en la raíz
     logo_filename = "logo_club.png"
     logo_source = Path(logo_filename)
     if logo_source.exists():
-        import shutil
-        shutil.copy(logo_source, output_path.parent / logo_filename)
+        copiar_atomico(logo_source, output_path.parent / logo_filename)
         print(f"✅ Logo copiado a docs/: {logo_filename}")
     
     print(f"✅ Web pública generada: {output_path}")
     print(f"   Partidos definitivos: {len(partidos_definitivos)}")
     print(f"   Partidos provisionales: {len(partidos_provisionales)}")
-    print(f"   Total partidos en web (vigentes): {len(partidos_vigentes)}")
+    print(f"   Total partidos en web (vigentes): {len(todos_partidos)}")
 
 if __name__ == "__main__":
     generar_web_publica()
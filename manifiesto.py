@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manifiesto de ejecución (cache/manifiesto.json): huella de las entradas de cada etapa
+del pipeline y los ficheros que generó. Si en la siguiente ejecución una etapa recibe
+exactamente las mismas entradas y sus ficheros siguen en disco, se reutilizan en vez
+de volver a generarlos.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from escritura_atomica import escribir_atomico
+
+RUTA_MANIFIESTO = Path("cache") / "manifiesto.json"
+
+
+def _serializable(valor):
+    """Partido (o cualquier objeto con a_dict) como diccionario; fechas, rutas y demás con str()."""
+    return valor.a_dict() if hasattr(valor, 'a_dict') else str(valor)
+
+
+def huella_entradas(*entradas) -> str:
+    """Huella (sha256) de las entradas de una etapa: listas de partidos, fechas, textos..."""
+    datos = json.dumps(entradas, ensure_ascii=False, sort_keys=True, default=_serializable)
+    return hashlib.sha256(datos.encode('utf-8')).hexdigest()
+
+
+class ManifiestoEjecucion:
+    """
+    Etapas de la última ejecución: {etapa: {'huella', 'salidas', 'fecha'}}.
+    'version' invalida el manifiesto entero (ej: al cambiar el código que genera las salidas).
+    """
+
+    def __init__(self, ruta: Union[str, Path] = RUTA_MANIFIESTO, version: str = ''):
+        self.ruta = Path(ruta)
+        self.version = version
+        self.etapas: Dict[str, Dict] = {}
+        self.extra: Dict = {}
+        try:
+            datos = json.loads(self.ruta.read_text(encoding='utf-8'))
+            if datos.get('version') == version:
+                self.etapas = datos.get('etapas', {})
+        except (OSError, ValueError):
+            pass  # Sin manifiesto (o ilegible): todas las etapas se ejecutan
+
+    def reutilizables(self, etapa: str, huella: str) -> Optional[List[Path]]:
+        """
+        Salidas de la ejecución anterior de la etapa si sus entradas no han cambiado y los
+        ficheros siguen existiendo; None si hay que ejecutarla.
+        """
+        anterior = self.etapas.get(etapa)
+        if not anterior or anterior.get('huella') != huella:
+            return None
+        salidas = [Path(s) for s in anterior.get('salidas', [])]
+        if not all(s.exists() for s in salidas):
+            return None
+        return salidas
+
+    def registrar(self, etapa: str, huella: str, salidas: List[Path]) -> None:
+        """Anota una etapa ejecutada con éxito y los ficheros que generó."""
+        self.etapas[etapa] = {
+            'huella': huella,
+            'salidas': [str(s) for s in salidas],
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+        }
+
+    def guardar(self) -> None:
+        escribir_atomico(self.ruta, json.dumps(
+            {'version': self.version, 'etapas': self.etapas, **self.extra}, ensure_ascii=False, indent=2))
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Métricas de una ejecución del scraper: contadores y tiempos con etiquetas.
+
+Se vuelcan a un informe JSON (metricas_ejecucion.json) y, opcionalmente, a un
+fichero de texto en formato Prometheus (para el textfile collector de node_exporter),
+de modo que una regresión de rendimiento se vea como un número y no haya que
+buscarla en scraper.log.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Tuple, Union
+
+from escritura_atomica import escribir_atomico
+
+RUTA_METRICAS = Path("metricas_ejecucion.json")
+
+# Prefijo de las métricas en Prometheus
+PREFIJO_PROMETHEUS = "scraper_baloncesto"
+
+_Clave = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _clave(nombre: str, etiquetas: Dict) -> _Clave:
+    return nombre, tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+
+class Metricas:
+    """
+    Registro de métricas de una ejecución. Se puede usar desde varios hilos
+    (descargas paralelas, etapas de salida).
+
+        metricas.incrementar('descarga_bytes', 52310, jornada='Jornada 12')
+        with metricas.cronometro('render_segundos', salida='pdf_definitiva'):
+            ...
+    """
+
+    def __init__(self):
+        self.inicio = datetime.now()
+        self._lock = threading.Lock()
+        self.contadores: Dict[_Clave, float] = {}
+        # Tiempos: {clave: [suma, n, máximo]}
+        self.tiempos: Dict[_Clave, list] = {}
+
+    def incrementar(self, nombre: str, valor: float = 1, **etiquetas) -> None:
+        clave = _clave(nombre, etiquetas)
+        with self._lock:
+            self.contadores[clave] = self.contadores.get(clave, 0) + valor
+
+    def observar(self, nombre: str, segundos: float, **etiquetas) -> None:
+        """Anota una duración (se guardan suma, número de observaciones y máximo)."""
+        clave = _clave(nombre, etiquetas)
+        with self._lock:
+            suma, n, maximo = self.tiempos.get(clave, (0.0, 0, 0.0))
+            self.tiempos[clave] = [suma + segundos, n + 1, max(maximo, segundos)]
+
+    @contextmanager
+    def cronometro(self, nombre: str, **etiquetas) -> Iterator[None]:
+        """Mide el bloque y lo anota con observar() (también si lanza una excepción)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+    def valor(self, nombre: str, **etiquetas) -> float:
+        """Valor de un contador (0 si no existe)."""
+        return self.contadores.get(_clave(nombre, etiquetas), 0)
+
+    def total(self, nombre: str) -> float:
+        """Suma de un contador para todas sus etiquetas."""
+        return sum(v for (n, _), v in self.contadores.items() if n == nombre)
+
+    # --- Exportación ---
+
+    def a_dict(self) -> Dict:
+        with self._lock:
+            contadores = [{'nombre': n, 'etiquetas': dict(e), 'valor': v}
+                          for (n, e), v in sorted(self.contadores.items())]
+            tiempos = [{'nombre': n, 'etiquetas': dict(e), 'segundos': round(s, 6), 'n': c, 'max': round(m, 6)}
+                       for (n, e), (s, c, m) in sorted(self.tiempos.items())]
+        return {
+            'inicio': self.inicio.isoformat(timespec='seconds'),
+            'duracion_segundos': round((datetime.now() - self.inicio).total_seconds(), 3),
+            'contadores': contadores,
+            'tiempos': tiempos,
+        }
+
+    def exportar_json(self, ruta: Union[str, Path] = RUTA_METRICAS) -> Path:
+        return escribir_atomico(ruta, json.dumps(self.a_dict(), ensure_ascii=False, indent=2))
+
+    def a_prometheus(self) -> str:
+        """Formato de exposición de texto de Prometheus (contadores y sumarios _sum/_count)."""
+        def etiquetas_texto(etiquetas) -> str:
+            if not etiquetas:
+                return ''
+            pares = ','.join(f'{k}="{v.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                             for k, v in etiquetas)
+            return '{' + pares + '}'
+
+        lineas = []
+        with self._lock:
+            vistos = set()
+            for (nombre, etiquetas), valor in sorted(self.contadores.items()):
+                metrica = f"{PREFIJO_PROMETHEUS}_{nombre}_total"
+                if metrica not in vistos:
+                    vistos.add(metrica)
+                    lineas.append(f"# TYPE {metrica} counter")
+                lineas.append(f"{metrica}{etiquetas_texto(etiquetas)} {valor:g}")
+            for (nombre, etiquetas), (suma, n, _) in sorted(self.tiempos.items()):
+                metrica = f"{PREFIJO_PROMETHEUS}_{nombre}"
+                if metrica not in vistos:
+                    vistos.add(metrica)
+                    lineas.append(f"# TYPE {metrica} summary")
+                lineas.append(f"{metrica}_sum{etiquetas_texto(etiquetas)} {suma:.6f}")
+                lineas.append(f"{metrica}_count{etiquetas_texto(etiquetas)} {n}")
+        lineas.append(f"# TYPE {PREFIJO_PROMETHEUS}_ultima_ejecucion_timestamp gauge")
+        lineas.append(f"{PREFIJO_PROMETHEUS}_ultima_ejecucion_timestamp {self.inicio.timestamp():.0f}")
+        return '\n'.join(lineas) + '\n'
+
+    def exportar_prometheus(self, ruta: Union[str, Path]) -> Path:
+        """Escribe el fichero .prom de forma atómica (el collector nunca lee uno a medias)."""
+        return escribir_atomico(ruta, self.a_prometheus())
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Utilidades compartidas sobre partidos (scraper, web pública y bot de Telegram)
+"""
+
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+from zoneinfo import ZoneInfo
+
+# Código federativo del equipo: "Vito Valsequillo (35008831)" -> "35008831"
+PATRON_CODIGO_EQUIPO = re.compile(r'\((\d+)\)')
+
+# Fecha del día ("Sábado 30/05/2026" o "Miércoles 20/05/26") y hora ("18:30")
+PATRON_FECHA_DIA = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{2,4})')
+PATRON_HORA_PARTIDO = re.compile(r'(\d{1,2}):(\d{2})')
+
+# Todas las fechas y horas de las hojas son de Canarias
+ZONA_CANARIAS = ZoneInfo("Atlantic/Canary")
+
+
+def parsear_inicio(dia: str, hora: str) -> Optional[datetime]:
+    """
+    Fecha y hora de inicio de un partido, con la zona horaria de Canarias.
+    Acepta años de 2 y 4 cifras ('26' = 2026). Sin hora reconocible se toma las 00:00.
+    Devuelve None si el día no trae fecha (ej: solo 'Sábado').
+    """
+    m = PATRON_FECHA_DIA.search(dia or '')
+    if not m:
+        return None
+    d, mes, anio = (int(x) for x in m.groups())
+    if anio < 100:
+        anio += 2000
+    mh = PATRON_HORA_PARTIDO.search(hora or '')
+    h, mi = (int(mh.group(1)), int(mh.group(2))) if mh else (0, 0)
+    try:
+        return datetime(anio, mes, d, h, mi, tzinfo=ZONA_CANARIAS)
+    except ValueError:
+        return None
+
+
+@dataclass(slots=True)
+class Partido:
+    """
+    Un partido de la hoja de jornada. 'inicio' se calcula una sola vez al crearlo
+    (o al cambiar día u hora), así nadie más tiene que volver a parsear 'dia'.
+    
+    'origen' es la página del PDF ('Página 3'); 'jornada_tipo' y 'hoja' (título de la
+    hoja de jornada en el listado de la federación) los pone quien descarga el PDF.
+    
+    Admite el acceso de diccionario que usa el resto del código (p['local'],
+    p.get('jornada_tipo'), p['jornada_tipo'] = ...) y se guarda en JSON con a_dict().
+    """
+    dia: str
+    hora: str
+    categoria: str
+    local: str
+    visitante: str
+    lugar: str
+    origen: str = ''
+    jornada_tipo: Optional[str] = None
+    hoja: Optional[str] = None
+    inicio: Optional[datetime] = field(default=None, compare=False, repr=False)
+    
+    # Claves visibles como diccionario (todas menos 'inicio', que se deriva)
+    CAMPOS = ('dia', 'hora', 'categoria', 'local', 'visitante', 'lugar', 'origen', 'jornada_tipo', 'hoja')
+    
+    def __post_init__(self):
+        if self.inicio is None:
+            self.inicio = parsear_inicio(self.dia, self.hora)
+    
+    @classmethod
+    def desde_dict(cls, datos: Dict) -> 'Partido':
+        """Crea un Partido desde un diccionario (snapshot JSON, caché, escáner)."""
+        inicio = datos.get('inicio')
+        if isinstance(inicio, str):
+            inicio = datetime.fromisoformat(inicio).astimezone(ZONA_CANARIAS)
+        return cls(**{k: datos.get(k, '') for k in ('dia', 'hora', 'categoria', 'local', 'visitante', 'lugar', 'origen')},
+                   jornada_tipo=datos.get('jornada_tipo'), hoja=datos.get('hoja'), inicio=inicio)
+    
+    def a_dict(self) -> Dict:
+        """Diccionario serializable a JSON (con 'inicio' en ISO 8601 si se conoce)."""
+        datos = dict(self)
+        if self.inicio is not None:
+            datos['inicio'] = self.inicio.isoformat()
+        return datos
+    
+    # --- Acceso de diccionario (compatibilidad) ---
+    # Un campo a None (jornada_tipo sin asignar) se comporta como clave ausente
+    
+    def keys(self) -> List[str]:
+        return [k for k in self.CAMPOS if getattr(self, k) is not None]
+    
+    def __getitem__(self, clave: str):
+        if clave in self.CAMPOS and getattr(self, clave) is not None:
+            return getattr(self, clave)
+        raise KeyError(clave)
+    
+    def __setitem__(self, clave: str, valor) -> None:
+        if clave not in self.CAMPOS:
+            raise KeyError(clave)
+        setattr(self, clave, valor)
+        if clave in ('dia', 'hora'):
+            self.inicio = parsear_inicio(self.dia, self.hora)
+    
+    def __contains__(self, clave: str) -> bool:
+        return clave in self.CAMPOS and getattr(self, clave) is not None
+    
+    def get(self, clave: str, defecto=None):
+        return getattr(self, clave) if clave in self else defecto
+
+
+def como_partido(p: Union[Partido, Dict]) -> Partido:
+    """Devuelve el Partido tal cual o lo construye si llega como diccionario."""
+    return p if isinstance(p, Partido) else Partido.desde_dict(p)
+
+
+def partido_vigente(p: Union[Partido, Dict], margen: timedelta = timedelta(hours=2),
+                    ahora: Optional[datetime] = None) -> bool:
+    """
+    True si el partido no ha terminado: todavía no han pasado 'margen' desde su inicio.
+    Si no tiene fecha se considera vigente (mejor mostrar de más que perder un partido).
+    """
+    inicio = como_partido(p).inicio
+    if inicio is None:
+        return True
+    return (ahora or datetime.now(ZONA_CANARIAS)) < inicio + margen
+
+
+def clave_partido(partido: Dict) -> Tuple[str, str, str, str, str]:
+    """
+    Clave canónica de un partido para deduplicar: día, hora, local, visitante y categoría.
+    Es una tupla (hashable) para poder usarla en sets y diccionarios.
+    """
+    return (
+        partido.get('dia', '').strip(),
+        partido.get('hora', '').strip(),
+        partido.get('local', '').strip(),
+        partido.get('visitante', '').strip(),
+        partido.get('categoria', '').strip(),
+    )
+
+
+def identidad_partido(partido: Dict) -> str:
+    """
+    Identidad de un partido entre ejecuciones (sin fecha ni hora, que son justo
+    lo que puede cambiar): 'Local vs Visitante - Categoría'.
+    """
+    return f"{partido['local']} vs {partido['visitante']} - {partido['categoria']}"
+
+
+def _club_estable(nombre: str) -> str:
+    """Código federativo del equipo o, si no lo trae, el nombre normalizado."""
+    return codigo_equipo(nombre) or ' '.join((nombre or '').lower().split())
+
+
+def id_estable(partido: Dict) -> str:
+    """
+    Identidad estable de un partido entre ejecuciones: categoría normalizada y códigos
+    federativos de local y visitante. No cambia si se mueve de fecha, hora o pabellón,
+    ni si la federación cambia el sufijo del nombre del equipo:
+    'senior masc s-a|35008831|35004700'.
+    """
+    categoria = ' '.join(normalizar_categoria(partido.get('categoria', '')).lower().split())
+    return f"{categoria}|{_club_estable(partido.get('local', ''))}|{_club_estable(partido.get('visitante', ''))}"
+
+
+def indexar_por_id(partidos: List[Dict]) -> Dict[str, Dict]:
+    """
+    Partidos por id_estable. El mismo cruce en la hoja PROVISIONAL y en la DEFINITIVA es
+    un solo partido: se queda el de la DEFINITIVA. Si aun así un cruce se repite (ida y
+    vuelta en el mismo campo, por ejemplo), se numeran por fecha de inicio: el segundo
+    lleva '#2', el tercero '#3'... Así el id no depende del orden de las hojas.
+    """
+    grupos: Dict[str, List[Dict]] = {}
+    for p in partidos:
+        grupos.setdefault(id_estable(p), []).append(p)
+
+    indice = {}
+    for base, grupo in grupos.items():
+        if len(grupo) > 1:
+            if any(p.get('jornada_tipo') == 'DEFINITIVA' for p in grupo):
+                grupo = [p for p in grupo if p.get('jornada_tipo') != 'PROVISIONAL']
+            grupo = sorted(grupo, key=_orden_repetidos)
+        for n, p in enumerate(grupo, 1):
+            indice[base if n == 1 else f"{base}#{n}"] = p
+    return indice
+
+
+def _orden_repetidos(partido: Dict) -> tuple:
+    """Orden de los repetidos de un cruce: por inicio (sin fecha al final) y después por clave."""
+    inicio = como_partido(partido).inicio
+    return (inicio is None, inicio.timestamp() if inicio else 0, clave_partido(partido))
+
+
+def deduplicar_partidos(partidos: List[Dict]) -> List[Dict]:
+    """
+    Elimina partidos repetidos según clave_partido, en tiempo lineal.
+    Conserva el orden de primera aparición; si el mismo partido aparece como
+    PROVISIONAL y como DEFINITIVA, se queda con la versión DEFINITIVA.
+    """
+    unicos = {}
+    for p in partidos:
+        clave = clave_partido(p)
+        existente = unicos.get(clave)
+        if existente is None:
+            unicos[clave] = p
+        elif p.get('jornada_tipo') == 'DEFINITIVA' and existente.get('jornada_tipo') == 'PROVISIONAL':
+            unicos[clave] = p
+    return list(unicos.values())
+
+
+def codigo_equipo(nombre: str) -> Optional[str]:
+    """Devuelve el código federativo del equipo (primer '(NNNN)' del nombre) o None."""
+    m = PATRON_CODIGO_EQUIPO.search(nombre or '')
+    return m.group(1) if m else None
+
+
+def normalizar_categoria(categoria: str) -> str:
+    """Quita el número de partido del inicio: '78270 Junior Masc S-B' -> 'Junior Masc S-B'."""
+    return re.sub(r'^\d+\s+', '', categoria or '').strip()
+
+
+class FiltroEquipos:
+    """
+    Filtro de los equipos a seguir (nombres y/o códigos federativos).
+    Todas las entradas se compilan en una única expresión regular, de modo que
+    buscar N equipos cuesta lo mismo que buscar uno: una sola pasada por línea.
+    """
+    
+    def __init__(self, equipos: List[str]):
+        self.equipos = [e.strip() for e in equipos if e.strip()]
+        if not self.equipos:
+            raise ValueError("FiltroEquipos necesita al menos un equipo")
+        
+        # Un grupo con nombre por equipo (e0, e1...) para saber cuál ha coincidido.
+        # Los más largos primero para que "CB Telde" gane a "Telde" en la alternancia
+        alternativas = []
+        for i, equipo in sorted(enumerate(self.equipos), key=lambda x: -len(x[1])):
+            patron = rf'\({equipo}\)' if equipo.isdigit() else re.escape(equipo)
+            alternativas.append(f'(?P<e{i}>{patron})')
+        self.patron = re.compile('|'.join(alternativas), re.IGNORECASE)
+    
+    def coincide(self, texto: str) -> bool:
+        """True si el texto menciona alguno de los equipos."""
+        return self.patron.search(texto or '') is not None
+    
+    def equipos_en(self, texto: str) -> List[str]:
+        """Equipos (tal y como están configurados) mencionados en el texto, sin repetir."""
+        encontrados = []
+        for m in self.patron.finditer(texto or ''):
+            equipo = self.equipos[int(m.lastgroup[1:])]
+            if equipo not in encontrados:
+                encontrados.append(equipo)
+        return encontrados
+    
+    def repartir(self, partidos: List[Dict]) -> Dict[str, List[Dict]]:
+        """
+        Reparte los partidos por equipo según quién juega (local o visitante).
+        Un derbi entre dos equipos seguidos aparece en ambas listas.
+        """
+        por_equipo = {e: [] for e in self.equipos}
+        for p in partidos:
+            for equipo in self.equipos_en(f"{p.get('local', '')}\n{p.get('visitante', '')}"):
+                por_equipo[equipo].append(p)
+        return por_equipo
+
+
+class IndiceLiga:
+    """
+    Índice de todos los partidos de una o varias jornadas (modo liga completa).
+    Permite consultar los partidos de cualquier equipo por su código federativo,
+    por categoría o por lugar sin volver a leer los PDFs.
+    """
+    
+    def __init__(self):
+        self.partidos: List[Dict] = []
+        self.por_club: Dict[str, List[int]] = defaultdict(list)
+        self.por_categoria: Dict[str, List[int]] = defaultdict(list)
+        self.por_lugar: Dict[str, List[int]] = defaultdict(list)
+        self._claves = set()
+    
+    def agregar(self, partido: Dict) -> bool:
+        """Añade un partido al índice. Devuelve False si ya estaba (misma clave canónica)."""
+        clave = clave_partido(partido)
+        if clave in self._claves:
+            return False
+        self._claves.add(clave)
+        
+        pos = len(self.partidos)
+        self.partidos.append(partido)
+        for nombre in (partido.get('local', ''), partido.get('visitante', '')):
+            codigo = codigo_equipo(nombre)
+            if codigo:
+                self.por_club[codigo].append(pos)
+        self.por_categoria[normalizar_categoria(partido.get('categoria', ''))].append(pos)
+        self.por_lugar[partido.get('lugar', '').strip()].append(pos)
+        return True
+    
+    def de_club(self, codigo: str) -> List[Dict]:
+        """Partidos en los que juega el equipo con ese código federativo."""
+        return [self.partidos[i] for i in self.por_club.get(codigo, [])]
+    
+    def de_categoria(self, categoria: str) -> List[Dict]:
+        """Partidos de una categoría (sin el número de partido delante)."""
+        return [self.partidos[i] for i in self.por_categoria.get(normalizar_categoria(categoria), [])]
+    
+    def en_lugar(self, lugar: str) -> List[Dict]:
+        """Partidos que se juegan en un lugar."""
+        return [self.partidos[i] for i in self.por_lugar.get(lugar.strip(), [])]
+    
+    def a_dict(self) -> Dict:
+        """Representación serializable a JSON (las listas del índice son posiciones en 'partidos')."""
+        return {
+            'partidos': [dict(p) for p in self.partidos],
+            'por_club': dict(self.por_club),
+            'por_categoria': dict(self.por_categoria),
+            'por_lugar': dict(self.por_lugar),
+        }
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ejecutor de etapas con dependencias (grafo acíclico) para el pipeline del scraper.
+
+Cada etapa declara de qué resultados depende (datos iniciales u otras etapas) y
+los recibe como argumentos, en el orden en que los declara. Las etapas
+independientes se ejecutan a la vez en un pool de hilos; si una falla, solo se
+saltan las que dependen de ella. Se mide el tiempo de cada etapa.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Etapa:
+    nombre: str
+    funcion: Callable[..., Any]
+    entradas: Tuple[str, ...] = ()
+
+
+@dataclass
+class ResultadoGrafo:
+    """Resultados (datos iniciales incluidos), errores y segundos por etapa."""
+    resultados: Dict[str, Any] = field(default_factory=dict)
+    errores: Dict[str, BaseException] = field(default_factory=dict)
+    saltadas: Dict[str, str] = field(default_factory=dict)
+    tiempos: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def correcto(self) -> bool:
+        return not self.errores and not self.saltadas
+
+
+class GrafoEtapas:
+    """
+    Uso:
+        grafo = GrafoEtapas(max_hilos=4)
+        grafo.agregar('cambios', detectar, entradas=('partidos',))
+        grafo.agregar('email', preview, entradas=('partidos', 'cambios'))
+        resultado = grafo.ejecutar({'partidos': partidos})
+    """
+
+    def __init__(self, max_hilos: int = 4):
+        self.max_hilos = max(1, max_hilos)
+        self.etapas: Dict[str, Etapa] = {}
+
+    def agregar(self, nombre: str, funcion: Callable[..., Any], entradas: Tuple[str, ...] = ()) -> None:
+        if nombre in self.etapas:
+            raise ValueError(f"Etapa repetida: {nombre}")
+        self.etapas[nombre] = Etapa(nombre, funcion, tuple(entradas))
+
+    def _validar(self, datos: Dict[str, Any]) -> None:
+        """Toda entrada existe (dato inicial o etapa) y no hay ciclos."""
+        for etapa in self.etapas.values():
+            for entrada in etapa.entradas:
+                if entrada not in datos and entrada not in self.etapas:
+                    raise ValueError(f"La etapa {etapa.nombre} depende de '{entrada}', que no existe")
+        pendientes = {n: {e for e in et.entradas if e in self.etapas} for n, et in self.etapas.items()}
+        while pendientes:
+            listas = [n for n, deps in pendientes.items() if not deps]
+            if not listas:
+                raise ValueError(f"Dependencias circulares entre: {', '.join(sorted(pendientes))}")
+            for n in listas:
+                del pendientes[n]
+            for deps in pendientes.values():
+                deps.difference_update(listas)
+
+    def ejecutar(self, datos: Optional[Dict[str, Any]] = None) -> ResultadoGrafo:
+        datos = dict(datos or {})
+        self._validar(datos)
+        resultado = ResultadoGrafo(resultados=datos)
+        por_lanzar = dict(self.etapas)
+        en_curso = {}
+
+        def medir(etapa: Etapa, argumentos: list):
+            inicio = time.perf_counter()
+            try:
+                return etapa.funcion(*argumentos)
+            finally:
+                resultado.tiempos[etapa.nombre] = time.perf_counter() - inicio
+
+        with ThreadPoolExecutor(max_workers=self.max_hilos) as pool:
+            while por_lanzar or en_curso:
+                # Saltar las etapas con alguna dependencia fallida o saltada
+                for nombre, etapa in list(por_lanzar.items()):
+                    fallida = next((e for e in etapa.entradas
+                                    if e in resultado.errores or e in resultado.saltadas), None)
+                    if fallida:
+                        resultado.saltadas[nombre] = fallida
+                        logger.warning(f"⏭️  Etapa {nombre} saltada: falló '{fallida}'")
+                        del por_lanzar[nombre]
+
+                # Lanzar las que ya tienen todas sus entradas
+                for nombre, etapa in list(por_lanzar.items()):
+                    if all(e in resultado.resultados for e in etapa.entradas):
+                        argumentos = [resultado.resultados[e] for e in etapa.entradas]
+                        en_curso[pool.submit(medir, etapa, argumentos)] = nombre
+                        del por_lanzar[nombre]
+
+                if not en_curso:
+                    continue
+                terminadas, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in terminadas:
+                    nombre = en_curso.pop(futuro)
+                    try:
+                        resultado.resultados[nombre] = futuro.result()
+                    except Exception as e:
+                        resultado.errores[nombre] = e
+                        logger.error(f"❌ Etapa {nombre} falló: {e}")
+
+        return resultado
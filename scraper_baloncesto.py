@@ -16,7 +16,8 @@ import logging # Restaurado
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo # Para zona horaria Canarias
 from pathlib import Path
-from typing import List, Dict, Optional
+from collections import deque
+from typing import Callable, Collection, List, Dict, Optional, Iterator, Tuple
 import urllib3
 from ics import Calendar, Event
 from ics.alarm import DisplayAlarm  # Para recordatorios
@@ -27,6 +28,19 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
 
+from partido import (clave_partido, deduplicar_partidos, IndiceLiga, FiltroEquipos,
+                     Partido, como_partido, partido_vigente, ZONA_CANARIAS)
+from configuracion import cargar_equipos, EQUIPOS_POR_DEFECTO
+from almacen_partidos import AlmacenPartidos, RUTA_ALMACEN
+from cambios_partidos import diferenciar, resumen_cambios, registrar_historial, RUTA_HISTORIAL
+from manifiesto import ManifiestoEjecucion, huella_entradas, RUTA_MANIFIESTO
+from pipeline import GrafoEtapas
+from metricas import Metricas, RUTA_METRICAS
+from calendario_google import (EspejoCalendar, LimitadorTasa, enviar_plan, mapa_partidos, planificar,
+                               RUTA_ESPEJO, HILOS_ENVIO, OPERACIONES_POR_SEGUNDO, TAM_LOTE)
+from escritura_atomica import (escribir_atomico, destino_atomico, abrir_temporal, limpiar_temporales,
+                               iniciar_marca, finalizar_marca, RUTA_MARCA_EJECUCION)
+
 # Configuración de logging
 logging.basicConfig(
     level=logging.DEBUG,
@@ -38,12 +52,38 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Directorio de caché persistente entre ejecuciones (validadores HTTP, etc.)
+CACHE_DIR = Path("cache")
+
+# Tamaño máximo aceptado para un PDF de jornada (los reales rondan los 100-500 KB)
+MAX_TAMANO_PDF = 20 * 1024 * 1024
+
+# Etapas de salida de ejecutar() (PDF, ICS, web, Calendar...) que corren a la vez
+MAX_HILOS_ETAPAS = 4
+
+# Resultados de extracción guardados en cache/partidos_parseados.json (los más recientes)
+MAX_ENTRADAS_CACHE_PARSEO = 50
+
+# Exportación JSON del almacén (antes era el propio snapshot): bot, web y página de admin
+RUTA_SNAPSHOT_JSON = Path("partidos_anteriores.json")
+
 
 class ScraperBaloncesto:
     """Scraper para extraer partidos de baloncesto de Valsequillo"""
     
-    def __init__(self, url_base: str = "https://www.fibgrancanaria.com"):
+    def __init__(self, url_base: str = "https://www.fibgrancanaria.com", max_descargas_paralelas: int = 3,
+                 equipos: Optional[List[str]] = None, motor: str = 'lineas', procesos: int = 1):
         self.url_base = url_base
+        # Motor de extracción de los PDFs: 'lineas' (heurística) o 'coordenadas' (tabla por X/Y)
+        if motor not in MOTORES:
+            raise ValueError(f"Motor desconocido: {motor} (opciones: {', '.join(MOTORES)})")
+        self.motor = motor
+        # Procesos para extraer los PDFs por páginas (1 = en este proceso, sin pool)
+        self.procesos = max(1, procesos)
+        # Equipos a seguir: nombres o códigos federativos ([FILTRADO] de config.ini por defecto)
+        self.filtro = FiltroEquipos(equipos if equipos is not None else cargar_equipos())
+        # Máximo de PDFs descargándose a la vez (1 = secuencial)
+        self.max_descargas_paralelas = max(1, max_descargas_paralelas)
         self.url_jornadas = "https://www.fibgrancanaria.com/index.php/competicion/hojas-de-jornada"
         self.session = requests.Session()
         
@@ -63,21 +103,154 @@ class ScraperBaloncesto:
         import urllib3
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
         
+        # Caché de validadores HTTP (ETag / Last-Modified / hash) del listado de jornadas
+        self.cache_dir = CACHE_DIR
+        self.listado_sin_cambios = False
+        self._cache_listado_pendiente = None
+        # Títulos de las hojas del último listado (para saber cuáles no se pudieron leer)
+        self.hojas_listadas: List[str] = []
+        # Caché de resultados de extracción (se carga la primera vez que se usa)
+        self.usar_cache_parseo = True
+        self._cache_parseo = None
+        # Almacén SQLite de partidos (estado actual, versiones y procedencia)
+        self.ruta_almacen = RUTA_ALMACEN
+        # Historial de cambios entre ejecuciones (JSON Lines) y eventos de la última
+        self.ruta_historial = RUTA_HISTORIAL
+        self.eventos_cambios: List[Dict] = []
+        # Marca de ejecución en curso (para detectar y recuperar una ejecución interrumpida)
+        self.ruta_marca = RUTA_MARCA_EJECUCION
+        # Hilos para las etapas de salida de ejecutar() y segundos que tardó cada una
+        self.hilos_etapas = MAX_HILOS_ETAPAS
+        self.tiempos_etapas: Dict[str, float] = {}
+        # Métricas de la ejecución (descargas, páginas, parseo, salidas, Calendar...) y dónde
+        # se vuelcan: informe JSON y, si se indica, fichero Prometheus (textfile collector)
+        self.metricas = Metricas()
+        self.ruta_metricas = RUTA_METRICAS
+        # Escrituras en Google Calendar: lotes enviados a la vez y operaciones por segundo (0 = sin límite)
+        self.hilos_calendar = HILOS_ENVIO
+        self.operaciones_por_segundo_calendar = OPERACIONES_POR_SEGUNDO
+        self.ruta_metricas_prometheus: Optional[Path] = None
+        
+    def _cargar_cache_json(self, nombre: str) -> Dict:
+        """Lee un fichero JSON del directorio de caché. Devuelve {} si no existe o está corrupto."""
+        ruta = self.cache_dir / nombre
+        try:
+            if ruta.exists():
+                import json
+                return json.loads(ruta.read_text(encoding='utf-8'))
+        except Exception as e:
+            logger.warning(f"Caché {ruta} ilegible, se ignora: {e}")
+        return {}
+    
+    def _guardar_cache_json(self, nombre: str, datos: Dict) -> None:
+        """Guarda un diccionario como JSON en el directorio de caché."""
+        try:
+            import json
+            escribir_atomico(self.cache_dir / nombre, json.dumps(datos, ensure_ascii=False, indent=2))
+        except Exception as e:
+            logger.warning(f"No se pudo guardar la caché {nombre}: {e}")
+    
+    def _consultar_cache_parseo(self, pdf_path: Path, todos: bool, motor: str,
+                                sha256: Optional[str] = None) -> Tuple[Optional[str], Optional[List[Dict]]]:
+        """
+        Busca los partidos ya extraídos de este PDF. La clave combina el hash del
+        contenido, la versión del parser (ver version_parser), el filtro de equipos
+        y el motor, así que un cambio en cualquiera de ellos obliga a reextraer.
+        sha256 es el hash que ya calculó la descarga; sin él se lee el PDF para calcularlo.
+        
+        Returns:
+            (clave, copia de los partidos) o (clave, None) si no está.
+            La clave es None si el PDF no se puede leer.
+        """
+        import hashlib
+        if not self.usar_cache_parseo:
+            return None, None
+        if sha256 is None:
+            try:
+                sha256 = hashlib.sha256(Path(pdf_path).read_bytes()).hexdigest()
+            except OSError:
+                return None, None
+        equipos = '*' if todos else ','.join(self.filtro.equipos)
+        clave = f"{sha256}|{motor}|{equipos}"
+        
+        if self._cache_parseo is None:
+            datos = self._cargar_cache_json('partidos_parseados.json')
+            if datos.get('version') != version_parser():
+                # Otra versión del parser (o caché nueva): todo lo guardado deja de valer
+                datos = {'version': version_parser(), 'entradas': {}}
+            self._cache_parseo = datos
+        
+        partidos = self._cache_parseo['entradas'].get(clave)
+        self.metricas.incrementar('cache_parseo', resultado='fallo' if partidos is None else 'acierto')
+        if partidos is None:
+            return clave, None
+        logger.info(f"♻️ {len(partidos)} partidos de {pdf_path} desde la caché de extracción")
+        # Objetos nuevos en cada consulta: quien llama marca jornada_tipo en los partidos
+        return clave, [Partido.desde_dict(p) for p in partidos]
+    
+    def _guardar_cache_parseo(self, clave: Optional[str], partidos: List[Dict]) -> None:
+        """Guarda el resultado de una extracción (solo las MAX_ENTRADAS_CACHE_PARSEO más recientes)."""
+        if clave is None or self._cache_parseo is None:
+            return
+        entradas = self._cache_parseo['entradas']
+        entradas.pop(clave, None)
+        entradas[clave] = [p.a_dict() for p in partidos]
+        for antigua in list(entradas)[:-MAX_ENTRADAS_CACHE_PARSEO]:
+            del entradas[antigua]
+        self._guardar_cache_json('partidos_parseados.json', self._cache_parseo)
+    
+    def confirmar_cache_listado(self) -> None:
+        """
+        Persiste los validadores del listado descargado en esta ejecución.
+        Solo se llama cuando el pipeline terminó bien: si se guardasen antes y
+        fallara una descarga, la siguiente ejecución vería "sin cambios" y no
+        reintentaría nunca.
+        """
+        if self._cache_listado_pendiente:
+            self._guardar_cache_json('listado.json', self._cache_listado_pendiente)
+            self._cache_listado_pendiente = None
+    
     def descargar_pdfs_recientes(self) -> List[Dict]:
         """
         Descarga las jornadas más recientes (definitivas y provisionales)
         CON REINTENTOS automáticos si la web está caída.
         
         Returns:
-            Lista de diccionarios con info de PDFs descargados
+            Lista de diccionarios con info de PDFs descargados, en el orden del listado
+        """
+        return sorted(self.iterar_pdfs_descargados(), key=lambda pdf: pdf['orden'])
+    
+    def iterar_pdfs_descargados(self) -> Iterator[Dict]:
+        """
+        Igual que descargar_pdfs_recientes, pero entrega cada PDF en cuanto termina
+        su descarga y se valida (orden de llegada, no del listado). Permite empezar a
+        extraer partidos mientras el resto de jornadas sigue descargándose.
+        Cada PDF lleva 'orden' con su posición en el listado para reordenar después.
+        
+        Yields:
+            Diccionarios con info de cada PDF descargado
         """
         max_intentos = 3
         tiempo_espera = 5  # segundos
+        self.listado_sin_cambios = False
+        self.hojas_listadas = []
+        
+        # GET condicional: si el servidor soporta validadores, un listado sin cambios cuesta un 304
+        # (solo si están guardadas las jornadas del listado: con un 304 no llegan los enlaces)
+        cache_listado = self._cargar_cache_json('listado.json')
+        if 'jornadas' not in cache_listado:
+            cache_listado = {}
+        cabeceras_condicionales = {}
+        if cache_listado.get('etag'):
+            cabeceras_condicionales['If-None-Match'] = cache_listado['etag']
+        if cache_listado.get('last_modified'):
+            cabeceras_condicionales['If-Modified-Since'] = cache_listado['last_modified']
         
         for intento in range(1, max_intentos + 1):
             try:
                 logger.info(f"Accediendo a {self.url_jornadas} (Intento {intento}/{max_intentos})")
-                response = self.session.get(self.url_jornadas, timeout=60, verify=False)  # Aumentado a 60s
+                response = self.session.get(self.url_jornadas, timeout=60, verify=False,  # Aumentado a 60s
+                                            headers=cabeceras_condicionales)
                 response.raise_for_status()
                 
                 # Si llegamos aquí, la conexión fue exitosa
@@ -92,141 +265,367 @@ class ScraperBaloncesto:
                     tiempo_espera *= 2  # Backoff exponencial (5s, 10s, 20s)
                 else:
                     logger.error("Error al descargar los PDFs después de todos los reintentos")
-                    return []
+                    return
         
         try:
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            if response.status_code == 304:
+                logger.info("✔️ Listado de jornadas sin cambios (304 Not Modified)")
+                listado_igual = True
+                jornadas_a_procesar = cache_listado['jornadas']
+            else:
+                listado_igual, jornadas_a_procesar = self._jornadas_del_listado(response, cache_listado)
             
-            # Buscar enlaces de descarga usando el patrón de Phoca Download
-            # Los enlaces tienen el formato: ?download=ID:nombre-archivo
-            download_link = None
+            self.hojas_listadas = [j['titulo'] for j in jornadas_a_procesar]
+            if not jornadas_a_procesar:
+                if listado_igual:
+                    self.listado_sin_cambios = True
+                return
             
-            # Buscar todos los enlaces que contengan el parámetro '?download='
-            download_links = soup.find_all('a', href=re.compile(r'\?download=', re.I))
+            # Descargar y procesar TODAS las jornadas encontradas
+            # (consultando primero el almacén local de PDFs por hash)
+            # Con el listado igual se descargan igualmente con GET condicional: la federación a
+            # veces sustituye el PDF de una jornada con el mismo enlace y el mismo texto
+            # Las descargas van en paralelo (acotado); cada PDF se entrega en cuanto está listo
+            from concurrent.futures import ThreadPoolExecutor, as_completed
+            
+            indice_pdfs = self._cargar_cache_json('pdfs/indice.json')
+            total_descargados = 0
+            sin_cambios = True
+            with ThreadPoolExecutor(max_workers=self.max_descargas_paralelas) as executor:
+                futuros = {
+                    executor.submit(self._descargar_jornada, jornada, indice_pdfs.get(jornada['href'], {})): orden
+                    for orden, jornada in enumerate(jornadas_a_procesar)
+                }
+                for futuro in as_completed(futuros):
+                    pdf_info = futuro.result()
+                    if pdf_info:
+                        entrada = pdf_info.pop('indice', None)
+                        if entrada:
+                            indice_pdfs[pdf_info['href']] = entrada
+                        pdf_info['orden'] = futuros[futuro]
+                        sin_cambios = sin_cambios and pdf_info['sin_cambios']
+                        total_descargados += 1
+                        yield pdf_info
+            
+            self._guardar_indice_pdfs(indice_pdfs, [j['href'] for j in jornadas_a_procesar])
+            
+            if not total_descargados:
+                logger.error("No se pudo descargar ningún PDF")
+                return
             
-            if not download_links:
-                logger.error("No se encontró ningún enlace de descarga en la página")
-                return []
+            logger.info(f"Total de PDFs descargados: {total_descargados}")
             
-            # Filtrar para obtener definitivas Y provisionales (las 3 jornadas más recientes)
-            jornadas_recientes = []
-            for link in download_links[:15]:  # Ampliar búsqueda a 15
-                texto = link.get_text().lower()
-                logger.info(f"Analizando enlace: {link.get_text().strip()}")
-                
-                # Ignorar Minibasket
-                if 'minibasket' in texto or 'preminibasket' in texto:
-                    logger.info("   -> Ignorado (Minibasket)")
-                    continue
-                
-                es_definitiva = 'definitiva' in texto or 'defintiva' in texto  # tolerar typo web federación
-                es_provisional = 'provisional' in texto
-                if 'jornada' in texto and (es_definitiva or es_provisional):
-                    jornadas_recientes.append({
-                        'link': link,
-                        'href': link.get('href'),
-                        'titulo': link.get_text().strip(),
-                        'tipo': 'DEFINITIVA' if es_definitiva else 'PROVISIONAL'
-                    })
-            
-            # Filtrar para quedarnos con la versión MÁS RECIENTE de cada jornada
-            # Ejemplo: Si hay "Jornada 14 DEFINITIVA 2" y "Jornada 14 DEFINITIVA 3", solo cogemos la 3
-            jornadas_unicas = {}
-            
-            for j in jornadas_recientes:
-                # Extraer número de jornada (ej: "Jornada 14 (05-11 Ene) DEFINITIVA 3" -> "14-DEFINITIVA")
-                # O si no tiene número: "Jornada DEFINITIVA" -> "0-DEFINITIVA"
-                match = re.search(r'Jornada\s+(\d+)?\s*.*?(DEFINITIVA|DEFINTIVA|PROVISIONAL)', j['titulo'], re.IGNORECASE)
-                if match:
-                    num_jornada = match.group(1) if match.group(1) else "0"  # Si no hay número, usar "0"
-                    tipo = match.group(2).upper()
-                    if tipo == 'DEFINTIVA':  # normalizar typo de la web
-                        tipo = 'DEFINITIVA'
-                    clave = f"{num_jornada}-{tipo}"
-                    
-                    # Si ya existe, comparar versiones y quedarnos con la más reciente
-                    # (Las jornadas están ordenadas de más nueva a más vieja en la web)
-                    if clave not in jornadas_unicas:
-                        jornadas_unicas[clave] = j
+            if listado_igual and sin_cambios and total_descargados == len(jornadas_a_procesar):
+                logger.info("✔️ Ninguna jornada ha cambiado desde la última ejecución")
+                self.listado_sin_cambios = True
+                # Refrescar validadores por si el servidor ha empezado a enviarlos
+                self.confirmar_cache_listado()
             
-            # Tomamos las 5 más recientes (suficiente para cubrir el rango actual)
-            # Reducimos de 10 a 5 por ahora para evitar problemas de descarga/redirects constantes
-            jornadas_a_procesar = list(jornadas_unicas.values())[:5]
+        except requests.RequestException as e:
+            logger.error(f"Error al descargar los PDFs: {e}")
+            return
+        except Exception as e:
+            logger.error(f"Error inesperado: {e}")
+            return
+    
+    def _jornadas_del_listado(self, response, cache_listado: Dict) -> Tuple[bool, List[Dict]]:
+        """
+        Jornadas a procesar del HTML del listado: la versión más reciente de cada jornada
+        definitiva y provisional (máximo 5). Deja pendientes de confirmar los validadores
+        del listado y sus jornadas (ver confirmar_cache_listado).
+        
+        Returns:
+            (True si los enlaces son los de la caché, jornadas con 'href', 'titulo' y 'tipo')
+        """
+        soup = BeautifulSoup(response.content, 'html.parser')
+        
+        # Buscar enlaces de descarga usando el patrón de Phoca Download
+        # Los enlaces tienen el formato: ?download=ID:nombre-archivo
+        download_link = None
+        
+        # Buscar todos los enlaces que contengan el parámetro '?download='
+        download_links = soup.find_all('a', href=re.compile(r'\?download=', re.I))
+        
+        if not download_links:
+            logger.error("No se encontró ningún enlace de descarga en la página")
+            return False, []
+        
+        # Hash de los enlaces de descarga (no del HTML completo, que lleva tokens
+        # de sesión y cambia en cada petición aunque las jornadas sean las mismas)
+        import hashlib
+        huella = hashlib.sha256()
+        for link in download_links:
+            huella.update(f"{link.get('href')}|{link.get_text().strip()}\n".encode('utf-8'))
+        hash_listado = huella.hexdigest()
+        
+        listado_igual = cache_listado.get('hash') == hash_listado
+        if listado_igual:
+            logger.info("✔️ Listado de jornadas sin cambios (mismo hash de enlaces)")
+        
+        # Filtrar para obtener definitivas Y provisionales (las 3 jornadas más recientes)
+        jornadas_recientes = []
+        for link in download_links[:15]:  # Ampliar búsqueda a 15
+            texto = link.get_text().lower()
+            logger.info(f"Analizando enlace: {link.get_text().strip()}")
+            
+            # Ignorar Minibasket
+            if 'minibasket' in texto or 'preminibasket' in texto:
+                logger.info("   -> Ignorado (Minibasket)")
+                continue
             
-            if not jornadas_a_procesar:
-                logger.error("No se encontraron jornadas definitivas ni provisionales")
-                return []
+            es_definitiva = 'definitiva' in texto or 'defintiva' in texto  # tolerar typo web federación
+            es_provisional = 'provisional' in texto
+            if 'jornada' in texto and (es_definitiva or es_provisional):
+                jornadas_recientes.append({
+                    'href': link.get('href'),
+                    'titulo': link.get_text().strip(),
+                    'tipo': 'DEFINITIVA' if es_definitiva else 'PROVISIONAL'
+                })
+        
+        # Filtrar para quedarnos con la versión MÁS RECIENTE de cada jornada
+        # Ejemplo: Si hay "Jornada 14 DEFINITIVA 2" y "Jornada 14 DEFINITIVA 3", solo cogemos la 3
+        jornadas_unicas = {}
+        
+        for j in jornadas_recientes:
+            # Extraer número de jornada (ej: "Jornada 14 (05-11 Ene) DEFINITIVA 3" -> "14-DEFINITIVA")
+            # O si no tiene número: "Jornada DEFINITIVA" -> "0-DEFINITIVA"
+            match = re.search(r'Jornada\s+(\d+)?\s*.*?(DEFINITIVA|DEFINTIVA|PROVISIONAL)', j['titulo'], re.IGNORECASE)
+            if match:
+                num_jornada = match.group(1) if match.group(1) else "0"  # Si no hay número, usar "0"
+                tipo = match.group(2).upper()
+                if tipo == 'DEFINTIVA':  # normalizar typo de la web
+                    tipo = 'DEFINITIVA'
+                clave = f"{num_jornada}-{tipo}"
+                
+                # Si ya existe, comparar versiones y quedarnos con la más reciente
+                # (Las jornadas están ordenadas de más nueva a más vieja en la web)
+                if clave not in jornadas_unicas:
+                    jornadas_unicas[clave] = j
+        
+        # Tomamos las 5 más recientes (suficiente para cubrir el rango actual)
+        # Reducimos de 10 a 5 por ahora para evitar problemas de descarga/redirects constantes
+        jornadas_a_procesar = list(jornadas_unicas.values())[:5]
+        
+        if not jornadas_a_procesar:
+            logger.error("No se encontraron jornadas definitivas ni provisionales")
+            return False, []
+        
+        logger.info(f"Se encontraron {len(jornadas_a_procesar)} jornadas para procesar:")
+        for j in jornadas_a_procesar:
+            logger.info(f"  - {j['titulo']} ({j['tipo']})")
+        
+        # Las jornadas se guardan con los validadores: con un 304 se vuelven a comprobar sus PDFs
+        self._cache_listado_pendiente = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'hash': hash_listado,
+            'jornadas': jornadas_a_procesar,
+            'fecha': datetime.now().isoformat(timespec='seconds')
+        }
+        return listado_igual, jornadas_a_procesar
+    
+    def _descargar_jornada(self, jornada: Dict, entrada: Dict) -> Optional[Dict]:
+        """
+        Descarga el PDF de una jornada usando el almacén direccionado por contenido
+        (cache/pdfs/<sha256>.pdf). Si el índice tiene validadores para ese enlace se
+        hace un GET condicional; un 304 o un PDF con el mismo hash reutiliza el fichero
+        ya guardado en lugar de escribir una copia nueva.
+        
+        Se ejecuta en hilos de descarga: no modifica estado compartido, la entrada
+        nueva del índice se devuelve en la clave 'indice' para que la fusione el llamador.
+        
+        Args:
+            jornada: Diccionario con 'href', 'titulo' y 'tipo' del enlace
+            entrada: Entrada actual del índice para ese href ({sha256, etag, last_modified}) o {}
             
-            logger.info(f"Se encontraron {len(jornadas_a_procesar)} jornadas para procesar:")
-            for j in jornadas_a_procesar:
-                logger.info(f"  - {j['titulo']} ({j['tipo']})")
+        Returns:
+            Diccionario con info del PDF ('path', 'tipo', 'titulo', 'href', 'sha256', 'sin_cambios', 'indice') o None
+        """
+        import hashlib
+        
+        href = jornada['href']
+        download_link = href
+        
+        # Normalizar URL
+        if not download_link.startswith('http'):
+            download_link = f"{self.url_base}{download_link}" if download_link.startswith('/') else f"{self.url_base}/{download_link}"
+        
+        dir_pdfs = self.cache_dir / 'pdfs'
+        pdf_cacheado = dir_pdfs / f"{entrada['sha256']}.pdf" if entrada.get('sha256') else None
+        
+        # Descargar el PDF con Referer específico (y validadores si ya lo tenemos)
+        headers = {'Referer': self.url_jornadas}
+        if pdf_cacheado and pdf_cacheado.exists():
+            if entrada.get('etag'):
+                headers['If-None-Match'] = entrada['etag']
+            if entrada.get('last_modified'):
+                headers['If-Modified-Since'] = entrada['last_modified']
+        
+        pdf_response = None
+        tmp_path = None
+        tamano = 0
+        estado = 'error'
+        inicio = time.perf_counter()
+        try:
+            logger.info(f"Descargando: {jornada['titulo']}")
+            pdf_response = self.session.get(
+                download_link, 
+                timeout=30, 
+                verify=False,
+                headers=headers,
+                allow_redirects=True,
+                stream=True  # No cargar el cuerpo entero en memoria
+            )
+            pdf_response.raise_for_status()
+            estado = 'descartado'
+            
+            if pdf_response.status_code == 304:
+                estado = 'sin_cambios'
+                logger.info(f"PDF sin cambios (304), se reutiliza: {pdf_cacheado}")
+                return {
+                    'path': pdf_cacheado,
+                    'tipo': jornada['tipo'],
+                    'titulo': jornada['titulo'],
+                    'href': href,
+                    'sha256': entrada['sha256'],
+                    'sin_cambios': True,
+                    'indice': None
+                }
+            
+            tamano_declarado = pdf_response.headers.get('Content-Length')
+            if tamano_declarado and tamano_declarado.isdigit() and int(tamano_declarado) > MAX_TAMANO_PDF:
+                logger.warning(f"⚠️ PDF demasiado grande ({tamano_declarado} bytes). Descartando: {jornada['titulo']}")
+                return None
             
-            # Descargar y procesar TODAS las jornadas encontradas
-            pdfs_descargados = []
-            for jornada in jornadas_a_procesar:
-                download_link = jornada['href']
-                
-                # Normalizar URL
-                if not download_link.startswith('http'):
-                    download_link = f"{self.url_base}{download_link}" if download_link.startswith('/') else f"{self.url_base}/{download_link}"
-                
-                try:
-                    # Descargar el PDF
-                    # Descargar el PDF con Referer específico
-                    logger.info(f"Descargando: {jornada['titulo']}")
-                    pdf_response = self.session.get(
-                        download_link, 
-                        timeout=30, 
-                        verify=False,
-                        headers={'Referer': self.url_jornadas},
-                        allow_redirects=True
-                    )
-                    pdf_response.raise_for_status()
-                    
-                    # Guardar el PDF con número de jornada único
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    tipo_sufijo = jornada['tipo'].lower()
-                    
-                    # Extraer número de jornada del título (ej: "Jornada 14..." -> "14")
-                    match_jornada = re.search(r'Jornada\s+(\d+)', jornada['titulo'], re.IGNORECASE)
-                    num_jornada = match_jornada.group(1) if match_jornada else timestamp
-                    
-                    pdf_path = Path(f"jornada_{tipo_sufijo}_j{num_jornada}_{timestamp}.pdf")
-                    pdf_path.write_bytes(pdf_response.content)
-                    
-                    # Validar que sea realmente un PDF (no un HTML de error/login)
-                    if not pdf_response.content.startswith(b'%PDF'):
-                        logger.warning(f"⚠️ El archivo descargado NO es un PDF válido (posible redirect o login). Descartando: {jornada['titulo']}")
-                        pdf_path.unlink()  # Borrar el archivo basura
+            # Volcar a un fichero temporal por bloques, calculando el hash sobre la marcha
+            # (mismo nombre de temporal que escritura_atomica: limpiar_temporales lo reconoce)
+            import os
+            huella = hashlib.sha256()
+            cabecera = b''
+            with abrir_temporal(dir_pdfs / 'descarga.part') as tmp:
+                tmp_path = Path(tmp.name)
+                for bloque in pdf_response.iter_content(chunk_size=64 * 1024):
+                    if not bloque:
                         continue
                     
-                    pdfs_descargados.append({
-                        'path': pdf_path,
-                        'tipo': jornada['tipo'],
-                        'titulo': jornada['titulo']
-                    })
+                    # Validar que sea realmente un PDF (no un HTML de error/login) en cuanto llegan los primeros bytes
+                    if len(cabecera) < 4:
+                        cabecera += bloque[:4 - len(cabecera)]
+                        if len(cabecera) >= 4 and not cabecera.startswith(b'%PDF'):
+                            logger.warning(f"⚠️ El archivo descargado NO es un PDF válido (posible redirect o login). Descartando: {jornada['titulo']}")
+                            return None
                     
-                    logger.info(f"PDF descargado: {pdf_path}")
+                    tamano += len(bloque)
+                    if tamano > MAX_TAMANO_PDF:
+                        logger.warning(f"⚠️ PDF supera el límite de {MAX_TAMANO_PDF} bytes. Descartando: {jornada['titulo']}")
+                        return None
                     
-                except Exception as e:
-                    logger.warning(f"Error al descargar {jornada['titulo']}: {e}")
-                    continue
+                    huella.update(bloque)
+                    tmp.write(bloque)
             
-            if not pdfs_descargados:
-                logger.error("No se pudo descargar ningún PDF")
-                return []
+            if not cabecera.startswith(b'%PDF'):
+                logger.warning(f"⚠️ El archivo descargado NO es un PDF válido (respuesta vacía o truncada). Descartando: {jornada['titulo']}")
+                return None
             
-            logger.info(f"Total de PDFs descargados: {len(pdfs_descargados)}")
-            return pdfs_descargados
+            sha256 = huella.hexdigest()
+            pdf_path = dir_pdfs / f"{sha256}.pdf"
+            if not pdf_path.exists():
+                os.replace(tmp_path, pdf_path)  # Renombrado atómico: nunca queda un PDF a medias
+                tmp_path = None
+                estado = 'descargado'
+                logger.info(f"PDF descargado: {pdf_path} ({tamano} bytes)")
+            else:
+                estado = 'identico'
+                logger.info(f"PDF idéntico a uno ya guardado, se reutiliza: {pdf_path}")
+            
+            return {
+                'path': pdf_path,
+                'tipo': jornada['tipo'],
+                'titulo': jornada['titulo'],
+                'href': href,
+                'sha256': sha256,
+                'sin_cambios': entrada.get('sha256') == sha256,
+                'indice': {
+                    'sha256': sha256,
+                    'etag': pdf_response.headers.get('ETag'),
+                    'last_modified': pdf_response.headers.get('Last-Modified'),
+                    'titulo': jornada['titulo'],
+                    'fecha': datetime.now().isoformat(timespec='seconds')
+                }
+            }
             
-        except requests.RequestException as e:
-            logger.error(f"Error al descargar los PDFs: {e}")
-            return []
         except Exception as e:
-            logger.error(f"Error inesperado: {e}")
-            return []
+            estado = 'error'
+            logger.warning(f"Error al descargar {jornada['titulo']}: {e}")
+            return None
+        finally:
+            self.metricas.observar('descarga_segundos', time.perf_counter() - inicio,
+                                   jornada=jornada['titulo'], estado=estado)
+            self.metricas.incrementar('descarga_bytes', tamano, jornada=jornada['titulo'])
+            if pdf_response is not None:
+                pdf_response.close()  # Libera la conexión aunque se aborte a mitad
+            if tmp_path is not None:
+                tmp_path.unlink(missing_ok=True)
+    
+    def _guardar_indice_pdfs(self, indice_pdfs: Dict, hrefs_actuales: List[str]) -> None:
+        """
+        Guarda el índice del almacén de PDFs quedándose solo con las jornadas que
+        siguen publicadas y borra los PDFs que ya no referencia ninguna entrada.
+        """
+        indice = {href: e for href, e in indice_pdfs.items() if href in hrefs_actuales}
+        self._guardar_cache_json('pdfs/indice.json', indice)
+        
+        referenciados = {e['sha256'] for e in indice.values()}
+        dir_pdfs = self.cache_dir / 'pdfs'
+        if dir_pdfs.exists():
+            for pdf in dir_pdfs.glob('*.pdf'):
+                if pdf.stem not in referenciados:
+                    pdf.unlink(missing_ok=True)
+                    logger.debug(f"PDF obsoleto eliminado de la caché: {pdf}")
+    
+    def descargar_y_extraer(self) -> List[Tuple[Dict, List[Dict]]]:
+        """
+        Descarga y extrae en cadena: cada PDF se procesa en cuanto llega, mientras
+        las demás descargas siguen en curso (la extracción se queda en este hilo,
+        PyMuPDF no admite uso concurrente). Con self.procesos > 1 las páginas de cada
+        PDF se encolan en un pool de procesos en cuanto llega y se recogen al final.
+        
+        Returns:
+            Lista de tuplas (info del PDF, partidos extraídos) en el orden del listado
+        """
+        resultados = []
+        pendientes = []
+        pool = None
+        if self.procesos > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(max_workers=self.procesos)
+        try:
+            for pdf_info in self.iterar_pdfs_descargados():
+                logger.info(f"Procesando {pdf_info['tipo']}: {pdf_info['path']}")
+                if pool:
+                    pendientes.append((pdf_info, self._enviar_paginas(pool, pdf_info['path'], False, self.motor,
+                                                                      pdf_info.get('sha256'))))
+                else:
+                    resultados.append((pdf_info, self.extraer_partidos_pdf(pdf_info['path'],
+                                                                           sha256=pdf_info.get('sha256'))))
+            
+            for pdf_info, pendiente in pendientes:
+                resultados.append((pdf_info, self._recoger_paginas(pdf_info['path'], pendiente, False, self.motor)))
+        finally:
+            if pool:
+                pool.shutdown()
+        
+        # Marcar los partidos con el tipo y la hoja de jornada de la que salen
+        for pdf_info, partidos in resultados:
+            self.metricas.incrementar('partidos_encontrados', len(partidos), jornada=pdf_info['titulo'])
+            for partido in partidos:
+                partido['jornada_tipo'] = pdf_info['tipo']
+                partido['hoja'] = pdf_info['titulo']
+        
+        resultados.sort(key=lambda r: r[0]['orden'])
+        return resultados
     
     def descargar_ultimo_pdf(self) -> Optional[Path]:
         """
@@ -236,7 +635,8 @@ class ScraperBaloncesto:
         pdfs = self.descargar_pdfs_recientes()
         return pdfs[0]['path'] if pdfs else None
             
-    def extraer_partidos_pdf(self, pdf_path: Path) -> List[Dict]:
+    def extraer_partidos_pdf(self, pdf_path: Path, todos: bool = False, motor: Optional[str] = None,
+                             sha256: Optional[str] = None) -> List[Dict]:
         """
         Extrae información de partidos del PDF usando PyMuPDF
         El PDF tiene formato multi-línea donde cada partido ocupa 4 líneas:
@@ -244,205 +644,169 @@ class ScraperBaloncesto:
         Línea 2: Equipo Local (con código)
         Extrae información de partidos del PDF usando heurísticas de texto.
         Busca 'Valsequillo' y deduce el contexto (rival, categoría, lugar) basado en la estructura.
+        
+        Con todos=True extrae todos los partidos de la hoja, no solo los de los equipos
+        configurados en self.filtro.
+        
+        motor elige el motor de extracción ('lineas' o 'coordenadas'); por defecto self.motor.
+        sha256 es el hash del PDF si ya se conoce (el de la descarga), para la caché de extracción.
         """
-        partidos = []
-        try:
-            doc = fitz.open(pdf_path)
-            
-            # Patrón para detectar códigos de equipo: (35xxxxxx) o similar
-            # Quitamos el $ para permitir basura al final de la línea
-            patron_codigo = re.compile(r'\(\d+\)')
-            
-            for num_pagina, page in enumerate(doc):
-                text = page.get_text()
-                lines = [l.strip() for l in text.split('\n') if l.strip()]
-                
-                # Intentar extraer rango de fechas del título de la jornada
-                # Ej: "JORNADA 15 (12-18 Ene)" o "05-11 Ene"
-                fecha_inicio_jornada = None
-                mes_jornada = None
-                year_jornada = datetime.now().year
-                
-                # Buscar en las primeras 30 líneas
-                for line in lines[:30]:
-                    # Patrón 1: (DD-DD Mes) o DD-DD Mes
-                    match_rango = re.search(r'(\d{1,2})[-\s/]+(\d{1,2})\s+(Ene|Feb|Mar|Abr|May|Jun|Jul|Ago|Sep|Oct|Nov|Dic)', line, re.IGNORECASE)
-                    
-                    # Patrón 2: (DD Mes - DD Mes) -> Ejemplo: 26 Ene - 01 Feb
-                    match_rango_meses = re.search(r'(\d{1,2})\s+(Ene|Feb|Mar|Abr|May|Jun|Jul|Ago|Sep|Oct|Nov|Dic)[-\s/]+(\d{1,2})\s+(Ene|Feb|Mar|Abr|May|Jun|Jul|Ago|Sep|Oct|Nov|Dic)', line, re.IGNORECASE)
-
-                    meses = {'Ene': 1, 'Feb': 2, 'Mar': 3, 'Abr': 4, 'May': 5, 'Jun': 6,
-                            'Jul': 7, 'Ago': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dic': 12}
-
-                    if match_rango_meses:
-                        dia_inicio = int(match_rango_meses.group(1))
-                        mes_texto = match_rango_meses.group(2).capitalize()
-                        mes_num = meses.get(mes_texto, 1)
-                        if datetime.now().month == 12 and mes_num == 1:
-                            year_jornada = datetime.now().year + 1
-                        fecha_inicio_jornada = datetime(year_jornada, mes_num, dia_inicio)
-                        logger.debug(f"Fecha inicio detectada (Rango Meses) en '{line}': {fecha_inicio_jornada.strftime('%d/%m/%Y')}")
-                        break
-                    elif match_rango:
-                        dia_inicio = int(match_rango.group(1))
-                        mes_texto = match_rango.group(3).capitalize()
-                        mes_num = meses.get(mes_texto, 1)
-                        if datetime.now().month == 12 and mes_num == 1:
-                            year_jornada = datetime.now().year + 1
-                        fecha_inicio_jornada = datetime(year_jornada, mes_num, dia_inicio)
-                        logger.debug(f"Fecha inicio detectada (Rango Simple) en '{line}': {fecha_inicio_jornada.strftime('%d/%m/%Y')}")
-                        break
-                
-                # Detectar día de la semana en la página
-                dia_actual = "Desconocido"
-                dias_semana = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
-                dia_semana_a_numero = {'Lunes': 0, 'Martes': 1, 'Miércoles': 2, 'Jueves': 3, 
-                                      'Viernes': 4, 'Sábado': 5, 'Domingo': 6}
-                
-                # Buscar Valsequillo
-                for i, line in enumerate(lines):
-                    # Actualizar día si encontramos uno en la línea
-                    for d in dias_semana:
-                        # Verificamos que la línea sea principalmente el día
-                        if d in line and len(line) < 40:
-                            # Opción 1: Buscar fecha DD/MM/YY o (DD/MM/YY)
-                            match_fecha = re.search(r'(\d{1,2}/\d{1,2}/\d{2,4})', line)
-                            
-                            if not match_fecha:
-                                for offset in range(1, 4):
-                                    if i + offset < len(lines):
-                                        line_next = lines[i+offset]
-                                        match_fecha = re.search(r'(\d{1,2}/\d{1,2}/\d{2,4})', line_next)
-                                        if match_fecha:
-                                            break
-                            
-                            if match_fecha:
-                                fecha_extraida = match_fecha.group(1)
-                                # Si la fecha corta (26) se vuelve 2026, normalizar
-                                if len(fecha_extraida.split('/')[-1]) == 2:
-                                    partes = fecha_extraida.split('/')
-                                    fecha_extraida = f"{partes[0]}/{partes[1]}/20{partes[2]}"
-                                dia_actual = f"{d} {fecha_extraida}"
-                                logger.debug(f"Fecha EXTRAÍDA DIRECTAMENTE para {d}: {fecha_extraida}")
-                            elif fecha_inicio_jornada:
-                                dia_semana_num = dia_semana_a_numero.get(d)
-                                if dia_semana_num is not None:
-                                    dias_diferencia = (dia_semana_num - fecha_inicio_jornada.weekday()) % 7
-                                    fecha_calculada = fecha_inicio_jornada + timedelta(days=dias_diferencia)
-                                    dia_actual = f"{d} {fecha_calculada.strftime('%d/%m/%y')}"
-                                    logger.debug(f"Fecha CALCULADA para {d} (Ref: {fecha_inicio_jornada.strftime('%d/%m')}): {fecha_calculada.strftime('%d/%m/%y')}")
-                                else:
-                                    dia_actual = d
-                            else:
-                                dia_actual = d
-                            break
-
-                    if "valsequillo" in line.lower():
-                        logger.debug(f"Encontrado Valsequillo en línea {i}: {line}")
-                        
-                        # Es posible que sea el "Lugar" (IES Valsequillo)
-                        # Si es Lugar, el partido ya debería haber sido procesado por el equipo, 
-                        # pero si el equipo NO tiene "Valsequillo" en el nombre (raro), lo ignoramos.
-                        # Generalmente queremos encontrar el EQUIPO Valsequillo.
-                        # IES Valsequillo no tiene código (xxxx) al final.
-                        es_equipo = bool(patron_codigo.search(line))
-                        
-                        if not es_equipo:
-                            # Puede ser el lugar. Verificamos si ya procesamos este partido
-                            # O simplemente lo ignoramos porque buscamos el nombre del equipo
-                            continue
-
-                        # Analizar contexto
-                        categoria = "Desconocida"
-                        local = "Desconocido"
-                        visitante = "Desconocido"
-                        lugar = "Desconocido"
-                        hora = "00:00"
-                        
-                        # Mirar línea anterior y siguiente para decidir si somos Local o Visitante
-                        linea_ant = lines[i-1] if i > 0 else ""
-                        linea_sig = lines[i+1] if i < len(lines)-1 else ""
-                        
-                        es_local = False
-                        
-                        # Si la línea siguiente tiene código, entonces somos Local
-                        if patron_codigo.search(linea_sig):
-                            es_local = True
-                            local = line
-                            visitante = linea_sig
-                            lugar = lines[i+2] if i < len(lines)-2 else "Desconocido"
-                            categoria_raw = linea_ant
-                        
-                        # Si la línea anterior tiene código, entonces somos Visitante
-                        elif patron_codigo.search(linea_ant):
-                            es_local = False
-                            local = linea_ant
-                            visitante = line
-                            lugar = linea_sig
-                            categoria_raw = lines[i-2] if i > 1 else "Desconocido"
-                            
-                        else:
-                            # Caso difícil. Asumir Local por defecto si no hay pistas
-                            logger.warning(f"No se pudo determinar si es local o visitante: {line}")
-                            local = line
-                            visitante = linea_sig # Asumimos siguiente es rival
-                            lugar = lines[i+2] if i < len(lines)-2 else "Desconocido"
-                            categoria_raw = linea_ant
-
-                        # Limpiar categoría y extraer hora
-                        # A veces la categoría tiene basura pegada o la hora
-                        # Buscar patrón de hora HH:MM
-                        match_hora = re.search(r'(\d{2}:\d{2})', categoria_raw)
-                        if match_hora:
-                            hora = match_hora.group(1)
-                            categoria = categoria_raw.replace(hora, "").strip()
-                        else:
-                            # Buscar hora en líneas muy cercanas hacia arriba (hasta 5 líneas)
-                            for k in range(1, 6):
-                                if i-k >= 0:
-                                    possible_hora = lines[i-k]
-                                    match_hora = re.search(r'(\d{2}:\d{2})', possible_hora)
-                                    if match_hora:
-                                        hora = match_hora.group(1)
-                                        # Si encontramos la hora muy arriba, la categoría es probable que sea la línea justo encima del Local
-                                        if categoria == "Desconocida":
-                                            categoria = categoria_raw
-                                        break
-                            if categoria == "Desconocida":
-                                categoria = categoria_raw
-
-                        # Limpieza final
-                        if len(categoria) > 50: categoria = categoria[:50] + "..."
-                        
-                        # Añadir partido
-                        partido = {
-                            'dia': dia_actual,
-                            'hora': hora,
-                            'categoria': categoria,
-                            'local': local,
-                            'visitante': visitante,
-                            'lugar': lugar,
-                            'origen': f"Página {num_pagina+1}"
-                        }
-                        
-                        # Evitar duplicados (mismo equipo y hora)
-                        clave = f"{dia_actual}_{hora}_{local}_{visitante}"
-                        duplicado = False
-                        for p in partidos:
-                            k = f"{p['dia']}_{p['hora']}_{p['local']}_{p['visitante']}"
-                            if k == clave:
-                                duplicado = True
-                                break
-                        
-                        if not duplicado:
-                            partidos.append(partido)
-                            logger.info(f"Partido encontrado: {local} vs {visitante} ({dia_actual} {hora})")
-
+        motor = motor or self.motor
+        if self.procesos > 1:
+            return self.extraer_partidos_pdfs([pdf_path], todos, motor, [sha256])[0]
+        
+        # Un PDF ya visto con este parser, filtro y motor no se vuelve a abrir
+        clave, partidos = self._consultar_cache_parseo(pdf_path, todos, motor, sha256)
+        if partidos is not None:
             return partidos
+        inicio = time.perf_counter()
+        try:
+            with fitz.open(pdf_path) as doc:
+                # El contexto (día en curso, rango de fechas, columnas) pasa de una página a la siguiente
+                contexto = _nuevo_contexto()
+                por_pagina = []
+                for num_pagina, page in enumerate(doc):
+                    material = _leer_pagina(page, motor, None if todos else self.filtro)
+                    self._anotar_pagina(material)
+                    por_pagina.append(_escanear_material(material, num_pagina, todos, self.filtro, motor, contexto))
+            partidos = self._recopilar_partidos(pdf_path, por_pagina, todos)
             
         except Exception as e:
             logger.error(f"Error al extraer partidos del PDF {pdf_path}: {e}")
             return []
+        
+        self.metricas.observar('parseo_segundos', time.perf_counter() - inicio, pdf=Path(pdf_path).name)
+        self._guardar_cache_parseo(clave, partidos)
+        return partidos
+    
+    def _anotar_pagina(self, material: Dict) -> None:
+        """Cuenta una página leída (ver _leer_pagina): escaneada o saltada por el prefiltro, y sus líneas."""
+        if 'texto' in material:
+            self.metricas.incrementar('paginas', estado='saltada')
+            return
+        self.metricas.incrementar('paginas', estado='escaneada')
+        self.metricas.incrementar('lineas', len(material.get('lineas') or []))
+        if 'palabras' in material:
+            self.metricas.incrementar('palabras', len(material['palabras']))
+    
+    def extraer_partidos_pdfs(self, pdf_paths: List[Path], todos: bool = False, motor: Optional[str] = None,
+                              hashes: Optional[List[Optional[str]]] = None) -> List[List[Dict]]:
+        """
+        Extrae varios PDFs. Con self.procesos > 1 reparte todas las páginas de todos los
+        documentos en un único pool de procesos; el resultado es el mismo que en serie.
+        hashes: sha256 de cada PDF si ya se conocen (mismo orden que pdf_paths).
+        
+        Returns:
+            Lista de partidos de cada PDF, en el mismo orden que pdf_paths
+        """
+        motor = motor or self.motor
+        hashes = hashes or [None] * len(pdf_paths)
+        if self.procesos <= 1:
+            return [self.extraer_partidos_pdf(ruta, todos, motor, sha256) for ruta, sha256 in zip(pdf_paths, hashes)]
+        
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=self.procesos) as pool:
+            pendientes = [(ruta, self._enviar_paginas(pool, ruta, todos, motor, sha256))
+                          for ruta, sha256 in zip(pdf_paths, hashes)]
+            return [self._recoger_paginas(ruta, pendiente, todos, motor) for ruta, pendiente in pendientes]
+    
+    def _enviar_paginas(self, pool, pdf_path: Path, todos: bool, motor: str, sha256: Optional[str] = None) -> Dict:
+        """
+        Encola en el pool las páginas del PDF en bloques consecutivos (abrir el PDF en
+        cada proceso tiene un coste, así que no se envía página a página).
+        Si el PDF está en la caché de extracción no se encola nada.
+        
+        Returns:
+            Pendiente para _recoger_paginas: {'clave', 'partidos' (si estaba en caché), 'futuros'}
+        """
+        clave, partidos = self._consultar_cache_parseo(pdf_path, todos, motor, sha256)
+        pendiente = {'clave': clave, 'partidos': partidos, 'futuros': None}
+        if partidos is not None:
+            return pendiente
+        try:
+            with fitz.open(pdf_path) as doc:
+                num_paginas = doc.page_count
+        except Exception as e:
+            logger.error(f"Error al extraer partidos del PDF {pdf_path}: {e}")
+            pendiente['partidos'] = []
+            return pendiente
+        tamano = max(1, -(-num_paginas // (self.procesos * _BLOQUES_POR_PROCESO)))
+        pendiente['inicio'] = time.perf_counter()
+        pendiente['futuros'] = [
+            pool.submit(_procesar_paginas, pdf_path, range(n, min(n + tamano, num_paginas)), todos, self.filtro, motor)
+            for n in range(0, num_paginas, tamano)
+        ]
+        return pendiente
+    
+    def _recoger_paginas(self, pdf_path: Path, pendiente: Dict, todos: bool, motor: str) -> List[Dict]:
+        """Espera las páginas de un PDF enviadas con _enviar_paginas y las une en orden."""
+        if pendiente['partidos'] is not None:
+            return pendiente['partidos']
+        try:
+            resultados = [r for f in pendiente['futuros'] for r in f.result()]
+            for r in resultados:
+                self._anotar_pagina(r['material'])
+            partidos = self._recopilar_partidos(pdf_path, _fusionar_paginas(resultados, todos, self.filtro, motor), todos)
+        except Exception as e:
+            logger.error(f"Error al extraer partidos del PDF {pdf_path}: {e}")
+            return []
+        # Desde que se encolaron las páginas (incluye la espera en el pool)
+        self.metricas.observar('parseo_segundos', time.perf_counter() - pendiente['inicio'], pdf=Path(pdf_path).name)
+        self._guardar_cache_parseo(pendiente['clave'], partidos)
+        return partidos
+    
+    def _recopilar_partidos(self, pdf_path: Path, por_pagina: List[List[Dict]], todos: bool) -> List[Partido]:
+        """Une los partidos de las páginas en orden, sin duplicados, ya como Partido."""
+        partidos = []
+        vistos = set()
+        for partidos_pagina in por_pagina:
+            for partido in partidos_pagina:
+                # Evitar duplicados (misma clave canónica que la web y la detección de cambios)
+                clave = clave_partido(partido)
+                if clave not in vistos:
+                    vistos.add(clave)
+                    partido = Partido.desde_dict(partido)
+                    partidos.append(partido)
+                    if not todos:
+                        logger.info(f"Partido encontrado: {partido['local']} vs {partido['visitante']} ({partido['dia']} {partido['hora']})")
+        
+        if todos:
+            logger.info(f"{len(partidos)} partidos encontrados en {pdf_path} (liga completa)")
+        return partidos
+    
+    def extraer_partidos_por_equipo(self, pdf_path: Path) -> Dict[str, List[Dict]]:
+        """
+        Extrae los partidos de todos los equipos configurados con una sola lectura del
+        PDF y los devuelve agrupados por equipo ({equipo: [partidos]}).
+        """
+        por_equipo = self.filtro.repartir(self.extraer_partidos_pdf(pdf_path))
+        for equipo, partidos in por_equipo.items():
+            logger.info(f"{equipo}: {len(partidos)} partidos")
+        return por_equipo
+    
+    def indexar_jornadas(self, pdfs: List[Dict]) -> IndiceLiga:
+        """
+        Modo liga completa: extrae TODOS los partidos de las jornadas con una sola
+        lectura de cada PDF y los indexa por código de club, categoría y lugar, para
+        poder servir a cualquier club sin volver a ejecutar el scraper.
+        
+        Args:
+            pdfs: Lista de info de PDFs (como la de descargar_pdfs_recientes)
+            
+        Returns:
+            IndiceLiga con todos los partidos
+        """
+        indice = IndiceLiga()
+        por_pdf = self.extraer_partidos_pdfs([pdf_info['path'] for pdf_info in pdfs], todos=True,
+                                             hashes=[pdf_info.get('sha256') for pdf_info in pdfs])
+        for pdf_info, partidos in zip(pdfs, por_pdf):
+            for partido in partidos:
+                partido['jornada_tipo'] = pdf_info['tipo']
+                partido['hoja'] = pdf_info.get('titulo')
+                indice.agregar(partido)
+        logger.info(f"Índice de liga: {len(indice.partidos)} partidos, {len(indice.por_club)} equipos, "
+                    f"{len(indice.por_categoria)} categorías, {len(indice.por_lugar)} lugares")
+        return indice
     
     def _parsear_linea_tabla(self, line: str, dia: Optional[str]) -> Optional[Dict]:
         """
@@ -692,7 +1056,7 @@ class ScraperBaloncesto:
                 nombre_archivo = f"partidos_valsequillo_{timestamp}.xlsx"
             
             # Crear DataFrame
-            df = pd.DataFrame(partidos)
+            df = pd.DataFrame([dict(p) for p in partidos])
             
             # Asegurar que existan las columnas esperadas y en el orden correcto
             # Si existe jornada_tipo, incluirla
@@ -709,7 +1073,8 @@ class ScraperBaloncesto:
             
             # Guardar a Excel
             excel_path = Path(nombre_archivo)
-            df.to_excel(excel_path, index=False, engine='openpyxl')
+            with destino_atomico(excel_path) as tmp:
+                df.to_excel(tmp, index=False, engine='openpyxl')
             
             logger.info(f"Excel generado exitosamente: {excel_path}")
             logger.info(f"Total de partidos exportados: {len(partidos)}")
@@ -868,8 +1233,8 @@ class ScraperBaloncesto:
             # Datos de partidos usando Paragraph para permitir word wrap
             for partido in partidos:
                 # Determinar si es Valsequillo y aplicar estilo
-                local_es_valsequillo = 'valsequillo' in partido['local'].lower()
-                visitante_es_valsequillo = 'valsequillo' in partido['visitante'].lower()
+                local_es_valsequillo = self.filtro.coincide(partido['local'])
+                visitante_es_valsequillo = self.filtro.coincide(partido['visitante'])
                 
                 local_style = cell_valsequillo_style if local_es_valsequillo else cell_style
                 visitante_style = cell_valsequillo_style if visitante_es_valsequillo else cell_style
@@ -943,8 +1308,10 @@ class ScraperBaloncesto:
             )
             elements.append(footer)
             
-            # Construir PDF
-            doc.build(elements)
+            # Construir PDF (en un temporal que sustituye al anterior al terminar)
+            with destino_atomico(pdf_path) as tmp:
+                doc.filename = str(tmp)
+                doc.build(elements)
             
             logger.info(f"PDF generado exitosamente: {pdf_path}")
             logger.info(f"Total de partidos exportados a PDF: {len(partidos)}")
@@ -965,27 +1332,10 @@ class ScraperBaloncesto:
             count = 0
             
             for p in partidos:
-                # Intentar construir fecha y hora de inicio
-                fecha_str = p.get('dia', '')
-                hora_str = p.get('hora', '00:00')
-                
-                # Extraer DD/MM/YY de "Viernes 16/01/26"
-                match = re.search(r'(\d{1,2}/\d{1,2}/\d{2,4})', fecha_str)
-                if match:
-                    fecha_pura = match.group(1)
-                    # Normalizar año (si viene 26 convertir a 2026)
-                    partes = fecha_pura.split('/')
-                    if len(partes[2]) == 2:
-                        partes[2] = "20" + partes[2]
-                        fecha_pura = "/".join(partes)
-                    
-                    fecha_hora_str = f"{fecha_pura} {hora_str}"
+                # Fecha y hora de inicio (con zona horaria de Canarias), calculadas al extraer
+                inicio = como_partido(p).inicio
+                if inicio:
                     try:
-                        # Parsear fecha
-                        # Convertir a datetime con zona horaria de Canarias
-                        inicio_naive = datetime.strptime(fecha_hora_str, "%d/%m/%Y %H:%M")
-                        inicio = inicio_naive.replace(tzinfo=ZoneInfo("Atlantic/Canary"))
-                        
                         # Crear Evento
                         e = Event()
                         e.name = f"🏀 {p['local']} vs {p['visitante']}"
@@ -1004,7 +1354,7 @@ class ScraperBaloncesto:
                         
                         c.events.add(e)
                         count += 1
-                        logger.debug(f"Evento añadido al calendario: {e.name} ({fecha_hora_str})")
+                        logger.debug(f"Evento añadido al calendario: {e.name} ({inicio.strftime('%d/%m/%Y %H:%M')})")
                         
                     except ValueError as ve:
                         logger.warning(f"Error de valor al crear evento calendario: {ve}")
@@ -1013,7 +1363,7 @@ class ScraperBaloncesto:
                         logger.error(f"Error inesperado al crear evento: {ex}")
                         continue
                 else:
-                    logger.warning(f"CALENDARIO: Partido sin fecha exacta (solo '{fecha_str}'), se omite: {p['local']}")
+                    logger.warning(f"CALENDARIO: Partido sin fecha exacta (solo '{p.get('dia', '')}'), se omite: {p['local']}")
             
             if count > 0:
                 sufijo_tipo = f"_{tipo_jornada}" if tipo_jornada else ""
@@ -1021,8 +1371,7 @@ class ScraperBaloncesto:
                 nombre_archivo = f"PARTIDOS_VALSEQUILLO{sufijo_tipo}_{now.strftime('%d_%m')}.ics"
                 path_ics = Path(nombre_archivo)
                 
-                with open(path_ics, 'w', encoding='utf-8') as f:
-                    f.writelines(c.serialize_iter())
+                escribir_atomico(path_ics, ''.join(c.serialize_iter()))
                 
                 logger.info(f"Calendario generado con {count} eventos: {path_ics}")
                 return path_ics
@@ -1039,39 +1388,9 @@ class ScraperBaloncesto:
         """
         try:
             # Filtrar partidos que ya terminaron (más de 2 horas después del inicio)
-            from datetime import datetime, timedelta
-            import re
-            
             def filtrar_partidos_vigentes(partidos):
                 """Filtra solo partidos que no hayan terminado"""
-                partidos_vigentes = []
-                ahora = datetime.now()
-                
-                for p in partidos:
-                    try:
-                        # Parsear fecha y hora del partido
-                        match_fecha = re.search(r'(\d{2})/(\d{2})/(\d{2})', p.get('dia', ''))
-                        match_hora = re.search(r'(\d{1,2}):(\d{2})', p.get('hora', ''))
-                        
-                        if match_fecha and match_hora:
-                            dia, mes, anio = match_fecha.groups()
-                            hora, minuto = match_hora.groups()
-                            
-                            fecha_partido = datetime(2000 + int(anio), int(mes), int(dia), int(hora), int(minuto))
-                            # Añadir 2 horas buffer (un partido dura ~1.5-2h)
-                            fecha_fin_estimada = fecha_partido + timedelta(hours=2)
-                            
-                            # Solo incluir si no ha terminado
-                            if ahora < fecha_fin_estimada:
-                                partidos_vigentes.append(p)
-                        else:
-                            # Si no se puede parsear, incluirlo por seguridad
-                            partidos_vigentes.append(p)
-                    except:
-                        # Si hay error, incluir el partido
-                        partidos_vigentes.append(p)
-                
-                return partidos_vigentes
+                return [p for p in partidos if partido_vigente(p)]
             
             # Filtrar ambas listas
             logger.info(f"📧 EMAIL: Partidos definitivos ANTES de filtrar: {len(partidos_definitivos)}")
@@ -1131,7 +1450,7 @@ class ScraperBaloncesto:
                 for p in partidos:
                     # Resaltar si jugamos en casa
                     estilo_fila = ""
-                    if "valsequillo" in p['local'].lower():
+                    if self.filtro.coincide(p['local']):
                         estilo_fila = "background-color: #e8f5e9;"  # Verde claro
                         icono_casa = "🏠 "
                     else:
@@ -1174,7 +1493,7 @@ class ScraperBaloncesto:
             
             # Guardar a archivo
             preview_path = Path("email_preview.html")
-            preview_path.write_text(html, encoding='utf-8')
+            escribir_atomico(preview_path, html)
             logger.info(f"Preview de email generado: {preview_path.absolute()}")
             
             return preview_path
@@ -1183,326 +1502,169 @@ class ScraperBaloncesto:
             logger.error(f"Error generando preview de email: {e}")
             return None
     
-    def detectar_cambios(self, partidos_actuales: List[Dict]) -> List[Dict]:
+    def detectar_cambios(self, partidos_actuales: List[Dict], hojas_sin_leer: Collection[str] = ()) -> List[Dict]:
         """
-        Compara los partidos actuales con los de la semana anterior.
-        Detecta cambios en fecha, hora o lugar.
+        Compara los partidos actuales con los de la ejecución anterior (almacén SQLite).
+        Detecta cambios en fecha, hora, lugar o estado y partidos eliminados.
+        Los eventos completos (altas, bajas y modificaciones) se añaden a historial_cambios.jsonl.
+        Los partidos de hojas_sin_leer (hojas del listado cuya descarga o extracción falló en
+        esta ejecución) se mantienen como estaban: no se dan de baja ni se marcan inactivos.
         
         Returns:
             Lista de cambios detectados
         """
         cambios = []
-        snapshot_path = Path("partidos_anteriores.json")
         
         try:
-            # Leer snapshot anterior
-            partidos_anteriores = []
-            if snapshot_path.exists():
+            almacen = AlmacenPartidos(self.ruta_almacen)
+        except Exception as e:
+            logger.error(f"No se pudo abrir el almacén {self.ruta_almacen}: {e}")
+            return cambios
+        
+        try:
+            # Primera ejecución con almacén: partir del snapshot JSON que hubiera
+            if almacen.vacio():
                 try:
-                    with open(snapshot_path, 'r', encoding='utf-8') as f:
-                        contenido = f.read().strip()
-                        if contenido:  # Solo parsear si no está vacío
-                            import json
-                            partidos_anteriores = json.loads(contenido)
-                except json.JSONDecodeError:
+                    importados = almacen.importar_json(RUTA_SNAPSHOT_JSON)
+                    if importados:
+                        logger.info(f"📦 Almacén inicializado con {importados} partidos de {RUTA_SNAPSHOT_JSON}")
+                except ValueError:
                     logger.warning("Archivo snapshot corrupto, iniciando desde cero")
-                    partidos_anteriores = []
             
-            # Crear diccionario de partidos anteriores por clave única
-            partidos_ant_dict = {}
-            for p in partidos_anteriores:
-                clave = f"{p['local']} vs {p['visitante']} - {p['categoria']}"
-                partidos_ant_dict[clave] = p
+            # Partidos de la ejecución anterior
+            partidos_anteriores = almacen.activos()
             
-            # Comparar con actuales
-            for p_actual in partidos_actuales:
-                clave = f"{p_actual['local']} vs {p_actual['visitante']} - {p_actual['categoria']}"
-                
-                if clave in partidos_ant_dict:
-                    p_anterior = partidos_ant_dict[clave]
-                    
-                    # Verificar cambios
-                    cambios_partido = []
-                    
-                    if p_actual['dia'] != p_anterior['dia']:
-                        cambios_partido.append(f"Día: {p_anterior['dia']} → {p_actual['dia']}")
-                    
-                    if p_actual['hora'] != p_anterior['hora']:
-                        cambios_partido.append(f"Hora: {p_anterior['hora']} → {p_actual['hora']}")
-                    
-                    if p_actual['lugar'] != p_anterior['lugar']:
-                        cambios_partido.append(f"Lugar: {p_anterior['lugar']} → {p_actual['lugar']}")
-                    
-                    # DETECTAR CAMBIO DE PROVISIONAL A DEFINITIVA
-                    if p_actual.get('jornada_tipo') != p_anterior.get('jornada_tipo'):
-                        tipo_ant = p_anterior.get('jornada_tipo', 'DESCONOCIDO')
-                        tipo_act = p_actual.get('jornada_tipo', 'DESCONOCIDO')
-                        cambios_partido.append(f"Estado: {tipo_ant} → {tipo_act}")
-                    
-                    if cambios_partido:
-                        cambios.append({
-                            'partido': clave,
-                            'local': p_actual['local'],
-                            'visitante': p_actual['visitante'],
-                            'cambios': cambios_partido
-                        })
+            # Altas, bajas y modificaciones por identidad estable; todas al historial
+            eventos = diferenciar(partidos_anteriores, partidos_actuales, hojas_sin_leer)
+            self.eventos_cambios = eventos
+            for evento in eventos:
+                self.metricas.incrementar('cambios', tipo=evento['tipo'])
+            if registrar_historial(eventos, self.ruta_historial):
+                logger.debug(f"Historial: {len(eventos)} eventos añadidos a {self.ruta_historial}")
+            
+            # Solo se avisa de lo que importa a las familias (ver resumen_cambios)
+            cambios = resumen_cambios(eventos)
             
             logger.info(f"Cambios detectados: {len(cambios)}")
             
         except Exception as e:
             logger.error(f"Error comparando cambios: {e}")
         
-        # SIEMPRE guardar snapshot actual (incluso si hubo errores antes)
+        # SIEMPRE guardar la ejecución actual (incluso si hubo errores antes)
         try:
-            import json
-            with open(snapshot_path, 'w', encoding='utf-8') as f:
-                json.dump(partidos_actuales, f, ensure_ascii=False, indent=2)
-            logger.debug(f"Snapshot guardado: {len(partidos_actuales)} partidos")
+            almacen.guardar_ejecucion(partidos_actuales, hojas_sin_leer=hojas_sin_leer)
+            exportados = almacen.exportar_json(RUTA_SNAPSHOT_JSON)
+            logger.debug(f"Snapshot guardado: {exportados} partidos")
         except Exception as e:
             logger.error(f"Error guardando snapshot: {e}")
+        finally:
+            almacen.cerrar()
         
         return cambios
     
-    def sincronizar_google_calendar(self, partidos: List[Dict]) -> bool:
+    def sincronizar_google_calendar(self, partidos: List[Dict], service=None,
+                                    calendar_id: Optional[str] = None) -> Optional[bool]:
         """
         Sincroniza los partidos con Google Calendar compartido.
         Usa extendedProperties para evitar duplicados y actualizar eventos existentes.
+        Los borrados, actualizaciones y altas se reúnen en un plan que se envía en
+        peticiones batch (ver calendario_google.enviar_plan).
         
-        Requiere variables de entorno:
+        Sin 'service' requiere variables de entorno:
         - GOOGLE_CALENDAR_ID
         - GOOGLE_CREDENTIALS_JSON
         
+        Args:
+            service: Servicio de Calendar ya construido (ej: calendario_falso.CalendarioFalso
+                en pruebas y benchmarks); None = autenticarse con las variables de entorno
+            calendar_id: Calendario a sincronizar (por defecto GOOGLE_CALENDAR_ID)
+        
         Returns:
-            True si tuvo éxito, False si falló
+            True si tuvo éxito, False si falló, None si Google Calendar no está configurado
         """
         try:
             import os
             import json
-            import hashlib
-            from google.oauth2 import service_account
-            from googleapiclient.discovery import build
-            
-            def generar_partido_id(partido: Dict) -> str:
-                """Genera un ID único para un partido basado en sus características"""
-                # Crear un string único con la información del partido
-                info = f"{partido['local']}|{partido['visitante']}|{partido['categoria']}|{partido['dia']}|{partido['hora']}"
-                # Generar hash MD5 para tener un ID corto y único
-                return hashlib.md5(info.encode('utf-8')).hexdigest()
             
             # Leer variables de entorno
-            calendar_id = os.getenv('GOOGLE_CALENDAR_ID')
+            calendar_id = calendar_id or os.getenv('GOOGLE_CALENDAR_ID')
             creds_json = os.getenv('GOOGLE_CREDENTIALS_JSON')
+            nueva_http = None
             
-            if not calendar_id or not creds_json:
-                logger.info("Google Calendar no configurado (variables de entorno faltantes). Saltando sincronización.")
-                return False
-            
-            # Autenticar
-            credentials_dict = json.loads(creds_json)
-            credentials = service_account.Credentials.from_service_account_info(
-                credentials_dict,
-                scopes=['https://www.googleapis.com/auth/calendar']
-            )
-            
-            service = build('calendar', 'v3', credentials=credentials)
-            
-            # 1. Obtener todos los eventos existentes del calendario (futuros y pasados recientes)
-            # Buscamos desde 7 días atrás para tener un margen
-            fecha_inicio = (datetime.now(ZoneInfo("Atlantic/Canary")) - timedelta(days=7)).isoformat()
-            
-            logger.info("Obteniendo eventos existentes del calendario...")
-            events_result = service.events().list(
-                calendarId=calendar_id,
-                timeMin=fecha_inicio,
-                maxResults=250,  # Aumentado para cubrir más eventos
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            existing_events = events_result.get('items', [])
-            logger.info(f"Eventos existentes encontrados: {len(existing_events)}")
-            
-            # 2. Crear diccionario de eventos existentes por partido_id
-            # Y eliminar eventos legacy (sin partido_id)
-            eventos_por_id = {}
-            eventos_legacy_eliminados = 0
-            
-            for event in existing_events:
-                extended_props = event.get('extendedProperties', {}).get('private', {})
-                partido_id = extended_props.get('partido_id')
-                
-                if partido_id:
-                    # Evento con el nuevo sistema, guardarlo
-                    eventos_por_id[partido_id] = event
-                    logger.debug(f"Evento existente con ID {partido_id}: {event.get('summary')}")
-                else:
-                    # Evento sin partido_id = evento antiguo del sistema anterior
-                    # Eliminarlo para evitar duplicados
-                    try:
-                        service.events().delete(calendarId=calendar_id, eventId=event['id']).execute()
-                        eventos_legacy_eliminados += 1
-                        logger.debug(f"Evento LEGACY eliminado (sin partido_id): {event.get('summary', 'Sin título')}")
-                    except Exception as e:
-                        logger.warning(f"No se pudo eliminar evento legacy: {e}")
-            
-            if eventos_legacy_eliminados > 0:
-                logger.info(f"🗑️  {eventos_legacy_eliminados} eventos antiguos (sin partido_id) eliminados")
-            
-            # 3. Generar IDs para los partidos actuales
-            partidos_actuales_ids = set()
-            eventos_creados = 0
-            eventos_actualizados = 0
-            eventos_sin_cambios = 0
-            
-            for p in partidos:
-                # Parsear fecha y hora
-                fecha_str = p.get('dia', '')
-                hora_str = p.get('hora', '00:00')
+            if service is None:
+                if not calendar_id or not creds_json:
+                    logger.info("Google Calendar no configurado (variables de entorno faltantes). Saltando sincronización.")
+                    return None
                 
-                match = re.search(r'(\d{1,2}/\d{1,2}/\d{2,4})', fecha_str)
-                if not match:
-                    logger.warning(f"No se pudo parsear fecha para: {p['local']} vs {p['visitante']}")
-                    continue
+                from google.oauth2 import service_account
+                from googleapiclient.discovery import build
                 
-                fecha_pura = match.group(1)
-                partes = fecha_pura.split('/')
-                if len(partes[2]) == 2:
-                    partes[2] = "20" + partes[2]
-                    fecha_pura = "/".join(partes)
+                # Autenticar
+                credentials_dict = json.loads(creds_json)
+                credentials = service_account.Credentials.from_service_account_info(
+                    credentials_dict,
+                    scopes=['https://www.googleapis.com/auth/calendar']
+                )
                 
-                fecha_hora_str = f"{fecha_pura} {hora_str}"
+                service = build('calendar', 'v3', credentials=credentials)
                 
-                try:
-                    inicio_naive = datetime.strptime(fecha_hora_str, "%d/%m/%Y %H:%M")
-                    inicio = inicio_naive.replace(tzinfo=ZoneInfo("Atlantic/Canary"))
-                    
-                    # Generar ID único para este partido
-                    partido_id = generar_partido_id(p)
-                    partidos_actuales_ids.add(partido_id)
-                    
-                    # Determinar si es provisional o definitivo
-                    es_provisional = p.get('jornada_tipo') == 'PROVISIONAL'
-                    titulo_prefix = "⚠️ PROVISIONAL: " if es_provisional else ""
-                    
-                    # Preparar datos del evento
-                    event_data = {
-                        'summary': f"{titulo_prefix}🏀 {p['local']} vs {p['visitante']}",
-                        'location': p['lugar'],
-                        'description': f"Categoría: {p['categoria']}\nTipo: {p.get('jornada_tipo', 'N/A')}\nCompetición: CB Valsequillo\n\nCalendario actualizado automáticamente cada día a las 8 AM.",
-                        'start': {
-                            'dateTime': inicio.isoformat(),
-                            'timeZone': 'Atlantic/Canary',
-                        },
-                        'end': {
-                            'dateTime': (inicio + timedelta(hours=1, minutes=45)).isoformat(),
-                            'timeZone': 'Atlantic/Canary',
-                        },
-                        'reminders': {
-                            'useDefault': False,
-                            'overrides': [
-                                {'method': 'popup', 'minutes': 24 * 60},  # 1 día antes
-                                {'method': 'popup', 'minutes': 120},       # 2 horas antes
-                            ],
-                        },
-                        'extendedProperties': {
-                            'private': {
-                                'partido_id': partido_id,
-                                'local': p['local'],
-                                'visitante': p['visitante'],
-                                'categoria': p['categoria']
-                            }
-                        }
-                    }
-                    
-                    # Verificar si el evento ya existe
-                    if partido_id in eventos_por_id:
-                        existing_event = eventos_por_id[partido_id]
-                        
-                        # Comparar si hay cambios significativos
-                        cambios = False
-                        if existing_event.get('summary') != event_data['summary']:
-                            cambios = True
-                        elif existing_event.get('location') != event_data['location']:
-                            cambios = True
-                        elif existing_event['start'].get('dateTime') != event_data['start']['dateTime']:
-                            cambios = True
-                        
-                        if cambios:
-                            # Actualizar evento existente
-                            service.events().update(
-                                calendarId=calendar_id,
-                                eventId=existing_event['id'],
-                                body=event_data
-                            ).execute()
-                            eventos_actualizados += 1
-                            logger.debug(f"Evento ACTUALIZADO: {event_data['summary']}")
-                        else:
-                            eventos_sin_cambios += 1
-                            logger.debug(f"Evento sin cambios: {event_data['summary']}")
-                    else:
-                        # Crear nuevo evento
-                        service.events().insert(calendarId=calendar_id, body=event_data).execute()
-                        eventos_creados += 1
-                        logger.debug(f"Evento CREADO: {event_data['summary']}")
-                    
-                except ValueError as ve:
-                    logger.warning(f"Error parseando fecha para Google Calendar: {ve}")
-                    continue
-                except Exception as ex:
-                    logger.error(f"Error procesando partido: {ex}")
-                    continue
-            
-            # 4. Eliminar eventos obsoletos (que ya no están en la lista actual)
-            # EXCEPCIÓN: No borrar eventos que estén fuera del rango de fechas que hemos procesado
-            eventos_eliminados = 0
-            
-            # Calcular rango de fechas procesadas
-            fechas_procesadas = []
-            for p_id in partidos_actuales_ids:
-                # Buscar el partido en la lista actual para sacar su fecha
-                for part in partidos:
-                    temp_id = hashlib.md5(f"{part['local']}|{part['visitante']}|{part['categoria']}|{part['dia']}|{part['hora']}".encode('utf-8')).hexdigest()
-                    if temp_id == p_id:
-                        res_fecha = re.search(r'(\d{1,2}/\d{1,2}/\d{2,4})', part.get('dia', ''))
-                        if res_fecha:
-                            d_str, m_str, a_str = res_fecha.group(1).split('/')
-                            if len(a_str) == 2: a_str = "20" + a_str
-                            fechas_procesadas.append(datetime(int(a_str), int(m_str), int(d_str)).date())
-                        break
-            
-            fecha_max_procesada = max(fechas_procesadas) if fechas_procesadas else None
-            
-            for partido_id, event in eventos_por_id.items():
-                if partido_id not in partidos_actuales_ids:
-                    # Si el evento tiene fecha y es posterior a lo que hemos procesado, NO borrar
-                    try:
-                        start_str = event['start'].get('dateTime') or event['start'].get('date')
-                        if start_str and fecha_max_procesada:
-                            # Parsear ISO format simplificado
-                            event_date_str = start_str.split('T')[0]
-                            event_date = datetime.strptime(event_date_str, "%Y-%m-%d").date()
-                            if event_date > fecha_max_procesada:
-                                logger.debug(f"Saltando eliminación de evento futuro lejano: {event.get('summary')}")
-                                continue
-                    except Exception as e:
-                        logger.debug(f"Error parseando fecha de evento para borrado: {e}")
-                        pass
-
-                    try:
-                        service.events().delete(calendarId=calendar_id, eventId=event['id']).execute()
-                        eventos_eliminados += 1
-                        logger.debug(f"Evento ELIMINADO (obsoleto): {event.get('summary', 'Sin título')}")
-                    except Exception as e:
-                        logger.warning(f"No se pudo eliminar evento obsoleto: {e}")
+                # Cada hilo de envío necesita su propia conexión (httplib2 no admite hilos)
+                def nueva_http():
+                    import httplib2
+                    from google_auth_httplib2 import AuthorizedHttp
+                    return AuthorizedHttp(credentials, http=httplib2.Http(timeout=60))
+            calendar_id = calendar_id or 'primary'
+            
+            # 1. Poner al día el espejo local de los eventos del calendario: la primera vez se
+            # lista entero (todas las páginas); después solo llega lo que cambió (syncToken)
+            logger.info("Obteniendo eventos existentes del calendario...")
+            espejo = EspejoCalendar(self.cache_dir / RUTA_ESPEJO.name, calendar_id)
+            recibidos = espejo.actualizar(service, llamar=self._llamar_calendar)
+            logger.info(f"Eventos en el calendario: {len(espejo.eventos)} ({recibidos} recibidos de Google)")
+            
+            # 2. Eventos existentes por partido_id (futuros y pasados recientes: 7 días de margen)
+            eventos_por_id, sobrantes = espejo.por_partido(datetime.now(ZONA_CANARIAS) - timedelta(days=7))
+            
+            # 3. Partidos actuales por partido_id, con su inicio (se calcula una sola vez)
+            partidos_por_id = mapa_partidos(partidos)
+            
+            # 4. Plan: borrar legacy/repetidos, crear, actualizar lo que cambió (huella del
+            # contenido) y borrar obsoletos dentro del rango de fechas procesado
+            plan, eventos_sin_cambios = planificar(partidos_por_id, eventos_por_id, sobrantes)
+            
+            # 5. Enviar el plan en peticiones batch, varias a la vez y sin pasar de la cuota de la
+            # API (las operaciones fallidas por cuota o red se reintentan con espera exponencial)
+            limitador = (LimitadorTasa(self.operaciones_por_segundo_calendar, capacidad=TAM_LOTE)
+                         if self.operaciones_por_segundo_calendar else None)
+            resultado = enviar_plan(service, calendar_id, plan, llamar=self._llamar_calendar,
+                                    hilos=self.hilos_calendar, limitador=limitador, nueva_http=nueva_http)
+            self.metricas.observar('calendar_envio_segundos', resultado.segundos)
+            self.metricas.incrementar('calendar_reintentos', resultado.reintentos)
+            self.metricas.incrementar('calendar_limitadas', resultado.limitadas)
+            espejo.aplicar(resultado.hechas)
+            espejo.guardar()
+            for op in resultado.hechas:
+                self.metricas.incrementar('calendar_operaciones', verbo=op.verbo, resultado='ok')
+                logger.debug(f"Evento {op.verbo.upper()} ({op.motivo or 'partido'}): {op.descripcion}")
+            for op, error in resultado.fallidas:
+                self.metricas.incrementar('calendar_operaciones', verbo=op.verbo, resultado='error')
+                logger.warning(f"No se pudo aplicar {op.verbo} a '{op.descripcion}': {error}")
             
             # Resumen
-            logger.info(f"✅ Google Calendar sincronizado:")
-            logger.info(f"   📝 {eventos_creados} eventos creados")
-            logger.info(f"   🔄 {eventos_actualizados} eventos actualizados")
+            if resultado.contar('delete', 'legacy'):
+                logger.info(f"🗑️  {resultado.contar('delete', 'legacy')} eventos antiguos (sin partido_id) eliminados")
+            logger.info(f"✅ Google Calendar sincronizado ({len(plan)} operaciones en {resultado.lotes} petición(es) batch):")
+            logger.info(f"   📝 {resultado.contar('insert')} eventos creados")
+            logger.info(f"   🔄 {resultado.contar('update')} eventos actualizados")
             logger.info(f"   ✔️  {eventos_sin_cambios} eventos sin cambios")
-            logger.info(f"   🗑️  {eventos_eliminados} eventos obsoletos eliminados")
+            logger.info(f"   🗑️  {resultado.contar('delete', 'obsoleto')} eventos obsoletos eliminados")
+            if plan:
+                logger.info(f"   ⚡ {resultado.resumen()}")
+            if resultado.fallidas:
+                logger.warning(f"   ⚠️ {len(resultado.fallidas)} operaciones fallidas (se reintentarán en la próxima ejecución)")
             
-            return True
+            # Con operaciones fallidas la etapa no se da por buena (el manifiesto no la salta la próxima vez)
+            return not resultado.fallidas
             
         except Exception as e:
             logger.error(f"Error sincronizando con Google Calendar: {e}")
@@ -1510,35 +1672,90 @@ class ScraperBaloncesto:
             logger.error(traceback.format_exc())
             return False
     
-    def ejecutar(self) -> List[Path]:
+    def _llamar_calendar(self, verbo: str, peticion):
+        """Ejecuta una petición de la API de Calendar contando la llamada y su latencia por verbo."""
+        self.metricas.incrementar('calendar_llamadas', verbo=verbo)
+        try:
+            with self.metricas.cronometro('calendar_segundos', verbo=verbo):
+                return peticion.execute()
+        except Exception:
+            self.metricas.incrementar('calendar_errores', verbo=verbo)
+            raise
+    
+    def ejecutar(self, forzar: bool = False) -> List[Path]:
         """
         Ejecuta el proceso completo: descarga múltiples jornadas, extracción y generación de PDFs independientes
         
+        Args:
+            forzar: Ignorar la caché del listado y procesar aunque la federación no haya publicado nada nuevo
+        
         Returns:
             Lista de paths de los archivos PDF generados
         """
+        # La marca se borra solo si todo termina; si se queda, la siguiente ejecución lo sabe
+        interrumpida = iniciar_marca(self.ruta_marca)
+        self.metricas = Metricas()
+        if interrumpida is not None:
+            logger.warning(f"⚠️ La ejecución anterior ({interrumpida.get('inicio') or 'sin fecha'}) no terminó: se recupera")
+            self.recuperar_ejecucion_interrumpida()
+            self.metricas.incrementar('ejecuciones_recuperadas')
+            forzar = True
+        
+        try:
+            generados = self._ejecutar(forzar)
+        finally:
+            self.guardar_metricas()
+        finalizar_marca(self.ruta_marca)
+        return generados
+    
+    def guardar_metricas(self) -> None:
+        """Vuelca las métricas de la ejecución: informe JSON y, si está configurado, fichero Prometheus."""
+        try:
+            self.metricas.exportar_json(self.ruta_metricas)
+            logger.info(f"📊 Métricas de la ejecución en {self.ruta_metricas}")
+            if self.ruta_metricas_prometheus:
+                self.metricas.exportar_prometheus(self.ruta_metricas_prometheus)
+        except Exception as e:
+            logger.warning(f"No se pudieron guardar las métricas: {e}")
+    
+    def recuperar_ejecucion_interrumpida(self) -> None:
+        """
+        Deja el disco coherente tras una ejecución interrumpida: borra los temporales que
+        quedaron a medias y vuelve a exportar el JSON desde el almacén (SQLite se recupera
+        solo de una transacción cortada, así que el almacén es la fuente fiable).
+        """
+        borrados = limpiar_temporales([Path('.'), Path('docs'), self.cache_dir, self.cache_dir / 'pdfs'])
+        if borrados:
+            logger.info(f"🧹 {borrados} fichero(s) temporal(es) de la ejecución interrumpida borrados")
+        if self.ruta_almacen.exists():
+            try:
+                with AlmacenPartidos(self.ruta_almacen) as almacen:
+                    almacen.exportar_json(RUTA_SNAPSHOT_JSON)
+                    if Path('docs').is_dir():
+                        almacen.exportar_json(Path('docs') / RUTA_SNAPSHOT_JSON.name)
+                logger.info("✅ JSON de partidos restaurado desde el almacén")
+            except Exception as e:
+                logger.error(f"Error restaurando el JSON desde el almacén: {e}")
+    
+    def _ejecutar(self, forzar: bool) -> List[Path]:
+        """Cuerpo de ejecutar() (sin la marca de ejecución en curso)."""
         logger.info("=== Iniciando proceso de extracción de partidos ===")
         
-        # 1. Descargar PDFs recientes (definitivas y provisionales)
-        pdfs_descargados = self.descargar_pdfs_recientes()
-        if not pdfs_descargados:
+        if forzar:
+            (self.cache_dir / 'listado.json').unlink(missing_ok=True)
+        
+        # 1-2. Descargar PDFs recientes (definitivas y provisionales) y extraer partidos
+        # de cada uno en cuanto llega, sin esperar al resto de descargas. Sin jornadas nuevas,
+        # las descargas son 304 y la extracción sale de la caché; las etapas de salida se
+        # ejecutan igualmente porque dependen del día de hoy (el manifiesto salta el resto)
+        resultados = self.descargar_y_extraer()
+        if self.listado_sin_cambios:
+            logger.info("=== Sin jornadas nuevas en la federación: se reutiliza la extracción anterior ===")
+        if not resultados:
             logger.error("No se pudo descargar ningún PDF")
             return []
         
-        # 2. Extraer partidos de TODOS los PDFs
-        todos_los_partidos = []
-        for pdf_info in pdfs_descargados:
-            pdf_path = pdf_info['path']
-            tipo = pdf_info['tipo']
-            logger.info(f"Procesando {tipo}: {pdf_path}")
-            
-            partidos = self.extraer_partidos_pdf(pdf_path)
-            
-            # Marcar los partidos con el tipo de jornada
-            for partido in partidos:
-                partido['jornada_tipo'] = tipo
-            
-            todos_los_partidos.extend(partidos)
+        todos_los_partidos = [partido for _, partidos in resultados for partido in partidos]
         
         if not todos_los_partidos:
             logger.warning("No se encontraron partidos de Valsequillo en ninguna jornada")
@@ -1546,39 +1763,24 @@ class ScraperBaloncesto:
         
         logger.info(f"Total de partidos de Valsequillo encontrados: {len(todos_los_partidos)}")
         
-        # 3. Generar Excel con todos los partidos (para tener un registro completo)
-        excel_path = self.generar_excel(todos_los_partidos)
-        logger.info(f"Archivo Excel global: {excel_path}")
+        # Hojas del listado que no llegaron o no dieron partidos (descarga o extracción fallida):
+        # la detección de cambios mantiene sus partidos en vez de darlos de baja
+        leidas = {info['titulo'] for info, partidos in resultados if partidos}
+        hojas_sin_leer = [titulo for titulo in self.hojas_listadas if titulo not in leidas]
+        if hojas_sin_leer:
+            logger.warning(f"Hojas de jornada sin leer en esta ejecución (se mantienen sus partidos): "
+                           f"{', '.join(hojas_sin_leer)}")
         
-        # 3.5. Detectar cambios respecto a la semana anterior
-        cambios_detectados = self.detectar_cambios(todos_los_partidos)
-        if cambios_detectados:
-            logger.warning(f"⚠️ Se detectaron {len(cambios_detectados)} cambios en partidos!")
-            for cambio in cambios_detectados:
-                logger.warning(f"  - {cambio['partido']}: {', '.join(cambio['cambios'])}")
+        # Manifiesto: cada etapa se salta si sus entradas son las de la última ejecución
+        # (versión = código de este módulo: cambiar cómo se genera una salida la invalida)
+        self.manifiesto = ManifiestoEjecucion(self.cache_dir / RUTA_MANIFIESTO.name, _huella_fichero(Path(__file__)))
+        self.manifiesto.extra['pdfs'] = [info['path'].stem for info, _ in resultados]
+        ignorar_manifiesto = forzar
+        # Los nombres de PDF/ICS y los días que faltan en la web dependen del día de hoy
+        hoy = datetime.now(ZONA_CANARIAS).date().isoformat()
         
-        # 4. Separar y generar PDFs independientes
-        pdfs_generados = []
-
         # Filtrar partidos pasados (más de 2h después del inicio) antes de generar PDFs
-        def es_partido_vigente(p):
-            try:
-                match_fecha = re.search(r'(\d{1,2}/\d{1,2}/\d{2,4})', p.get('dia', ''))
-                match_hora = re.search(r'(\d{1,2}):(\d{2})', p.get('hora', ''))
-                if match_fecha and match_hora:
-                    fecha_pura = match_fecha.group(1)
-                    partes = fecha_pura.split('/')
-                    if len(partes[2]) == 2:
-                        partes[2] = "20" + partes[2]
-                    d, m, a = int(partes[0]), int(partes[1]), int(partes[2])
-                    h, mi = int(match_hora.group(1)), int(match_hora.group(2))
-                    fecha_fin = datetime(a, m, d, h, mi) + timedelta(hours=2)
-                    return datetime.now() < fecha_fin
-            except Exception:
-                pass
-            return True  # si no se puede parsear, incluir por seguridad
-
-        todos_vigentes = [p for p in todos_los_partidos if es_partido_vigente(p)]
+        todos_vigentes = [p for p in todos_los_partidos if partido_vigente(p)]
         n_filtrados = len(todos_los_partidos) - len(todos_vigentes)
         if n_filtrados:
             logger.info(f"🗓️  {n_filtrados} partido(s) de jornadas pasadas excluidos del PDF")
@@ -1587,75 +1789,720 @@ class ScraperBaloncesto:
         partidos_definitivos = [p for p in todos_vigentes if p.get('jornada_tipo') == 'DEFINITIVA']
         partidos_provisionales = [p for p in todos_vigentes if p.get('jornada_tipo') == 'PROVISIONAL']
         
-        # Generar PDF Definitiva
-        if partidos_definitivos:
-            logger.info(f"Generando PDF Definitiva ({len(partidos_definitivos)} partidos)...")
-            pdf_def = self.generar_pdf(partidos_definitivos, "DEFINITIVA")
-            pdfs_generados.append(pdf_def)
-            logger.info(f" PDF Definitiva: {pdf_def}")
-            
-            # Generar Calendario Definitiva
-            ics_def = self.generar_calendario(partidos_definitivos, "DEFINITIVA")
-            if ics_def: 
-                pdfs_generados.append(ics_def)
-                logger.info(f" ICS Calendario: {ics_def}")
-        
-        # Generar PDF Provisional
-        if partidos_provisionales:
-            logger.info(f"Generando PDF Provisional ({len(partidos_provisionales)} partidos)...")
-            pdf_prov = self.generar_pdf(partidos_provisionales, "PROVISIONAL")
-            pdfs_generados.append(pdf_prov)
-            logger.info(f" PDF Provisional: {pdf_prov}")
-            
-            # Generar Calendario Provisional
-            ics_prov = self.generar_calendario(partidos_provisionales, "PROVISIONAL")
-            if ics_prov: 
-                pdfs_generados.append(ics_prov)
-                logger.info(f" ICS Calendario: {ics_prov}")
-            
-        # 4.5. Sincronizar con Google Calendar (TODOS los partidos: definitivos + provisionales)
-        todos_los_partidos = partidos_definitivos + partidos_provisionales
-        if todos_los_partidos:
-            self.sincronizar_google_calendar(todos_los_partidos)
-        
-        # 4.6. Generar web pública con TODOS los partidos (definitivos + provisionales)
-        try:
-            from generar_web import generar_web_publica
-            generar_web_publica(partidos_definitivos, partidos_provisionales)
-            logger.info("✅ Web pública generada")
-        except Exception as e:
-            logger.error(f"Error generando web pública: {e}")
+        # 3-5. Etapas de salida: solo dependen de las listas de partidos (y las de aviso, de
+        # los cambios detectados), así que las independientes se ejecutan a la vez
+        grafo = self._grafo_salidas(ignorar_manifiesto, partidos_definitivos, partidos_provisionales)
+        ejecucion = grafo.ejecutar({
+            'partidos': todos_los_partidos,
+            'definitivos': partidos_definitivos,
+            'provisionales': partidos_provisionales,
+            'hoy': hoy,
+            'hojas_sin_leer': hojas_sin_leer,
+        })
+        self.tiempos_etapas = ejecucion.tiempos
+        for nombre, segundos in ejecucion.tiempos.items():
+            self.metricas.observar('etapa_segundos', segundos, etapa=nombre)
+        logger.info("⏱️  Etapas: " + ", ".join(f"{nombre} {segundos:.2f}s"
+                                              for nombre, segundos in sorted(ejecucion.tiempos.items())))
         
-        # 4.7. Copiar snapshot JSON a docs/ para acceso desde formulario estadísticas
-        try:
-            import shutil
-            shutil.copy('partidos_anteriores.json', 'docs/partidos_anteriores.json')
-            logger.info("✅ JSON copiado a docs/")
-        except Exception as e:
-            logger.error(f"Error copiando JSON a docs/: {e}")
+        # Ficheros generados, en el orden de siempre
+        pdfs_generados = []
+        for nombre in ('pdf_definitiva', 'ics_definitiva', 'pdf_provisional', 'ics_provisional', 'preview_email'):
+            pdfs_generados.extend(ejecucion.resultados.get(nombre) or [])
+        
+        self.manifiesto.guardar()
+        if not ejecucion.correcto:
+            # Sin confirmar el listado: la siguiente ejecución vuelve a intentarlo
+            fallidas = list(ejecucion.errores) + list(ejecucion.saltadas)
+            logger.error(f"=== Proceso completado con errores en: {', '.join(fallidas)} ===")
+            return pdfs_generados
         
-        # 5. Generar preview HTML para el email (incluyendo cambios si los hay)
-        preview_email = self.generar_preview_email(partidos_definitivos, partidos_provisionales, cambios_detectados)
-        if preview_email:
-            pdfs_generados.append(preview_email)
+        # Guardar validadores del listado solo ahora que todo ha ido bien
+        self.confirmar_cache_listado()
             
         logger.info("=== Proceso completado exitosamente ===")
         
         return pdfs_generados
+    
+    def _grafo_salidas(self, ignorar_manifiesto: bool, partidos_definitivos: List[Dict],
+                       partidos_provisionales: List[Dict]) -> GrafoEtapas:
+        """
+        Grafo de las etapas de salida de ejecutar(). Datos iniciales: 'partidos' (todos),
+        'definitivos', 'provisionales' (vigentes), 'hoy' y 'hojas_sin_leer' (títulos de las
+        hojas que no se pudieron leer). Cada etapa devuelve sus ficheros.
+        """
+        grafo = GrafoEtapas(max_hilos=self.hilos_etapas)
+        
+        # Excel con todos los partidos (para tener un registro completo)
+        def excel(partidos):
+            salidas = self._etapa('excel', [partidos], lambda: [self.generar_excel(partidos)], ignorar_manifiesto)
+            logger.info(f"Archivo Excel global: {salidas[0]}")
+            return salidas
+        grafo.agregar('excel', excel, ('partidos',))
+        
+        # Detectar cambios respecto a la ejecución anterior (actualiza el almacén)
+        def cambios(partidos, hojas_sin_leer):
+            cambios_detectados = self.detectar_cambios(partidos, hojas_sin_leer)
+            if cambios_detectados:
+                logger.warning(f"⚠️ Se detectaron {len(cambios_detectados)} cambios en partidos!")
+                for cambio in cambios_detectados:
+                    logger.warning(f"  - {cambio['partido']}: {', '.join(cambio['cambios'])}")
+            return cambios_detectados
+        grafo.agregar('cambios', cambios, ('partidos', 'hojas_sin_leer'))
+        
+        # PDF y calendario de cada tipo de jornada
+        for tipo, datos, partidos_tipo in (('DEFINITIVA', 'definitivos', partidos_definitivos),
+                                           ('PROVISIONAL', 'provisionales', partidos_provisionales)):
+            if not partidos_tipo:
+                continue
+            
+            def pdf(lista, hoy, tipo=tipo):
+                logger.info(f"Generando PDF {tipo.capitalize()} ({len(lista)} partidos)...")
+                salidas = self._etapa(f'pdf_{tipo.lower()}', [lista, hoy],
+                                      lambda: [self.generar_pdf(lista, tipo)], ignorar_manifiesto)
+                logger.info(f" PDF {tipo.capitalize()}: {salidas[0]}")
+                return salidas
+            
+            def ics(lista, hoy, tipo=tipo):
+                salidas = self._etapa(f'ics_{tipo.lower()}', [lista, hoy],
+                                      lambda: [r for r in [self.generar_calendario(lista, tipo)] if r],
+                                      ignorar_manifiesto)
+                for ruta in salidas:
+                    logger.info(f" ICS Calendario: {ruta}")
+                return salidas
+            
+            grafo.agregar(f'pdf_{tipo.lower()}', pdf, (datos, 'hoy'))
+            grafo.agregar(f'ics_{tipo.lower()}', ics, (datos, 'hoy'))
+        
+        # Sincronizar con Google Calendar (TODOS los partidos: definitivos + provisionales)
+        def google_calendar(definitivos, provisionales):
+            import os
+            vigentes = definitivos + provisionales
+            if not vigentes:
+                return []
+            # Sin salidas en disco. Si falla alguna operación la etapa falla: no se anota y el
+            # listado no se confirma, así que la siguiente ejecución lo vuelve a intentar.
+            # El calendario forma parte de las entradas: configurarlo o cambiarlo obliga a sincronizar
+            return self._etapa('google_calendar', [vigentes, os.getenv('GOOGLE_CALENDAR_ID')],
+                               lambda: None if self.sincronizar_google_calendar(vigentes) is False else [],
+                               ignorar_manifiesto)
+        grafo.agregar('google_calendar', google_calendar, ('definitivos', 'provisionales'))
+        
+        # Web pública con TODOS los partidos (definitivos + provisionales)
+        def web(definitivos, provisionales, hoy):
+            def generar() -> List[Path]:
+                from generar_web import generar_web_publica
+                generar_web_publica(definitivos, provisionales, self.filtro)
+                logger.info("✅ Web pública generada")
+                return [Path('docs') / 'index.html']
+            return self._etapa('web', [definitivos, provisionales, self.filtro.equipos, hoy,
+                                       _huella_fichero(Path(__file__).with_name('generar_web.py'))],
+                               generar, ignorar_manifiesto)
+        grafo.agregar('web', web, ('definitivos', 'provisionales', 'hoy'))
+        
+        # Exportar el almacén a docs/ en JSON para acceso desde formulario estadísticas
+        # (después de detectar cambios, que es quien guarda la ejecución en el almacén)
+        def json_docs(cambios):
+            with AlmacenPartidos(self.ruta_almacen) as almacen:
+                almacen.exportar_json(Path('docs') / RUTA_SNAPSHOT_JSON.name)
+            logger.info("✅ JSON exportado a docs/")
+            return []
+        grafo.agregar('json_docs', json_docs, ('cambios',))
+        
+        # Preview HTML para el email (incluyendo cambios si los hay)
+        def preview_email(definitivos, provisionales, cambios):
+            return self._etapa(
+                'preview_email', [definitivos, provisionales, cambios],
+                lambda: [r for r in [self.generar_preview_email(definitivos, provisionales, cambios)] if r],
+                ignorar_manifiesto)
+        grafo.agregar('preview_email', preview_email, ('definitivos', 'provisionales', 'cambios'))
+        
+        return grafo
+    
+    def _etapa(self, nombre: str, entradas: List, generar: Callable[[], Optional[List[Path]]],
+               ignorar_manifiesto: bool = False) -> List[Path]:
+        """
+        Ejecuta una etapa del pipeline o reutiliza sus salidas si el manifiesto tiene
+        la misma huella de entradas y los ficheros siguen en disco.
+        'generar' devuelve los ficheros generados, o None si falló: entonces no se anota y
+        se lanza RuntimeError para que el grafo la cuente como fallida.
+        """
+        huella = huella_entradas(nombre, *entradas)
+        if not ignorar_manifiesto:
+            previas = self.manifiesto.reutilizables(nombre, huella)
+            if previas is not None:
+                logger.info(f"⏭️  {nombre}: entradas sin cambios, se reutiliza la salida anterior")
+                self.metricas.incrementar('etapas', etapa=nombre, estado='reutilizada')
+                return previas
+        with self.metricas.cronometro('render_segundos', salida=nombre):
+            salidas = generar()
+        if salidas is None:
+            self.metricas.incrementar('etapas', etapa=nombre, estado='fallida')
+            raise RuntimeError(f"la etapa {nombre} no terminó bien")
+        self.metricas.incrementar('etapas', etapa=nombre, estado='ejecutada')
+        self.manifiesto.registrar(nombre, huella, salidas)
+        return salidas
+
+
+def _huella_fichero(ruta: Path) -> str:
+    """sha256 del contenido de un fichero ('' si no existe)."""
+    import hashlib
+    return hashlib.sha256(ruta.read_bytes()).hexdigest() if ruta.exists() else ''
+
+
+# --- Escáner de líneas de las hojas de jornada ---
+# (desde aquí hasta main() es el código del parser: ver version_parser)
+# Patrones compilados una sola vez a nivel de módulo: el escáner clasifica cada
+# línea de la página en una única pasada y luego trabaja sobre esa clasificación.
+
+MESES = {'Ene': 1, 'Feb': 2, 'Mar': 3, 'Abr': 4, 'May': 5, 'Jun': 6,
+         'Jul': 7, 'Ago': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dic': 12}
+_MES = r'(Ene|Feb|Mar|Abr|May|Jun|Jul|Ago|Sep|Oct|Nov|Dic)'
+
+# Rango de la jornada en la cabecera. Ej: "(12-18 Ene)" o "(26 Ene - 01 Feb)"
+PATRON_RANGO = re.compile(r'(\d{1,2})[-\s/]+(\d{1,2})\s+' + _MES, re.IGNORECASE)
+PATRON_RANGO_MESES = re.compile(r'(\d{1,2})\s+' + _MES + r'[-\s/]+(\d{1,2})\s+' + _MES, re.IGNORECASE)
+
+PATRON_FECHA = re.compile(r'(\d{1,2}/\d{1,2}/\d{2,4})')
+PATRON_HORA = re.compile(r'(\d{2}:\d{2})')
+# Código de equipo: (35xxxxxx) o similar. Sin $ para tolerar basura al final de la línea
+PATRON_CODIGO = re.compile(r'\(\d+\)')
+# Equipo por defecto del escáner si no se le pasa un filtro
+FILTRO_POR_DEFECTO = FiltroEquipos(EQUIPOS_POR_DEFECTO)
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+DIA_SEMANA_A_NUMERO = {d: i for i, d in enumerate(DIAS_SEMANA)}
+PATRON_DIA_SEMANA = re.compile('|'.join(DIAS_SEMANA))
+
+# Líneas hacia delante donde buscar la fecha de un día, y hacia atrás donde buscar la hora
+_MAX_LINEAS_FECHA = 3
+_MAX_LINEAS_HORA = 5
+
+
+def _fecha_inicio_jornada(lines: List[str], ahora: datetime) -> Optional[datetime]:
+    """Busca el rango de fechas de la jornada en las primeras 30 líneas de la página."""
+    for line in lines[:30]:
+        match = PATRON_RANGO_MESES.search(line)
+        tipo = "Rango Meses"
+        if not match:
+            match = PATRON_RANGO.search(line)
+            tipo = "Rango Simple"
+        if not match:
+            continue
+        
+        dia_inicio = int(match.group(1))
+        mes_texto = match.group(2 if tipo == "Rango Meses" else 3).capitalize()
+        mes_num = MESES.get(mes_texto, 1)
+        year_jornada = ahora.year + 1 if ahora.month == 12 and mes_num == 1 else ahora.year
+        fecha = datetime(year_jornada, mes_num, dia_inicio)
+        logger.debug(f"Fecha inicio detectada ({tipo}) en '{line}': {fecha.strftime('%d/%m/%Y')}")
+        return fecha
+    return None
+
+
+def _dia_con_fecha(d: str, fecha_extraida: Optional[str], fecha_inicio_jornada: Optional[datetime]) -> str:
+    """
+    Texto del día de una cabecera: 'Sábado 17/01/2026' con la fecha que trae la hoja,
+    'Sábado 17/01/26' calculada a partir del rango de la jornada, o solo 'Sábado'.
+    """
+    if fecha_extraida:
+        # Si la fecha corta (26) se vuelve 2026, normalizar
+        partes = fecha_extraida.split('/')
+        if len(partes[-1]) == 2:
+            fecha_extraida = f"{partes[0]}/{partes[1]}/20{partes[2]}"
+        logger.debug(f"Fecha EXTRAÍDA DIRECTAMENTE para {d}: {fecha_extraida}")
+        return f"{d} {fecha_extraida}"
+    if fecha_inicio_jornada:
+        dias_diferencia = (DIA_SEMANA_A_NUMERO[d] - fecha_inicio_jornada.weekday()) % 7
+        fecha_calculada = fecha_inicio_jornada + timedelta(days=dias_diferencia)
+        logger.debug(f"Fecha CALCULADA para {d} (Ref: {fecha_inicio_jornada.strftime('%d/%m')}): {fecha_calculada.strftime('%d/%m/%y')}")
+        return f"{d} {fecha_calculada.strftime('%d/%m/%y')}"
+    return d
+
+
+def _nuevo_contexto() -> Dict:
+    """
+    Contexto de la jornada que pasa de una página a la siguiente del mismo PDF:
+    día en curso, inicio del rango de fechas y columnas de la tabla (motor de coordenadas).
+    """
+    return {'dia': "Desconocido", 'fecha_inicio': None, 'columnas': None}
+
+
+def _escanear_pagina(lines: List[str], num_pagina: int, todos: bool = False,
+                     filtro: Optional[FiltroEquipos] = None, contexto: Optional[Dict] = None) -> List[Dict]:
+    """
+    Escanea las líneas de una página de la hoja de jornada y devuelve los partidos
+    de los equipos del filtro (sin deduplicar). Todos los equipos se buscan a la vez.
+    
+    Primero clasifica cada línea una sola vez (día de la semana, fecha, hora, código
+    de equipo, mención al equipo) y después recorre la página como una máquina de
+    estados cuyo estado es el día en curso.
+    
+    Con todos=True devuelve TODOS los partidos de la página (modo liga completa):
+    cada par de líneas consecutivas con código de equipo es un Local + Visitante.
+    
+    contexto (ver _nuevo_contexto) trae el día y el rango de fechas de las páginas
+    anteriores y se actualiza al terminar: un día que empieza en una página y sigue
+    en la siguiente conserva su fecha.
+    """
+    n = len(lines)
+    patron_equipo = (filtro or FILTRO_POR_DEFECTO).patron
+    contexto = contexto if contexto is not None else _nuevo_contexto()
+    fecha_inicio_jornada = _fecha_inicio_jornada(lines, datetime.now()) or contexto['fecha_inicio']
+    contexto['fecha_inicio'] = fecha_inicio_jornada
+    
+    # Clasificación de líneas (una pasada). Cada regex va precedida de una comprobación
+    # de subcadena barata: la mayoría de líneas no tienen '/', ':' ni '('
+    dias = [None] * n
+    fechas = [None] * n
+    horas = [None] * n
+    con_codigo = [False] * n
+    menciones = set()
+    eventos = []  # Índices de líneas con cabecera de día o mención al equipo, en orden
+    for i, line in enumerate(lines):
+        # Solo cuenta como cabecera de día si la línea es principalmente el día
+        if len(line) < 40:
+            encontrados = PATRON_DIA_SEMANA.findall(line)
+            if encontrados:
+                dias[i] = min(encontrados, key=DIA_SEMANA_A_NUMERO.get)
+        if '/' in line:
+            m = PATRON_FECHA.search(line)
+            if m:
+                fechas[i] = m.group(1)
+        if ':' in line:
+            m = PATRON_HORA.search(line)
+            if m:
+                horas[i] = m.group(1)
+        if '(' in line and PATRON_CODIGO.search(line):
+            con_codigo[i] = True
+            if todos:
+                # Línea de Local: la anterior, si no es ya el Visitante del par anterior
+                # (con tres líneas con código seguidas, la tercera no forma par con la segunda)
+                if i > 0 and con_codigo[i-1] and (i-1) not in menciones and (i-2) not in menciones:
+                    menciones.add(i-1)
+            elif patron_equipo.search(line):
+                menciones.add(i)
+        if dias[i] or i in menciones:
+            eventos.append(i)
+    if todos:
+        eventos = sorted(set(eventos) | menciones)
+    
+    partidos = []
+    dia_actual = contexto['dia']
+    for i in eventos:
+        d = dias[i]
+        if d:
+            # Opción 1: fecha DD/MM/YY o (DD/MM/YY) en la misma línea o en las siguientes
+            fecha_extraida = None
+            for j in range(i, min(i + _MAX_LINEAS_FECHA + 1, n)):
+                if fechas[j]:
+                    fecha_extraida = fechas[j]
+                    break
+            
+            dia_actual = _dia_con_fecha(d, fecha_extraida, fecha_inicio_jornada)
+        
+        # Solo interesan las líneas de EQUIPO (con código); "IES Valsequillo" es un lugar
+        if i not in menciones:
+            continue
+        
+        line = lines[i]
+        if not todos:
+            logger.debug(f"Encontrado equipo en línea {i}: {line}")
+        
+        # Mirar línea anterior y siguiente para decidir si somos Local o Visitante
+        linea_ant = lines[i-1] if i > 0 else ""
+        linea_sig = lines[i+1] if i < n-1 else ""
+        
+        if i < n-1 and con_codigo[i+1]:
+            # La línea siguiente tiene código: somos Local
+            local, visitante = line, linea_sig
+            lugar = lines[i+2] if i < n-2 else "Desconocido"
+            idx_categoria = i-1 if i > 0 else None
+            categoria_raw = linea_ant
+        elif i > 0 and con_codigo[i-1]:
+            # La línea anterior tiene código: somos Visitante
+            local, visitante = linea_ant, line
+            lugar = linea_sig
+            idx_categoria = i-2 if i > 1 else None
+            categoria_raw = lines[i-2] if i > 1 else "Desconocido"
+        else:
+            # Caso difícil. Asumir Local por defecto si no hay pistas
+            logger.warning(f"No se pudo determinar si es local o visitante: {line}")
+            local, visitante = line, linea_sig
+            lugar = lines[i+2] if i < n-2 else "Desconocido"
+            idx_categoria = i-1 if i > 0 else None
+            categoria_raw = linea_ant
+        
+        # La hora suele ir pegada a la categoría; si no, está unas líneas más arriba
+        hora = horas[idx_categoria] if idx_categoria is not None else None
+        if hora:
+            categoria = categoria_raw.replace(hora, "").strip()
+        else:
+            hora = "00:00"
+            for k in range(1, _MAX_LINEAS_HORA + 1):
+                if i-k >= 0 and horas[i-k]:
+                    hora = horas[i-k]
+                    break
+            categoria = categoria_raw
+        
+        # Limpieza final
+        if len(categoria) > 50: categoria = categoria[:50] + "..."
+        
+        partidos.append({
+            'dia': dia_actual,
+            'hora': hora,
+            'categoria': categoria,
+            'local': local,
+            'visitante': visitante,
+            'lugar': lugar,
+            'origen': f"Página {num_pagina+1}"
+        })
+    
+    contexto['dia'] = dia_actual
+    return partidos
+
+
+# --- Motor de coordenadas ---
+# Alternativa al escáner de líneas: lee las palabras con su posición
+# (page.get_text("words")), agrupa por filas según la Y y asigna cada palabra a
+# una columna de la tabla según la X de la cabecera. Cada fila se lee una vez
+# y no hace falta adivinar local/visitante mirando líneas vecinas.
+
+MOTORES = ('lineas', 'coordenadas')
+
+# Palabras de la cabecera de la tabla -> columna
+_CABECERA_COLUMNAS = {
+    'nº': 'numero', 'n°': 'numero', 'part': 'numero',
+    'hora': 'hora',
+    'categoría': 'categoria', 'categoria': 'categoria',
+    'local': 'local',
+    'visitante': 'visitante',
+    'lugar': 'lugar',
+}
+
+
+def _agrupar_filas(palabras: List[tuple]) -> List[Tuple[float, float, List[tuple]]]:
+    """
+    Agrupa las palabras (x0, y0, x1, y1, texto, ...) en filas por su centro vertical.
+    Devuelve [(y_centro, alto, palabras ordenadas por X)] de arriba abajo.
+    """
+    filas = []
+    for w in sorted(palabras, key=lambda w: ((w[1] + w[3]) / 2, w[0])):
+        y = (w[1] + w[3]) / 2
+        alto = w[3] - w[1]
+        if filas and y - filas[-1][0] <= max(2.0, alto * 0.4):
+            filas[-1][2].append(w)
+        else:
+            filas.append((y, alto, [w]))
+    return [(y, alto, sorted(ws, key=lambda w: w[0])) for y, alto, ws in filas]
+
+
+def _columnas_cabecera(fila: List[tuple]) -> Optional[List[Tuple[str, float]]]:
+    """
+    Si la fila es la cabecera de la tabla devuelve [(columna, x_inicio)] ordenadas por X.
+    El límite entre dos columnas es el punto medio entre el final de una etiqueta y el
+    inicio de la siguiente, para tolerar celdas que empiezan algo antes que su cabecera.
+    """
+    etiquetas = []
+    for w in fila:
+        columna = _CABECERA_COLUMNAS.get(w[4].lower().strip(':.'))
+        if columna and all(c != columna for c, _, _ in etiquetas):
+            etiquetas.append((columna, w[0], w[2]))
+    if not {'hora', 'local', 'visitante'} <= {c for c, _, _ in etiquetas}:
+        return None
+    
+    columnas = [(etiquetas[0][0], float('-inf'))]
+    for (_, _, x1_ant), (columna, x0, _) in zip(etiquetas, etiquetas[1:]):
+        columnas.append((columna, (x1_ant + x0) / 2))
+    return columnas
+
+
+def _celdas_fila(fila: List[tuple], columnas: List[Tuple[str, float]]) -> Dict[str, str]:
+    """Reparte las palabras de una fila entre las columnas según su X de inicio."""
+    celdas = {}
+    for w in fila:
+        columna = columnas[0][0]
+        for nombre, x_inicio in columnas:
+            if w[0] >= x_inicio:
+                columna = nombre
+            else:
+                break
+        celdas[columna] = f"{celdas[columna]} {w[4]}" if columna in celdas else w[4]
+    return celdas
+
+
+def _escanear_pagina_coordenadas(palabras: List[tuple], num_pagina: int, todos: bool = False,
+                                 filtro: Optional[FiltroEquipos] = None, contexto: Optional[Dict] = None,
+                                 lines: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Motor de coordenadas: extrae los partidos de una página leyendo la tabla por filas.
+    
+    palabras es el resultado de page.get_text("words"). Las columnas salen de la cabecera
+    (Nº Part, Hora, Categoría, Local, Visitante, Lugar); si la página no repite la cabecera
+    se usan las del contexto (página anterior) y si tampoco hay, se recurre al escáner de
+    líneas con lines. El contexto se actualiza igual que en _escanear_pagina.
+    """
+    filtro = filtro or FILTRO_POR_DEFECTO
+    contexto = contexto if contexto is not None else _nuevo_contexto()
+    filas = _agrupar_filas(palabras)
+    textos = [" ".join(w[4] for w in ws) for _, _, ws in filas]
+    
+    columnas, inicio = contexto['columnas'], 0
+    for k, (_, _, ws) in enumerate(filas):
+        cabecera = _columnas_cabecera(ws)
+        if cabecera:
+            columnas, inicio = cabecera, k + 1
+            break
+    if columnas is None:
+        logger.debug(f"Página {num_pagina+1} sin cabecera de tabla: se usa el escáner de líneas")
+        return _escanear_pagina(lines or [], num_pagina, todos, filtro, contexto)
+    
+    fecha_inicio_jornada = _fecha_inicio_jornada(textos, datetime.now()) or contexto['fecha_inicio']
+    contexto['fecha_inicio'] = fecha_inicio_jornada
+    dia_actual = contexto['dia']
+    filas_partido = []  # [dia, celdas, y de la última fila]
+    for k in range(inicio, len(filas)):
+        y, alto, ws = filas[k]
+        texto = textos[k]
+        cabecera = _columnas_cabecera(ws)
+        if cabecera:
+            # Cabecera repetida (otra tabla en la misma página): puede cambiar las columnas
+            columnas = cabecera
+            filas_partido.append(None)
+            continue
+        celdas = _celdas_fila(ws, columnas)
+        tiene_hora = PATRON_HORA.search(celdas.get('hora', '') + ' ' + celdas.get('categoria', ''))
+        tiene_numero = celdas.get('numero', '').isdigit()
+        
+        # Cabecera de día: fila corta con un día de la semana y sin hora ni número
+        dias_fila = PATRON_DIA_SEMANA.findall(texto) if len(texto) < 40 else []
+        if dias_fila and not tiene_hora and not tiene_numero:
+            d = min(dias_fila, key=DIA_SEMANA_A_NUMERO.get)
+            m = PATRON_FECHA.search(texto)
+            if not m and k + 1 < len(filas) and not PATRON_HORA.search(textos[k+1]):
+                m = PATRON_FECHA.search(textos[k+1])
+            dia_actual = _dia_con_fecha(d, m.group(1) if m else None, fecha_inicio_jornada)
+            filas_partido.append(None)  # Corta la continuación del partido anterior
+            continue
+        
+        anterior = filas_partido[-1] if filas_partido else None
+        ambos_codigos = all(PATRON_CODIGO.search(celdas.get(c, '')) for c in ('local', 'visitante'))
+        if tiene_numero or tiene_hora or (ambos_codigos and anterior is None):
+            filas_partido.append([dia_actual, celdas, y])
+        elif anterior is not None and y - anterior[2] < alto * 2 and not ({'numero', 'hora'} & celdas.keys()):
+            # Continuación: un nombre largo que ocupa dos líneas dentro de la celda
+            for columna, valor in celdas.items():
+                anterior[1][columna] = f"{anterior[1][columna]} {valor}" if columna in anterior[1] else valor
+            anterior[2] = y
+        else:
+            filas_partido.append(None)
+    
+    partidos = []
+    for fila in filas_partido:
+        if fila is None:
+            continue
+        dia, celdas, _ = fila
+        local, visitante = celdas.get('local', ''), celdas.get('visitante', '')
+        if not (local and visitante):
+            continue
+        if not todos and not (filtro.coincide(local) or filtro.coincide(visitante)):
+            continue
+        
+        categoria = celdas.get('categoria', '')
+        m = PATRON_HORA.search(celdas.get('hora', '')) or PATRON_HORA.search(categoria)
+        hora = m.group(1) if m else "00:00"
+        categoria = categoria.replace(hora, "").strip()
+        if len(categoria) > 50: categoria = categoria[:50] + "..."
+        
+        partidos.append({
+            'dia': dia,
+            'hora': hora,
+            'categoria': categoria,
+            'local': local,
+            'visitante': visitante,
+            'lugar': celdas.get('lugar', '') or "Desconocido",
+            'origen': f"Página {num_pagina+1}"
+        })
+    
+    contexto['columnas'] = columnas
+    contexto['dia'] = dia_actual
+    return partidos
+
+
+_VERSION_PARSER = None
+_INICIO_PARSER = '# --- Escáner de líneas de las hojas de jornada ---'
+
+
+def version_parser() -> str:
+    """
+    Huella del código que extrae los partidos: la parte de este módulo que va desde el
+    escáner de líneas hasta main() (escáneres, motores, extracción por páginas),
+    ScraperBaloncesto._recopilar_partidos, partido.py y la versión de PyMuPDF.
+    Un cambio en el parser invalida la caché de extracción sin tener que acordarse de
+    subir un número de versión a mano; uno en el log, Calendar o la CLI, no.
+    """
+    global _VERSION_PARSER
+    if _VERSION_PARSER is None:
+        import hashlib
+        import inspect
+        fuente = Path(__file__).read_text(encoding='utf-8')
+        huella = hashlib.sha256()
+        huella.update(fuente[fuente.index(_INICIO_PARSER):fuente.index('\ndef main(')].encode('utf-8'))
+        huella.update(inspect.getsource(ScraperBaloncesto._recopilar_partidos).encode('utf-8'))
+        huella.update(Path(inspect.getsourcefile(FiltroEquipos)).read_bytes())
+        huella.update(fitz.VersionBind.encode())
+        _VERSION_PARSER = huella.hexdigest()[:16]
+    return _VERSION_PARSER
+
+
+# --- Extracción por páginas, en serie o en un pool de procesos ---
+# La parte cara es la extracción de texto de PyMuPDF. Cada tarea del pool lee y
+# escanea una página sin conocer las anteriores; _fusionar_paginas reconstruye
+# después, en orden, el mismo resultado que la pasada en serie.
+
+def _lineas_pagina(page) -> List[str]:
+    """Líneas de texto no vacías de la página."""
+    return [l.strip() for l in page.get_text().split('\n') if l.strip()]
+
+
+def _leer_pagina(page, motor: str, filtro: Optional[FiltroEquipos] = None) -> Dict:
+    """
+    Extrae de la página lo que necesita el motor. El de coordenadas solo pide también
+    las líneas (para recurrir al escáner de líneas) si la página no tiene cabecera.
+    
+    Con filtro (motor de líneas), la página cuyo texto no menciona ningún equipo se
+    salta: no se parte en líneas ni se escanea, solo se guarda su texto para que
+    _avanzar_contexto mantenga el día y el rango de fechas.
+    """
+    if motor == 'coordenadas':
+        palabras = page.get_text("words")
+        # Basta con agrupar en filas las palabras que pueden ser etiquetas de la cabecera
+        etiquetas = [w for w in palabras if w[4].lower().strip(':.') in _CABECERA_COLUMNAS]
+        tiene_cabecera = any(_columnas_cabecera(ws) for _, _, ws in _agrupar_filas(etiquetas))
+        return {'palabras': palabras, 'lineas': None if tiene_cabecera else _lineas_pagina(page)}
+    texto = page.get_text()
+    if filtro is not None and not filtro.patron.search(texto):
+        return {'texto': texto}
+    return {'lineas': [l.strip() for l in texto.split('\n') if l.strip()]}
+
+
+def _avanzar_contexto(texto: str, contexto: Dict) -> None:
+    """
+    Actualiza el contexto con una página saltada por el prefiltro, igual que si se
+    hubiera escaneado: rango de fechas de sus primeras líneas y último día en curso.
+    Solo recorre el principio y el final de la página.
+    """
+    crudas = texto.split('\n')
+    
+    primeras = []
+    for line in crudas:
+        line = line.strip()
+        if line:
+            primeras.append(line)
+            if len(primeras) == 30:
+                break
+    fecha_inicio_jornada = _fecha_inicio_jornada(primeras, datetime.now()) or contexto['fecha_inicio']
+    contexto['fecha_inicio'] = fecha_inicio_jornada
+    
+    # Desde el final: la primera cabecera de día que aparezca es la que sigue en curso
+    siguientes = deque(maxlen=_MAX_LINEAS_FECHA)  # Líneas (no vacías) justo debajo de la cabecera
+    for line in reversed(crudas):
+        line = line.strip()
+        if not line:
+            continue
+        encontrados = PATRON_DIA_SEMANA.findall(line) if len(line) < 40 else None
+        if encontrados:
+            d = min(encontrados, key=DIA_SEMANA_A_NUMERO.get)
+            fecha_extraida = None
+            for candidata in [line, *reversed(siguientes)]:
+                m = PATRON_FECHA.search(candidata)
+                if m:
+                    fecha_extraida = m.group(1)
+                    break
+            contexto['dia'] = _dia_con_fecha(d, fecha_extraida, fecha_inicio_jornada)
+            return
+        siguientes.append(line)
+
+
+def _escanear_material(material: Dict, num_pagina: int, todos: bool, filtro: FiltroEquipos,
+                       motor: str, contexto: Dict) -> List[Dict]:
+    """Escanea una página ya leída (ver _leer_pagina) con el motor indicado."""
+    if 'texto' in material:
+        # Página saltada por el prefiltro: no puede tener partidos de los equipos
+        _avanzar_contexto(material['texto'], contexto)
+        return []
+    if motor == 'coordenadas':
+        return _escanear_pagina_coordenadas(material['palabras'], num_pagina, todos, filtro, contexto, material['lineas'])
+    return _escanear_pagina(material['lineas'], num_pagina, todos, filtro, contexto)
+
+
+# Tareas por proceso del pool (cada tarea es un bloque de páginas consecutivas)
+_BLOQUES_POR_PROCESO = 4
+
+
+def _procesar_paginas(pdf_path: Path, paginas: range, todos: bool, filtro: FiltroEquipos, motor: str) -> List[Dict]:
+    """
+    Tarea del pool de procesos: lee y escanea cada página del bloque sin contexto de
+    las anteriores. Los partidos previos al primer día de cada página quedan con dia=None.
+    """
+    resultados = []
+    with fitz.open(pdf_path) as doc:
+        for num_pagina in paginas:
+            material = _leer_pagina(doc[num_pagina], motor, None if todos else filtro)
+            contexto = {'dia': None, 'fecha_inicio': None, 'columnas': None}
+            partidos = _escanear_material(material, num_pagina, todos, filtro, motor, contexto)
+            resultados.append({'material': material, 'partidos': partidos, 'contexto': contexto})
+    return resultados
+
+
+def _fusionar_paginas(resultados: List[Dict], todos: bool, filtro: FiltroEquipos, motor: str) -> List[List[Dict]]:
+    """
+    Une en orden de página los resultados de _procesar_paginas de un PDF, pasando el
+    contexto de una página a la siguiente como en la extracción en serie:
+    - los partidos sin día heredan el día en curso de la página anterior;
+    - si a la página le faltaba un rango de fechas o una cabecera propios y el contexto
+      sí los tiene, se vuelve a escanear con el texto ya leído (sin abrir el PDF).
+    """
+    contexto = _nuevo_contexto()
+    por_pagina = []
+    for num_pagina, r in enumerate(resultados):
+        salida = r['contexto']
+        hereda = (salida['fecha_inicio'] is None and contexto['fecha_inicio'] is not None) or \
+                 (motor == 'coordenadas' and salida['columnas'] is None and contexto['columnas'] is not None)
+        if hereda:
+            partidos = _escanear_material(r['material'], num_pagina, todos, filtro, motor, contexto)
+        else:
+            partidos = r['partidos']
+            for p in partidos:
+                if p['dia'] is None:
+                    p['dia'] = contexto['dia']
+            contexto['fecha_inicio'] = salida['fecha_inicio'] or contexto['fecha_inicio']
+            contexto['columnas'] = salida['columnas'] or contexto['columnas']
+            if salida['dia'] is not None:
+                contexto['dia'] = salida['dia']
+        por_pagina.append(partidos)
+    return por_pagina
 
 
 def main():
     """Función principal"""
     try:
+        import os
         scraper = ScraperBaloncesto()
-        pdfs_generados = scraper.ejecutar()
+        # Ruta del fichero .prom para el textfile collector de node_exporter (opcional)
+        if os.getenv('METRICAS_PROMETHEUS'):
+            scraper.ruta_metricas_prometheus = Path(os.getenv('METRICAS_PROMETHEUS'))
+        forzar = os.getenv('FORZAR_EJECUCION', '').lower() in ('1', 'true', 'si', 'sí')
+        pdfs_generados = scraper.ejecutar(forzar=forzar)
         
+        if scraper.listado_sin_cambios:
+            print("\n✔️ Sin cambios en la federación desde la última ejecución")
         if pdfs_generados:
             print(f"\n✅ ¡Éxito! Se generaron {len(pdfs_generados)} archivos PDF:")
             for pdf in pdfs_generados:
                 print(f"   📄 {pdf}")
             print(f"   (También se generó un archivo Excel global)")
-        else:
+        elif not scraper.listado_sin_cambios:
             print("\n❌ No se pudo completar el proceso")
             
     except Exception as e:
@@ -11,11 +11,13 @@ import logging
 import os
 import re
 import sys
-from datetime import datetime, timedelta
 
 import fitz  # PyMuPDF
 import requests
 
+from partido import partido_vigente
+from almacen_partidos import AlmacenPartidos, RUTA_ALMACEN
+
 logging.basicConfig(
     filename="scraper.log",
     level=logging.INFO,
@@ -101,20 +103,7 @@ def formatear_mensaje(partidos: list, hay_cambios: bool) -> str:
 
 def _es_partido_vigente(p: dict) -> bool:
     """Filtra partidos pasados (más de 2h después del inicio). Igual que en el scraper."""
-    try:
-        match_fecha = re.search(r'(\d{1,2}/\d{1,2}/\d{2,4})', p.get('dia', ''))
-        match_hora = re.search(r'(\d{1,2}):(\d{2})', p.get('hora', ''))
-        if match_fecha and match_hora:
-            partes = match_fecha.group(1).split('/')
-            if len(partes[2]) == 2:
-                partes[2] = "20" + partes[2]
-            d, m, a = int(partes[0]), int(partes[1]), int(partes[2])
-            h, mi = int(match_hora.group(1)), int(match_hora.group(2))
-            fecha_fin = datetime(a, m, d, h, mi) + timedelta(hours=2)
-            return datetime.now() < fecha_fin
-    except Exception:
-        pass
-    return True
+    return partido_vigente(p)
 
 
 def _detectar_cambios_en_log(ruta_log: str = "scraper.log") -> bool:
@@ -188,15 +177,22 @@ def enviar_telegram() -> None:
             logging.error("❌ Telegram: faltan TELEGRAM_BOT_TOKEN o TELEGRAM_CHAT_ID")
             return
 
-        # Leer partidos desde disco
-        try:
-            with open("partidos_anteriores.json", encoding="utf-8") as f:
-                partidos = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logging.error(f"❌ Telegram: no se pudo leer partidos_anteriores.json — {e}")
-            partidos = []
+        # Leer partidos vigentes desde disco: almacén SQLite o, si no existe, el JSON exportado
+        partidos = []
+        if RUTA_ALMACEN.exists():
+            try:
+                with AlmacenPartidos(RUTA_ALMACEN) as almacen:
+                    partidos = almacen.vigentes()
+            except Exception as e:
+                logging.error(f"❌ Telegram: no se pudo leer {RUTA_ALMACEN} — {e}")
+        else:
+            try:
+                with open("partidos_anteriores.json", encoding="utf-8") as f:
+                    partidos = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError) as e:
+                logging.error(f"❌ Telegram: no se pudo leer partidos_anteriores.json — {e}")
+            partidos = [p for p in partidos if _es_partido_vigente(p)]
 
-        partidos = [p for p in partidos if _es_partido_vigente(p)]
         hay_cambios = _detectar_cambios_en_log()
         texto = formatear_mensaje(partidos, hay_cambios)
 
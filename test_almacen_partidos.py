@@ -0,0 +1,110 @@
+# test_almacen_partidos.py
+import json
+from datetime import datetime, timedelta
+
+
+class TestAlmacenPartidos:
+    def test_upsert_y_versiones(self, partido, tmp_path):
+        from almacen_partidos import AlmacenPartidos
+        from partido import id_estable
+
+        with AlmacenPartidos(tmp_path / "partidos.db") as almacen:
+            assert almacen.vacio()
+            almacen.guardar_ejecucion([partido()])
+            almacen.guardar_ejecucion([partido()])  # Sin cambios: misma versión
+            almacen.guardar_ejecucion([partido(hora="20:00", jornada_tipo="DEFINITIVA")])
+
+            activos = almacen.activos()
+            versiones = almacen.versiones(id_estable(partido()))
+
+        assert len(activos) == 1 and activos[0]["hora"] == "20:00"
+        assert [(v["version"], v["hora"]) for v in versiones] == [(1, "18:00"), (2, "20:00")]
+
+    def test_partidos_que_desaparecen_quedan_inactivos(self, partido, tmp_path):
+        from almacen_partidos import AlmacenPartidos
+
+        otro = partido(visitante="CB Telde (35002857)")
+        with AlmacenPartidos(tmp_path / "partidos.db") as almacen:
+            almacen.guardar_ejecucion([partido(), otro])
+            almacen.guardar_ejecucion([otro])
+
+            assert [p["visitante"] for p in almacen.activos()] == ["CB Telde (35002857)"]
+            # El partido sigue en el histórico aunque ya no esté activo
+            assert almacen.conexion.execute("SELECT COUNT(*) FROM partidos").fetchone()[0] == 2
+
+    def test_partidos_de_hojas_sin_leer_siguen_activos(self, partido, tmp_path):
+        from almacen_partidos import AlmacenPartidos
+
+        otra_hoja = partido(visitante="CB Telde (35002857)", hoja="Jornada 26 (23-29 Mar) PROVISIONAL")
+        with AlmacenPartidos(tmp_path / "partidos.db") as almacen:
+            almacen.guardar_ejecucion([partido(), otra_hoja])
+            almacen.guardar_ejecucion([partido(hora="20:00")], hojas_sin_leer=[otra_hoja["hoja"]])
+
+            activos = {p["visitante"]: p for p in almacen.activos()}
+
+        assert set(activos) == {"Gran Canaria B (35004700)", "CB Telde (35002857)"}
+        assert activos["Gran Canaria B (35004700)"]["hora"] == "20:00"
+
+    def test_consultas_por_club_categoria_y_fecha(self, partido, tmp_path):
+        from almacen_partidos import AlmacenPartidos
+        from partido import ZONA_CANARIAS
+
+        pasado = partido(dia="Sábado 14/03/26", visitante="CB Telde (35002857)")
+        sin_fecha = partido(dia="Domingo", categoria="Cadete Fem", visitante="CB Moya (35000011)")
+        with AlmacenPartidos(tmp_path / "partidos.db") as almacen:
+            almacen.guardar_ejecucion([partido(), pasado, sin_fecha])
+            ahora = datetime(2026, 3, 20, 12, 0, tzinfo=ZONA_CANARIAS)
+
+            assert len(almacen.de_club("35008831")) == 3
+            assert [p["visitante"] for p in almacen.de_club("35002857")] == ["CB Telde (35002857)"]
+            assert len(almacen.de_categoria("Senior Masc S-A")) == 2
+            assert [p["dia"] for p in almacen.vigentes(ahora=ahora)] == ["Sábado 21/03/26", "Domingo"]
+            assert len(almacen.vigentes(margen=timedelta(days=7), ahora=ahora)) == 3
+
+    def test_inicio_con_zona_horaria(self, partido, tmp_path):
+        from almacen_partidos import AlmacenPartidos
+        from partido import Partido
+
+        with AlmacenPartidos(tmp_path / "partidos.db") as almacen:
+            almacen.guardar_ejecucion([partido()])
+            leido = almacen.activos()[0]
+
+        assert leido == Partido.desde_dict(partido())
+        assert leido.inicio == Partido.desde_dict(partido()).inicio
+
+    def test_importar_y_exportar_json(self, partido, tmp_path):
+        from almacen_partidos import AlmacenPartidos
+
+        snapshot = tmp_path / "partidos_anteriores.json"
+        snapshot.write_text(json.dumps([partido()]), encoding="utf-8")
+
+        with AlmacenPartidos(tmp_path / "partidos.db") as almacen:
+            assert almacen.importar_json(snapshot) == 1
+            assert almacen.importar_json(tmp_path / "no_existe.json") == 0
+            almacen.exportar_json(tmp_path / "export.json")
+
+        exportado = json.loads((tmp_path / "export.json").read_text(encoding="utf-8"))
+        assert exportado[0]["hora"] == "18:00"
+        assert exportado[0]["inicio"].startswith("2026-03-21T18:00")
+
+    def test_procedencia_de_jornadas(self, partido, tmp_path):
+        """Por hoja de jornada, no por la página del PDF ('origen' se repite en todas las hojas)."""
+        from almacen_partidos import AlmacenPartidos
+
+        definitiva = "Jornada 24 (09-15 Mar) DEFINITIVA"
+        partidos = [
+            partido(),
+            partido(visitante="CB Telde (35002857)", origen="Página 2"),
+            partido(dia="Sábado 14/03/26", origen="Página 1", jornada_tipo="DEFINITIVA", hoja=definitiva),
+        ]
+        with AlmacenPartidos(tmp_path / "partidos.db") as almacen:
+            almacen.guardar_ejecucion(partidos)
+            filas = almacen.conexion.execute(
+                "SELECT hoja, jornada_tipo, partidos FROM jornadas ORDER BY hoja").fetchall()
+            hojas = {p["visitante"]: p["hoja"] for p in almacen.activos()}
+
+        assert [tuple(f) for f in filas] == [
+            (definitiva, "DEFINITIVA", 1),
+            ("Jornada 25 (16-22 Mar) PROVISIONAL", "PROVISIONAL", 2),
+        ]
+        assert hojas["CB Telde (35002857)"] == "Jornada 25 (16-22 Mar) PROVISIONAL"
@@ -0,0 +1,360 @@
+# test_calendario_google.py
+import json
+
+import pytest
+
+
+def error_http(estado, motivo=""):
+    import httplib2
+    from googleapiclient.errors import HttpError
+
+    contenido = json.dumps({"error": {"code": estado, "errors": [{"reason": motivo}]}}).encode()
+    return HttpError(httplib2.Response({"status": str(estado)}), contenido)
+
+
+class ServicioFalso:
+    """Lo justo de la API de Calendar para enviar_plan: events() y peticiones batch."""
+
+    def __init__(self, fallos=None):
+        # {descripción del evento: [errores a devolver en los sucesivos intentos]}
+        self.fallos = fallos or {}
+        self.lotes = []
+        self.aplicadas = []
+
+    def events(self):
+        return self
+
+    def _peticion(self, verbo, **kwargs):
+        return {"verbo": verbo, **kwargs}
+
+    def insert(self, **kwargs):
+        return self._peticion("insert", **kwargs)
+
+    def update(self, **kwargs):
+        return self._peticion("update", **kwargs)
+
+    def delete(self, **kwargs):
+        return self._peticion("delete", **kwargs)
+
+    def new_batch_http_request(self, callback):
+        servicio = self
+
+        class Lote:
+            def __init__(self):
+                self.peticiones = []
+
+            def add(self, peticion, request_id):
+                self.peticiones.append((request_id, peticion))
+
+            def execute(self):
+                servicio.lotes.append(len(self.peticiones))
+                for request_id, peticion in self.peticiones:
+                    clave = (peticion.get("body") or {}).get("summary") or peticion.get("eventId")
+                    errores = servicio.fallos.get(clave) or []
+                    if errores:
+                        callback(request_id, None, errores.pop(0))
+                    else:
+                        servicio.aplicadas.append(clave)
+                        callback(request_id, {}, None)
+
+        return Lote()
+
+
+def altas(n):
+    from calendario_google import Operacion
+
+    return [Operacion("insert", cuerpo={"summary": f"Partido {i}"}, descripcion=f"Partido {i}") for i in range(n)]
+
+
+@pytest.fixture(autouse=True)
+def sin_esperas(monkeypatch):
+    """Los reintentos no esperan de verdad."""
+    import calendario_google
+
+    monkeypatch.setattr(calendario_google, "ESPERA_BASE", 0)
+
+
+class TestEnviarPlan:
+    def test_lotes_de_50(self):
+        from calendario_google import enviar_plan
+
+        servicio = ServicioFalso()
+        resultado = enviar_plan(servicio, "cal", altas(120))
+
+        assert servicio.lotes == [50, 50, 20]
+        assert resultado.lotes == 3 and resultado.contar("insert") == 120
+        assert not resultado.fallidas
+
+    def test_reintenta_solo_las_fallidas_por_cuota(self):
+        from calendario_google import enviar_plan
+
+        servicio = ServicioFalso({"Partido 1": [error_http(403, "rateLimitExceeded")],
+                                  "Partido 2": [error_http(503)]})
+        resultado = enviar_plan(servicio, "cal", altas(3))
+
+        assert servicio.lotes == [3, 2]
+        assert sorted(servicio.aplicadas) == ["Partido 0", "Partido 1", "Partido 2"]
+        assert resultado.reintentos == 2 and not resultado.fallidas
+
+    def test_error_permanente_no_se_reintenta(self):
+        from calendario_google import enviar_plan
+
+        servicio = ServicioFalso({"Partido 0": [error_http(400, "invalid")] * 3})
+        resultado = enviar_plan(servicio, "cal", altas(2))
+
+        assert servicio.lotes == [2]
+        assert [op.descripcion for op, _ in resultado.fallidas] == ["Partido 0"]
+
+    def test_borrar_evento_inexistente_cuenta_como_hecho(self):
+        from calendario_google import Operacion, enviar_plan
+
+        servicio = ServicioFalso({"ev1": [error_http(410, "deleted")]})
+        resultado = enviar_plan(servicio, "cal", [Operacion("delete", "ev1", motivo="obsoleto")])
+
+        assert resultado.contar("delete", "obsoleto") == 1
+
+    def test_fallo_del_lote_entero(self):
+        from calendario_google import enviar_plan
+
+        llamadas = []
+
+        def llamar(verbo, lote):
+            llamadas.append(verbo)
+            if len(llamadas) == 1:
+                raise ConnectionError("red caída")
+            return lote.execute()
+
+        resultado = enviar_plan(ServicioFalso(), "cal", altas(4), llamar=llamar)
+
+        assert llamadas == ["batch", "batch"]
+        assert resultado.contar("insert") == 4 and resultado.reintentos == 4
+
+
+class TestErroresReintentables:
+    def test_403_solo_por_cuota(self):
+        from calendario_google import es_reintentable
+
+        assert es_reintentable(error_http(403, "userRateLimitExceeded"))
+        assert not es_reintentable(error_http(403, "forbidden"))
+        assert es_reintentable(error_http(429))
+        assert es_reintentable(TimeoutError())
+
+
+class ListadoFalso:
+    """events().list con respuestas preparadas; anota los parámetros de cada llamada."""
+
+    def __init__(self, *respuestas):
+        self.respuestas = list(respuestas)
+        self.llamadas = []
+
+    def events(self):
+        return self
+
+    def list(self, **parametros):
+        listado = self
+
+        class Peticion:
+            def execute(self):
+                listado.llamadas.append(parametros)
+                respuesta = listado.respuestas.pop(0)
+                if isinstance(respuesta, Exception):
+                    raise respuesta
+                return respuesta
+
+        return Peticion()
+
+
+def evento(eid, partido_id=None, inicio="2100-03-20T18:00:00+00:00", **extra):
+    datos = {"id": eid, "summary": eid, "start": {"dateTime": inicio}, **extra}
+    if partido_id:
+        datos["extendedProperties"] = {"private": {"partido_id": partido_id}}
+    return datos
+
+
+class TestEspejoCalendar:
+    def test_listado_completo_con_todas_las_paginas(self, tmp_path):
+        from calendario_google import EspejoCalendar
+
+        servicio = ListadoFalso({"items": [evento("e1", "p1")], "nextPageToken": "pag2"},
+                                {"items": [evento("e2", "p2")], "nextSyncToken": "t1"})
+        espejo = EspejoCalendar(tmp_path / "espejo.json", "cal")
+
+        assert espejo.actualizar(servicio) == 2
+        assert servicio.llamadas[1]["pageToken"] == "pag2"
+        assert "syncToken" not in servicio.llamadas[0]
+        assert espejo.sync_token == "t1" and set(espejo.eventos) == {"e1", "e2"}
+
+    def test_incremental_solo_trae_los_cambios(self, tmp_path):
+        from calendario_google import EspejoCalendar
+
+        ruta = tmp_path / "espejo.json"
+        espejo = EspejoCalendar(ruta, "cal")
+        espejo.actualizar(ListadoFalso({"items": [evento("e1", "p1"), evento("e2", "p2")], "nextSyncToken": "t1"}))
+        espejo.guardar()
+
+        servicio = ListadoFalso({"items": [{"id": "e1", "status": "cancelled"}, evento("e3", "p3")],
+                                 "nextSyncToken": "t2"})
+        espejo = EspejoCalendar(ruta, "cal")
+        espejo.actualizar(servicio)
+
+        assert servicio.llamadas[0]["syncToken"] == "t1"
+        assert set(espejo.eventos) == {"e2", "e3"} and espejo.sync_token == "t2"
+
+    def test_token_caducado_vuelve_a_listar_todo(self, tmp_path):
+        from calendario_google import EspejoCalendar
+
+        espejo = EspejoCalendar(tmp_path / "espejo.json", "cal")
+        espejo.sync_token = "viejo"
+        espejo.eventos = {"borrado": evento("borrado", "p0")}
+        servicio = ListadoFalso(error_http(410, "fullSyncRequired"),
+                                {"items": [evento("e1", "p1")], "nextSyncToken": "nuevo"})
+
+        espejo.actualizar(servicio)
+
+        assert "syncToken" not in servicio.llamadas[1]
+        assert set(espejo.eventos) == {"e1"} and espejo.sync_token == "nuevo"
+
+    def test_otro_calendario_descarta_el_espejo(self, tmp_path):
+        from calendario_google import EspejoCalendar
+
+        espejo = EspejoCalendar(tmp_path / "espejo.json", "cal")
+        espejo.sync_token = "t1"
+        espejo.guardar()
+
+        assert EspejoCalendar(tmp_path / "espejo.json", "otro").sync_token is None
+
+    def test_por_partido_separa_sobrantes_y_pasados(self, tmp_path):
+        from datetime import datetime, timezone
+        from calendario_google import EspejoCalendar
+
+        espejo = EspejoCalendar(tmp_path / "espejo.json", "cal")
+        espejo.eventos = {
+            "e1": evento("e1", "p1", created="2026-01-01"),
+            "e2": evento("e2", "p1", created="2026-02-01"),  # Repetido
+            "e3": evento("e3"),                                # Sin partido_id
+            "e4": evento("e4", "p4", inicio="2020-01-01T10:00:00+00:00"),
+        }
+
+        por_id, sobrantes = espejo.por_partido(datetime(2026, 3, 1, tzinfo=timezone.utc))
+
+        assert {p: e["id"] for p, e in por_id.items()} == {"p1": "e1"}
+        assert sorted(e["id"] for e in sobrantes) == ["e2", "e3"]
+
+    def test_aplicar_operaciones(self, tmp_path):
+        from calendario_google import EspejoCalendar, Operacion
+
+        espejo = EspejoCalendar(tmp_path / "espejo.json", "cal")
+        espejo.eventos = {"e1": evento("e1", "p1")}
+
+        espejo.aplicar([Operacion("delete", "e1"), Operacion("insert", respuesta=evento("e2", "p2"))])
+
+        assert set(espejo.eventos) == {"e2"}
+
+
+PARTIDO = {"dia": "Sábado 20/03/2100", "hora": "18:00", "categoria": "Sen Masc", "local": "CB Valsequillo",
+           "visitante": "CB Telde", "lugar": "Pab Mercadillo", "jornada_tipo": "DEFINITIVA"}
+
+
+class TestPlanificar:
+    def test_mapa_una_entrada_por_partido(self):
+        from calendario_google import id_partido, mapa_partidos
+
+        sin_fecha = dict(PARTIDO, dia=None, local="Otro")
+        mapa = mapa_partidos([PARTIDO, dict(PARTIDO), sin_fecha])
+
+        assert list(mapa) == [id_partido(PARTIDO)]
+        assert mapa[id_partido(PARTIDO)][1].hour == 18
+
+    def test_evento_igual_no_se_toca(self):
+        from calendario_google import cuerpo_evento, mapa_partidos, planificar
+
+        mapa = mapa_partidos([PARTIDO])
+        (pid, (p, inicio)), = mapa.items()
+        existente = dict(cuerpo_evento(p, pid, inicio), id="e1")
+
+        assert planificar(mapa, {pid: existente}) == ([], 1)
+
+        plan, _ = planificar(mapa_partidos([dict(PARTIDO, lugar="Otro pabellón")]), {pid: existente})
+        assert [(op.verbo, op.evento_id) for op in plan] == [("update", "e1")]
+
+    def test_evento_sin_huella_se_compara_por_instante(self):
+        from calendario_google import mapa_partidos, planificar
+
+        mapa = mapa_partidos([PARTIDO])
+        pid = next(iter(mapa))
+        antiguo = {"id": "e1", "summary": "🏀 CB Valsequillo vs CB Telde", "location": "Pab Mercadillo",
+                   "start": {"dateTime": "2100-03-20T18:00:00Z"}}
+
+        assert planificar(mapa, {pid: antiguo}) == ([], 1)
+
+    def test_altas_sobrantes_y_obsoletos(self):
+        from calendario_google import mapa_partidos, planificar
+
+        mapa = mapa_partidos([PARTIDO])
+        eventos = {
+            "viejo": {"id": "e2", "start": {"dateTime": "2100-03-19T10:00:00+00:00"}},
+            "lejano": {"id": "e3", "start": {"dateTime": "2100-04-30T10:00:00+00:00"}},
+        }
+
+        plan, sin_cambios = planificar(mapa, eventos, sobrantes=[{"id": "e9"}])
+
+        assert [(op.verbo, op.evento_id, op.motivo) for op in plan] == [
+            ("delete", "e9", "legacy"), ("insert", None, ""), ("delete", "e2", "obsoleto")]
+        assert plan[1].cuerpo["extendedProperties"]["private"]["huella"]
+
+
+class TestEnvioConcurrente:
+    def test_limitador_reparte_las_fichas(self):
+        from calendario_google import LimitadorTasa
+
+        reloj = [0.0]
+        esperas = []
+
+        def dormir(segundos):
+            esperas.append(segundos)
+
+        limitador = LimitadorTasa(10, capacidad=50, reloj=lambda: reloj[0], dormir=dormir)
+
+        assert limitador.tomar(50) == 0
+        assert limitador.tomar(20) == 2.0   # Faltan 20 fichas a 10 por segundo
+        reloj[0] = 10.0                      # Se reponen (hasta la capacidad)
+        assert limitador.tomar(30) == 0
+        assert esperas == [2.0]
+
+    def test_lotes_en_paralelo_con_conexion_por_hilo(self):
+        import threading
+        from calendario_google import enviar_plan
+
+        servicio = ServicioFalso()
+        conexiones = []
+        hilos_usados = set()
+
+        def nueva_http():
+            conexiones.append(threading.get_ident())
+            return object()
+
+        def llamar(verbo, peticion):
+            hilos_usados.add(threading.get_ident())
+            assert peticion.http is not None
+            return peticion.batch.execute()
+
+        resultado = enviar_plan(servicio, "cal", altas(400), hilos=4, nueva_http=nueva_http, llamar=llamar)
+
+        assert resultado.contar("insert") == 400 and resultado.lotes == 8
+        assert len(conexiones) == len(set(conexiones)) == len(hilos_usados)
+
+    def test_cuota_con_espera_exponencial(self, monkeypatch):
+        import calendario_google
+        from calendario_google import enviar_plan
+
+        monkeypatch.setattr(calendario_google, "ESPERA_BASE", 1.0)
+        monkeypatch.setattr(calendario_google.random, "uniform", lambda a, b: 1.0)
+        cuota = error_http(429, "rateLimitExceeded")
+        servicio = ServicioFalso({"Partido 0": [cuota, cuota, cuota]})
+        esperas = []
+
+        resultado = enviar_plan(servicio, "cal", altas(2), dormir=esperas.append)
+
+        assert esperas == [1.0, 2.0, 4.0]
+        assert resultado.limitadas == 3 and resultado.reintentos == 3 and not resultado.fallidas
+        assert "3 reintentos (3 por cuota)" in resultado.resumen()
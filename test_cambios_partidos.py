@@ -0,0 +1,108 @@
+# test_cambios_partidos.py
+import json
+from datetime import datetime
+
+
+class TestDiferenciar:
+    def test_altas_bajas_y_modificaciones(self, partido):
+        from cambios_partidos import diferenciar
+
+        quitado = partido(visitante="CB Telde (35002857)")
+        nuevo = partido(visitante="CB Moya (35000011)")
+        movido = partido(dia="Domingo 22/03/26", hora="12:00", jornada_tipo="DEFINITIVA")
+
+        eventos = diferenciar([partido(), quitado], [movido, nuevo])
+
+        assert [(e["tipo"], e["partido"]["visitante"]) for e in eventos] == [
+            ("modificado", "Gran Canaria B (35004700)"),
+            ("alta", "CB Moya (35000011)"),
+            ("baja", "CB Telde (35002857)"),
+        ]
+        assert eventos[0]["cambios"] == {
+            "dia": ["Sábado 21/03/26", "Domingo 22/03/26"],
+            "hora": ["18:00", "12:00"],
+            "jornada_tipo": ["PROVISIONAL", "DEFINITIVA"],
+        }
+
+    def test_cambio_de_sufijo_no_es_baja_mas_alta(self, partido):
+        from cambios_partidos import diferenciar
+
+        eventos = diferenciar([partido()], [partido(local="VITO Valsequillo (35008831)", hora="19:00")])
+
+        assert [e["tipo"] for e in eventos] == ["modificado"]
+        assert set(eventos[0]["cambios"]) == {"hora", "local"}
+
+    def test_sin_cambios(self, partido):
+        from cambios_partidos import diferenciar
+
+        assert diferenciar([partido()], [partido(), partido()]) == []
+
+    def test_orden_de_las_hojas_no_crea_eventos(self, partido):
+        """Mismo cruce en la provisional y en la definitiva, en otro orden: ningún evento."""
+        from cambios_partidos import diferenciar
+
+        provisional = partido(hora="18:00")
+        definitiva = partido(hora="19:30", jornada_tipo="DEFINITIVA")
+
+        assert diferenciar([provisional, definitiva], [definitiva, provisional]) == []
+
+
+    def test_hoja_sin_leer_no_crea_bajas_ni_cambios(self, partido):
+        """Una hoja que no se pudo descargar o leer: sus partidos siguen como estaban."""
+        from cambios_partidos import diferenciar
+
+        definitiva = "Jornada 25 (16-22 Mar) DEFINITIVA"
+        otra_hoja = partido(visitante="CB Telde (35002857)", hoja="Jornada 26 (23-29 Mar) PROVISIONAL")
+        movido = partido(hora="19:30", jornada_tipo="DEFINITIVA", hoja=definitiva)
+        anteriores = [partido(), movido, otra_hoja]
+        # Falta la definitiva y la otra hoja: solo queda la provisional, con la hora antigua
+        actuales = [partido()]
+
+        assert [e["tipo"] for e in diferenciar(anteriores, actuales)] == ["modificado", "baja"]
+        assert diferenciar(anteriores, actuales, [definitiva, otra_hoja["hoja"]]) == []
+        # Las hojas que sí se leyeron dan sus bajas
+        assert [(e["tipo"], e["partido"]["visitante"]) for e in diferenciar(anteriores, actuales, [definitiva])] == [
+            ("baja", "CB Telde (35002857)"),
+        ]
+
+
+class TestResumenCambios:
+    def test_formato_del_aviso(self, partido):
+        from cambios_partidos import diferenciar, resumen_cambios
+
+        eventos = diferenciar([partido(jornada_tipo=None)], [partido(hora="19:30", jornada_tipo="DEFINITIVA")])
+
+        assert resumen_cambios(eventos)[0]["cambios"] == ["Hora: 18:00 → 19:30", "Estado: DESCONOCIDO → DEFINITIVA"]
+
+    def test_solo_avisa_bajas_de_partidos_pendientes(self, partido):
+        from cambios_partidos import diferenciar, resumen_cambios
+        from partido import ZONA_CANARIAS
+
+        jugado = partido(dia="Sábado 14/03/26", visitante="CB Telde (35002857)")
+        eventos = diferenciar([partido(), jugado], [partido(visitante="CB Moya (35000011)")])
+        ahora = datetime(2026, 3, 20, tzinfo=ZONA_CANARIAS)
+
+        resumen = resumen_cambios(eventos, ahora=ahora)
+
+        assert [(r["visitante"], r["cambios"]) for r in resumen] == [
+            ("Gran Canaria B (35004700)", ["Partido eliminado de las hojas de jornada"]),
+        ]
+
+
+class TestHistorial:
+    def test_una_linea_por_ejecucion(self, partido, tmp_path):
+        from cambios_partidos import diferenciar, registrar_historial, leer_historial
+        from partido import ZONA_CANARIAS
+
+        ruta = tmp_path / "historial_cambios.jsonl"
+        lunes = datetime(2026, 3, 16, tzinfo=ZONA_CANARIAS)
+        martes = datetime(2026, 3, 17, tzinfo=ZONA_CANARIAS)
+
+        assert registrar_historial(diferenciar([], [partido()]), ruta, fecha=lunes)
+        assert not registrar_historial([], ruta, fecha=martes)
+        registrar_historial(diferenciar([partido()], [partido(hora="20:00")]), ruta, fecha=martes)
+
+        lineas = ruta.read_text(encoding="utf-8").splitlines()
+        assert len(lineas) == 2
+        assert json.loads(lineas[0])["eventos"][0]["tipo"] == "alta"
+        assert [e["eventos"][0]["tipo"] for e in leer_historial(ruta, desde=lunes)] == ["modificado"]
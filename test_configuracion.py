@@ -0,0 +1,24 @@
+# test_configuracion.py
+
+
+class TestCargarEquipos:
+    def test_equipos_tiene_prioridad(self, tmp_path):
+        from configuracion import cargar_equipos
+
+        ruta = tmp_path / "config.ini"
+        ruta.write_text("[FILTRADO]\nequipo = Valsequillo\nequipos = Valsequillo, Agüimes , 35002857\n", encoding="utf-8")
+
+        assert cargar_equipos(ruta) == ["Valsequillo", "Agüimes", "35002857"]
+
+    def test_equipo_unico(self, tmp_path):
+        from configuracion import cargar_equipos
+
+        ruta = tmp_path / "config.ini"
+        ruta.write_text("[FILTRADO]\nequipo = Telde\n", encoding="utf-8")
+
+        assert cargar_equipos(ruta) == ["Telde"]
+
+    def test_sin_fichero_usa_valsequillo(self, tmp_path):
+        from configuracion import cargar_equipos
+
+        assert cargar_equipos(tmp_path / "no_existe.ini") == ["Valsequillo"]
@@ -0,0 +1,75 @@
+# test_escritura_atomica.py
+import pytest
+
+
+class TestEscrituraAtomica:
+    def test_sustituye_sin_dejar_temporales(self, tmp_path):
+        from escritura_atomica import escribir_atomico
+
+        ruta = tmp_path / "docs" / "index.html"
+        escribir_atomico(ruta, "versión 1")
+        escribir_atomico(ruta, "versión 2")
+
+        assert ruta.read_text(encoding="utf-8") == "versión 2"
+        assert [f.name for f in ruta.parent.iterdir()] == ["index.html"]
+
+    def test_error_a_mitad_conserva_el_anterior(self, tmp_path):
+        from escritura_atomica import destino_atomico, escribir_atomico
+
+        ruta = tmp_path / "partidos_anteriores.json"
+        escribir_atomico(ruta, "[1, 2, 3]")
+
+        with pytest.raises(RuntimeError):
+            with destino_atomico(ruta) as tmp:
+                tmp.write_text("[1, 2", encoding="utf-8")
+                raise RuntimeError("corte")
+
+        assert ruta.read_text(encoding="utf-8") == "[1, 2, 3]"
+        assert [f.name for f in tmp_path.iterdir()] == ["partidos_anteriores.json"]
+
+    def test_temporal_conserva_la_extension(self, tmp_path):
+        from escritura_atomica import destino_atomico
+
+        with destino_atomico(tmp_path / "partidos.xlsx") as tmp:
+            assert tmp.suffix == ".xlsx" and tmp.parent == tmp_path
+            tmp.write_bytes(b"x")
+
+    def test_permisos_de_un_fichero_nuevo(self, tmp_path):
+        """Los mismos que un fichero creado con open() (la umask del proceso, no 0600)."""
+        from escritura_atomica import escribir_atomico
+
+        (tmp_path / "referencia.txt").write_text("x")
+        escribir_atomico(tmp_path / "nuevo.txt", "x")
+
+        assert (tmp_path / "nuevo.txt").stat().st_mode == (tmp_path / "referencia.txt").stat().st_mode
+
+    def test_limpiar_temporales(self, tmp_path):
+        from escritura_atomica import abrir_temporal, limpiar_temporales
+
+        (tmp_path / ".index.html.0a1b2c3d.tmp.html").write_text("a medias")
+        (tmp_path / "index.html").write_text("bien")
+        # Descarga de un PDF cortada (mismo esquema de nombres)
+        abrir_temporal(tmp_path / "descarga.part").close()
+        # Ficheros del usuario que se parecen pero no siguen el esquema exacto
+        ajenos = [".env.tmpl", ".config.tmp", ".index.html.abc123.tmp.html", ".datos.json.0a1b2c3d.tmp.csv"]
+        for nombre in ajenos:
+            (tmp_path / nombre).write_text("no tocar")
+
+        assert limpiar_temporales([tmp_path, tmp_path / "no_existe"]) == 2
+        assert sorted(f.name for f in tmp_path.iterdir()) == sorted(ajenos + ["index.html"])
+
+
+class TestMarcaEjecucion:
+    def test_detecta_ejecucion_interrumpida(self, tmp_path):
+        from escritura_atomica import iniciar_marca, finalizar_marca
+
+        marca = tmp_path / ".ejecucion_en_curso"
+
+        assert iniciar_marca(marca) is None
+        finalizar_marca(marca)
+        assert iniciar_marca(marca) is None
+        # Sin finalizar: la siguiente ejecución ve la marca anterior
+        anterior = iniciar_marca(marca)
+        assert anterior is not None and "inicio" in anterior
+        finalizar_marca(marca)
+        assert not marca.exists()
@@ -0,0 +1,49 @@
+# test_manifiesto.py
+
+
+class TestHuellaEntradas:
+    def test_partido_y_diccionario(self):
+        from manifiesto import huella_entradas
+        from partido import Partido
+
+        datos = {"dia": "Sábado 21/03/26", "hora": "18:00", "categoria": "Senior", "local": "A",
+                 "visitante": "B", "lugar": "Pab"}
+
+        assert huella_entradas([Partido.desde_dict(datos)]) == huella_entradas([Partido.desde_dict(datos)])
+        assert huella_entradas([datos], "2026-03-20") != huella_entradas([datos], "2026-03-21")
+
+
+class TestManifiestoEjecucion:
+    def test_reutiliza_si_la_huella_coincide_y_existen_las_salidas(self, tmp_path):
+        from manifiesto import ManifiestoEjecucion
+
+        salida = tmp_path / "PARTIDOS.pdf"
+        salida.write_bytes(b"%PDF")
+        manifiesto = ManifiestoEjecucion(tmp_path / "manifiesto.json", version="v1")
+        manifiesto.registrar("pdf", "abc", [salida])
+        manifiesto.guardar()
+
+        leido = ManifiestoEjecucion(tmp_path / "manifiesto.json", version="v1")
+        assert leido.reutilizables("pdf", "abc") == [salida]
+        assert leido.reutilizables("pdf", "otra") is None
+        assert leido.reutilizables("web", "abc") is None
+
+        salida.unlink()
+        assert leido.reutilizables("pdf", "abc") is None
+
+    def test_otra_version_invalida_todo(self, tmp_path):
+        from manifiesto import ManifiestoEjecucion
+
+        manifiesto = ManifiestoEjecucion(tmp_path / "manifiesto.json", version="v1")
+        manifiesto.registrar("google_calendar", "abc", [])
+        manifiesto.guardar()
+
+        assert ManifiestoEjecucion(tmp_path / "manifiesto.json", version="v1").reutilizables("google_calendar", "abc") == []
+        assert ManifiestoEjecucion(tmp_path / "manifiesto.json", version="v2").reutilizables("google_calendar", "abc") is None
+
+    def test_manifiesto_ilegible(self, tmp_path):
+        from manifiesto import ManifiestoEjecucion
+
+        (tmp_path / "manifiesto.json").write_text("{corrupto")
+
+        assert ManifiestoEjecucion(tmp_path / "manifiesto.json").etapas == {}
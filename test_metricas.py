@@ -0,0 +1,57 @@
+# test_metricas.py
+import json
+
+
+class TestMetricas:
+    def test_contadores_por_etiqueta(self):
+        from metricas import Metricas
+
+        metricas = Metricas()
+        metricas.incrementar("paginas", estado="escaneada")
+        metricas.incrementar("paginas", 2, estado="escaneada")
+        metricas.incrementar("paginas", estado="saltada")
+
+        assert metricas.valor("paginas", estado="escaneada") == 3
+        assert metricas.valor("paginas", estado="otra") == 0
+        assert metricas.total("paginas") == 4
+
+    def test_cronometro_anota_aunque_falle(self):
+        import pytest
+        from metricas import Metricas
+
+        metricas = Metricas()
+        with metricas.cronometro("render_segundos", salida="pdf"):
+            pass
+        with pytest.raises(RuntimeError):
+            with metricas.cronometro("render_segundos", salida="pdf"):
+                raise RuntimeError("fallo")
+
+        suma, n, maximo = metricas.tiempos[("render_segundos", (("salida", "pdf"),))]
+        assert n == 2 and maximo <= suma
+
+    def test_informe_json(self, tmp_path):
+        from metricas import Metricas
+
+        metricas = Metricas()
+        metricas.incrementar("descarga_bytes", 1024, jornada="Jornada 14")
+        metricas.observar("parseo_segundos", 0.5, pdf="abc.pdf")
+
+        datos = json.loads(metricas.exportar_json(tmp_path / "metricas.json").read_text(encoding="utf-8"))
+
+        assert datos["contadores"] == [{"nombre": "descarga_bytes", "etiquetas": {"jornada": "Jornada 14"}, "valor": 1024}]
+        assert datos["tiempos"][0]["segundos"] == 0.5 and datos["tiempos"][0]["n"] == 1
+
+    def test_formato_prometheus(self, tmp_path):
+        from metricas import Metricas
+
+        metricas = Metricas()
+        metricas.incrementar("calendar_llamadas", verbo="insert")
+        metricas.incrementar("calendar_llamadas", 3, verbo="list")
+        metricas.observar("descarga_segundos", 1.25, jornada='Jornada "14"')
+
+        texto = metricas.exportar_prometheus(tmp_path / "scraper.prom").read_text(encoding="utf-8")
+
+        assert texto.count("# TYPE scraper_baloncesto_calendar_llamadas_total counter") == 1
+        assert 'scraper_baloncesto_calendar_llamadas_total{verbo="list"} 3' in texto
+        assert 'scraper_baloncesto_descarga_segundos_sum{jornada="Jornada \\"14\\""} 1.250000' in texto
+        assert 'scraper_baloncesto_descarga_segundos_count{jornada="Jornada \\"14\\""} 1' in texto
@@ -0,0 +1,201 @@
+# test_partido.py
+
+
+class TestClavePartido:
+    def test_es_hashable_e_ignora_espacios(self, partido):
+        from partido import clave_partido
+
+        assert clave_partido(partido()) == clave_partido(partido(local=" CB Valsequillo (35008831) "))
+        assert len({clave_partido(partido()), clave_partido(partido())}) == 1
+
+    def test_ignora_lugar_y_origen(self, partido):
+        from partido import clave_partido
+
+        assert clave_partido(partido(lugar="Otro", origen="Página 2")) == clave_partido(partido())
+
+    def test_distingue_hora(self, partido):
+        from partido import clave_partido
+
+        assert clave_partido(partido(hora="19:00")) != clave_partido(partido())
+
+
+class TestDeduplicarPartidos:
+    def test_conserva_orden_de_aparicion(self, partido):
+        from partido import deduplicar_partidos
+
+        a, b = partido(hora="10:00"), partido(hora="12:00")
+        assert deduplicar_partidos([a, b, dict(a)]) == [a, b]
+
+    def test_definitiva_gana_a_provisional(self, partido):
+        from partido import deduplicar_partidos
+
+        prov = partido(jornada_tipo="PROVISIONAL")
+        defi = partido(jornada_tipo="DEFINITIVA")
+
+        resultado = deduplicar_partidos([prov, defi])
+
+        assert len(resultado) == 1
+        assert resultado[0]["jornada_tipo"] == "DEFINITIVA"
+
+    def test_provisional_no_sustituye_a_definitiva(self, partido):
+        from partido import deduplicar_partidos
+
+        defi = partido(jornada_tipo="DEFINITIVA")
+
+        assert deduplicar_partidos([defi, partido(jornada_tipo="PROVISIONAL")]) == [defi]
+
+
+class TestIndiceLiga:
+    def test_indexa_por_club_categoria_y_lugar(self, partido):
+        from partido import IndiceLiga
+
+        indice = IndiceLiga()
+        indice.agregar(partido(categoria="78270 Senior Masc S-A"))
+        indice.agregar(partido(local="Otro (35000001)", hora="20:00"))
+
+        assert len(indice.de_club("35004700")) == 2
+        assert len(indice.de_club("35008831")) == 1
+        assert len(indice.de_categoria("Senior Masc S-A")) == 2
+        assert len(indice.en_lugar("Pab Municipal Valsequillo")) == 2
+
+    def test_no_indexa_repetidos(self, partido):
+        from partido import IndiceLiga
+
+        indice = IndiceLiga()
+
+        assert indice.agregar(partido()) is True
+        assert indice.agregar(partido()) is False
+        assert len(indice.partidos) == 1
+
+    def test_a_dict_serializable(self, partido):
+        import json
+        from partido import IndiceLiga
+
+        indice = IndiceLiga()
+        indice.agregar(partido())
+
+        datos = json.loads(json.dumps(indice.a_dict()))
+        assert datos["por_club"]["35008831"] == [0]
+
+
+class TestFiltroEquipos:
+    def test_nombres_y_codigos(self):
+        from partido import FiltroEquipos
+
+        filtro = FiltroEquipos(["Valsequillo", "35002857"])
+
+        assert filtro.coincide("VITO VALSEQUILLO (35008831)")
+        assert filtro.coincide("CB Telde (35002857)")
+        assert not filtro.coincide("CB Gáldar (35001111)")
+        # Un código solo coincide entre paréntesis, no como parte de otro número
+        assert not filtro.coincide("Partido 350028571")
+
+    def test_equipos_en_y_repartir(self, partido):
+        from partido import FiltroEquipos
+
+        filtro = FiltroEquipos(["Valsequillo", "Gran Canaria"])
+        derbi = partido()
+        otro = partido(visitante="CB Telde (35002857)")
+
+        assert filtro.equipos_en(derbi["local"] + derbi["visitante"]) == ["Valsequillo", "Gran Canaria"]
+        assert filtro.repartir([derbi, otro]) == {"Valsequillo": [derbi, otro], "Gran Canaria": [derbi]}
+
+    def test_sin_equipos(self):
+        import pytest
+        from partido import FiltroEquipos
+
+        with pytest.raises(ValueError):
+            FiltroEquipos([" ", ""])
+
+
+class TestPartido:
+    def test_inicio_con_anio_de_2_y_4_cifras(self, partido):
+        from datetime import datetime
+        from partido import Partido, ZONA_CANARIAS
+
+        corto = Partido(**partido(dia="Sábado 21/03/26", hora="18:30"))
+        largo = Partido(**partido(dia="Sábado 21/03/2026", hora="18:30"))
+
+        assert corto.inicio == largo.inicio == datetime(2026, 3, 21, 18, 30, tzinfo=ZONA_CANARIAS)
+        assert corto.inicio.utcoffset() is not None
+
+    def test_sin_fecha_no_tiene_inicio(self, partido):
+        from partido import Partido
+
+        assert Partido(**partido(dia="Desconocido")).inicio is None
+
+    def test_acceso_como_diccionario(self, partido):
+        from partido import Partido
+
+        p = Partido(**partido(jornada_tipo=None))
+
+        assert p["local"] == "CB Valsequillo (35008831)"
+        assert "jornada_tipo" not in p and p.get("jornada_tipo") is None
+        p["jornada_tipo"] = "DEFINITIVA"
+        assert dict(p)["jornada_tipo"] == "DEFINITIVA"
+
+    def test_cambiar_hora_recalcula_inicio(self, partido):
+        from partido import Partido
+
+        p = Partido(**partido(hora="18:00"))
+        p["hora"] = "20:15"
+
+        assert (p.inicio.hour, p.inicio.minute) == (20, 15)
+
+    def test_ida_y_vuelta_json(self, partido):
+        import json
+        from partido import Partido
+
+        p = Partido(**partido(origen="hoja.pdf", jornada_tipo="PROVISIONAL"))
+        copia = Partido.desde_dict(json.loads(json.dumps(p.a_dict())))
+
+        assert copia == p
+        assert copia.inicio == p.inicio
+
+    def test_partido_vigente(self, partido):
+        from datetime import datetime, timedelta
+        from partido import partido_vigente, ZONA_CANARIAS
+
+        p = partido(dia="Sábado 21/03/26", hora="18:00")
+        a_las = lambda h, mi=0: datetime(2026, 3, 21, h, mi, tzinfo=ZONA_CANARIAS)
+
+        assert partido_vigente(p, ahora=a_las(19, 59))
+        assert not partido_vigente(p, ahora=a_las(20, 0))
+        assert partido_vigente(p, margen=timedelta(hours=12), ahora=a_las(23))
+        assert partido_vigente(partido(dia="Sábado"))
+
+
+class TestIdEstable:
+    def test_no_cambia_con_fecha_lugar_ni_sufijo(self, partido):
+        from partido import id_estable
+
+        base = id_estable(partido(categoria="78270 Senior Masc S-A"))
+
+        assert id_estable(partido(categoria="81234 Senior Masc S-A", dia="Domingo 22/03/26",
+                                  hora="12:00", lugar="Pab Telde")) == base
+        assert id_estable(partido(local="VITO Valsequillo (35008831)")) == base
+        assert id_estable(partido(categoria="Junior Masc S-B")) != base
+
+    def test_sin_codigo_usa_el_nombre(self, partido):
+        from partido import id_estable
+
+        assert id_estable(partido(visitante="CB  Moya")) == id_estable(partido(visitante="cb moya"))
+
+    def test_indexar_por_id_desambigua_repetidos(self, partido):
+        from partido import indexar_por_id, id_estable
+
+        ida, vuelta = partido(), partido(dia="Sábado 18/04/26")
+
+        assert list(indexar_por_id([ida, vuelta])) == [id_estable(ida), id_estable(ida) + "#2"]
+        # El sufijo va por fecha, no por orden de aparición
+        assert indexar_por_id([vuelta, ida])[id_estable(ida)] is ida
+
+    def test_indexar_por_id_prefiere_la_definitiva(self, partido):
+        """El mismo cruce en la hoja provisional y en la definitiva es un solo partido."""
+        from partido import indexar_por_id, id_estable
+
+        provisional = partido(hora="18:00", jornada_tipo="PROVISIONAL")
+        definitiva = partido(hora="19:30", jornada_tipo="DEFINITIVA")
+
+        for orden in ([provisional, definitiva], [definitiva, provisional]):
+            assert indexar_por_id(orden) == {id_estable(definitiva): definitiva}
@@ -0,0 +1,65 @@
+# test_pipeline.py
+import pytest
+
+
+class TestGrafoEtapas:
+    def test_respeta_dependencias(self):
+        from pipeline import GrafoEtapas
+
+        orden = []
+        grafo = GrafoEtapas()
+        grafo.agregar("email", lambda p, c: orden.append("email") or f"{len(p)} partidos, {c} cambios",
+                      ("partidos", "cambios"))
+        grafo.agregar("cambios", lambda p: orden.append("cambios") or 2, ("partidos",))
+
+        resultado = grafo.ejecutar({"partidos": [1, 2, 3]})
+
+        assert orden == ["cambios", "email"]
+        assert resultado.resultados["email"] == "3 partidos, 2 cambios"
+        assert resultado.correcto and set(resultado.tiempos) == {"cambios", "email"}
+
+    def test_etapas_independientes_a_la_vez(self):
+        import threading
+        from pipeline import GrafoEtapas
+
+        # Las dos etapas solo pasan la barrera si están corriendo a la vez
+        barrera = threading.Barrier(2, timeout=5)
+        grafo = GrafoEtapas(max_hilos=2)
+        grafo.agregar("pdf", lambda p: barrera.wait() is not None, ("partidos",))
+        grafo.agregar("web", lambda p: barrera.wait() is not None, ("partidos",))
+
+        assert grafo.ejecutar({"partidos": []}).resultados["pdf"] is True
+
+    def test_fallo_aislado(self):
+        from pipeline import GrafoEtapas
+
+        def falla(partidos):
+            raise RuntimeError("sin espacio")
+
+        grafo = GrafoEtapas()
+        grafo.agregar("pdf", falla, ("partidos",))
+        grafo.agregar("adjuntos", lambda pdf: pdf, ("pdf",))
+        grafo.agregar("web", lambda p: "ok", ("partidos",))
+
+        resultado = grafo.ejecutar({"partidos": []})
+
+        assert resultado.resultados["web"] == "ok"
+        assert str(resultado.errores["pdf"]) == "sin espacio"
+        assert resultado.saltadas == {"adjuntos": "pdf"}
+        assert not resultado.correcto
+
+    def test_grafo_invalido(self):
+        from pipeline import GrafoEtapas
+
+        grafo = GrafoEtapas()
+        grafo.agregar("a", lambda b: b, ("b",))
+        grafo.agregar("b", lambda a: a, ("a",))
+        with pytest.raises(ValueError, match="circulares"):
+            grafo.ejecutar()
+
+        grafo = GrafoEtapas()
+        grafo.agregar("web", lambda x: x, ("no_existe",))
+        with pytest.raises(ValueError, match="no_existe"):
+            grafo.ejecutar()
+        with pytest.raises(ValueError):
+            grafo.agregar("web", lambda: None)
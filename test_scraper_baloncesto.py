@@ -0,0 +1,1072 @@
+# test_scraper_baloncesto.py
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+
+HTML_LISTADO = (
+    b'<a href="/index.php/hojas?download=101:jornada-14">Jornada 14 (05-11 Ene) DEFINITIVA</a>'
+    b'<a href="/index.php/hojas?download=102:jornada-15">Jornada 15 (12-18 Ene) PROVISIONAL</a>'
+)
+
+
+def respuesta(status_code=200, content=b"", headers=None):
+    """Crea una respuesta HTTP falsa al estilo de requests.Response."""
+    resp = MagicMock()
+    resp.status_code = status_code
+    resp.content = content
+    resp.headers = headers or {}
+    resp.iter_content.side_effect = lambda chunk_size=1: (
+        content[i:i + chunk_size] for i in range(0, len(content), chunk_size)
+    )
+    return resp
+
+
+@pytest.fixture(autouse=True)
+def cache_aislada(tmp_path, monkeypatch):
+    """Ningún test escribe en la caché del repositorio."""
+    import scraper_baloncesto
+
+    monkeypatch.setattr(scraper_baloncesto, "CACHE_DIR", tmp_path / "cache")
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    """Scraper con la caché aislada en tmp_path y sin red."""
+    from scraper_baloncesto import ScraperBaloncesto
+
+    monkeypatch.chdir(tmp_path)
+    s = ScraperBaloncesto()
+    s.cache_dir = tmp_path / "cache"
+    s.session.get = MagicMock()
+    return s
+
+
+class TestCacheListado:
+    def test_304_revalida_los_pdfs(self, scraper):
+        """Con el listado en 304 se comprueban los PDFs de las jornadas guardadas (GET condicional)."""
+        scraper.session.get.side_effect = listado_y_pdfs(
+            respuesta(content=PDF_FALSO, headers={"ETag": '"pdf1"'}),
+            respuesta(content=PDF_FALSO + b"v2", headers={"ETag": '"pdf2"'}),
+        )
+        scraper.descargar_pdfs_recientes()
+        scraper.confirmar_cache_listado()
+
+        def get(url, **kwargs):
+            return respuesta(status_code=304)
+        scraper.session.get.side_effect = get
+        pdfs = scraper.descargar_pdfs_recientes()
+
+        assert scraper.listado_sin_cambios is True
+        assert [p["tipo"] for p in pdfs] == ["DEFINITIVA", "PROVISIONAL"] and all(p["sin_cambios"] for p in pdfs)
+        assert llamada_a(scraper.session.get, "download=102").kwargs["headers"]["If-None-Match"] == '"pdf2"'
+
+    def test_envia_validadores_guardados(self, scraper):
+        """El GET del listado lleva If-None-Match / If-Modified-Since de la caché."""
+        scraper.cache_dir.mkdir()
+        (scraper.cache_dir / "listado.json").write_text(
+            json.dumps({"etag": '"v1"', "last_modified": "Mon, 05 Jan 2026 10:00:00 GMT", "jornadas": []}),
+            encoding="utf-8",
+        )
+        scraper.session.get.return_value = respuesta(status_code=304)
+
+        scraper.descargar_pdfs_recientes()
+
+        cabeceras = scraper.session.get.call_args_list[0].kwargs["headers"]
+        assert cabeceras["If-None-Match"] == '"v1"'
+        assert cabeceras["If-Modified-Since"] == "Mon, 05 Jan 2026 10:00:00 GMT"
+
+    def test_mismo_hash_de_enlaces_sin_cambios(self, scraper):
+        """Sin validadores HTTP, los mismos enlaces y los mismos PDFs cuentan como sin cambios."""
+        scraper.session.get.side_effect = listado_y_pdfs(respuesta(content=PDF_FALSO), respuesta(content=PDF_FALSO + b"v2"))
+        scraper.descargar_pdfs_recientes()
+        scraper.confirmar_cache_listado()
+
+        scraper.session.get.reset_mock()
+        scraper.session.get.side_effect = listado_y_pdfs(respuesta(content=PDF_FALSO), respuesta(content=PDF_FALSO + b"v2"))
+
+        assert len(scraper.descargar_pdfs_recientes()) == 2
+        assert scraper.listado_sin_cambios is True
+        assert len(list((scraper.cache_dir / "pdfs").glob("*.pdf"))) == 2
+
+    def test_pdf_sustituido_con_el_mismo_enlace(self, scraper):
+        """La federación cambia el PDF de una jornada sin tocar el listado: se detecta."""
+        import hashlib
+
+        scraper.session.get.side_effect = listado_y_pdfs(respuesta(content=PDF_FALSO), respuesta(content=PDF_FALSO + b"v2"))
+        scraper.descargar_pdfs_recientes()
+        scraper.confirmar_cache_listado()
+
+        scraper.session.get.side_effect = listado_y_pdfs(respuesta(content=PDF_FALSO + b"corregido"),
+                                                         respuesta(content=PDF_FALSO + b"v2"))
+        pdfs = scraper.descargar_pdfs_recientes()
+
+        assert scraper.listado_sin_cambios is False
+        assert pdfs[0]["sha256"] == hashlib.sha256(PDF_FALSO + b"corregido").hexdigest()
+        assert pdfs[0]["sin_cambios"] is False and pdfs[1]["sin_cambios"] is True
+
+    def test_validadores_no_se_guardan_si_falla_la_descarga(self, scraper):
+        """Si ningún PDF se descarga bien, la siguiente ejecución debe reintentar."""
+        scraper.session.get.return_value = respuesta(content=HTML_LISTADO)
+
+        scraper.descargar_pdfs_recientes()
+
+        assert not (scraper.cache_dir / "listado.json").exists()
+        assert scraper.listado_sin_cambios is False
+
+
+PDF_FALSO = b"%PDF-1.4\n% jornada de prueba\n%%EOF\n"
+
+
+def listado_y_pdfs(resp_j14, resp_j15):
+    """side_effect para session.get: responde según la URL (las descargas van en paralelo)."""
+    def get(url, **kwargs):
+        if "download=101" in url:
+            return resp_j14
+        if "download=102" in url:
+            return resp_j15
+        return respuesta(content=HTML_LISTADO)
+    return get
+
+
+def llamada_a(session_get, fragmento_url):
+    """Última llamada a session.get cuya URL contiene el fragmento."""
+    return [c for c in session_get.call_args_list if fragmento_url in c.args[0]][-1]
+
+
+class TestAlmacenPdfs:
+    def test_pdf_guardado_por_hash(self, scraper):
+        """Cada PDF se guarda como cache/pdfs/<sha256>.pdf."""
+        import hashlib
+
+        scraper.session.get.side_effect = listado_y_pdfs(
+            respuesta(content=PDF_FALSO), respuesta(content=PDF_FALSO + b"v2")
+        )
+
+        pdfs = scraper.descargar_pdfs_recientes()
+
+        assert [p["tipo"] for p in pdfs] == ["DEFINITIVA", "PROVISIONAL"]
+        sha = hashlib.sha256(PDF_FALSO).hexdigest()
+        assert pdfs[0]["path"] == scraper.cache_dir / "pdfs" / f"{sha}.pdf"
+        assert pdfs[0]["path"].read_bytes() == PDF_FALSO
+
+    def test_pdf_identico_no_duplica_ficheros(self, scraper):
+        """Dos ejecuciones con el mismo contenido no crean copias nuevas."""
+        scraper.session.get.side_effect = listado_y_pdfs(
+            respuesta(content=PDF_FALSO), respuesta(content=PDF_FALSO + b"v2")
+        )
+        scraper.descargar_pdfs_recientes()
+
+        scraper.session.get.side_effect = listado_y_pdfs(
+            respuesta(content=PDF_FALSO), respuesta(content=PDF_FALSO + b"v2")
+        )
+        pdfs = scraper.descargar_pdfs_recientes()
+
+        assert all(p["sin_cambios"] for p in pdfs)
+        assert len(list((scraper.cache_dir / "pdfs").glob("*.pdf"))) == 2
+
+    def test_304_reutiliza_pdf_cacheado(self, scraper):
+        """Con ETag guardado, un 304 devuelve el PDF del almacén sin descargarlo."""
+        scraper.session.get.side_effect = listado_y_pdfs(
+            respuesta(content=PDF_FALSO, headers={"ETag": '"pdf1"'}),
+            respuesta(content=PDF_FALSO + b"v2"),
+        )
+        primera = scraper.descargar_pdfs_recientes()
+
+        scraper.session.get.side_effect = listado_y_pdfs(
+            respuesta(status_code=304), respuesta(content=PDF_FALSO + b"v2")
+        )
+        segunda = scraper.descargar_pdfs_recientes()
+
+        llamada_pdf = llamada_a(scraper.session.get, "download=101")
+        assert llamada_pdf.kwargs["headers"]["If-None-Match"] == '"pdf1"'
+        assert segunda[0]["path"] == primera[0]["path"]
+        assert segunda[0]["sin_cambios"] is True
+
+    def test_html_de_login_descartado(self, scraper):
+        """Una respuesta que no empieza por %PDF no llega al almacén."""
+        scraper.session.get.side_effect = listado_y_pdfs(
+            respuesta(content=b"<html>login</html>"), respuesta(content=PDF_FALSO)
+        )
+
+        pdfs = scraper.descargar_pdfs_recientes()
+
+        assert len(pdfs) == 1
+        assert pdfs[0]["tipo"] == "PROVISIONAL"
+        assert len(list((scraper.cache_dir / "pdfs").glob("*.pdf"))) == 1
+
+
+class TestDescargaParalela:
+    def test_resultados_en_orden_del_listado(self, scraper):
+        """Aunque la primera jornada tarde más, el resultado sigue el orden del listado."""
+        import time
+
+        def get(url, **kwargs):
+            if "download=101" in url:
+                time.sleep(0.2)
+                return respuesta(content=PDF_FALSO)
+            if "download=102" in url:
+                return respuesta(content=PDF_FALSO + b"v2")
+            return respuesta(content=HTML_LISTADO)
+
+        scraper.session.get.side_effect = get
+
+        pdfs = scraper.descargar_pdfs_recientes()
+
+        assert [p["tipo"] for p in pdfs] == ["DEFINITIVA", "PROVISIONAL"]
+
+    def test_descargas_simultaneas_acotadas(self, scraper):
+        """Nunca hay más descargas en vuelo que max_descargas_paralelas."""
+        import threading
+        import time
+
+        en_vuelo = 0
+        maximo = 0
+        lock = threading.Lock()
+
+        def get(url, **kwargs):
+            nonlocal en_vuelo, maximo
+            if "download=" not in url:
+                return respuesta(content=HTML_LISTADO)
+            with lock:
+                en_vuelo += 1
+                maximo = max(maximo, en_vuelo)
+            time.sleep(0.05)
+            with lock:
+                en_vuelo -= 1
+            return respuesta(content=PDF_FALSO + url.encode())
+
+        scraper.session.get.side_effect = get
+        scraper.max_descargas_paralelas = 1
+
+        assert len(scraper.descargar_pdfs_recientes()) == 2
+        assert maximo == 1
+
+
+class TestDescargaStreaming:
+    def test_html_se_aborta_en_el_primer_bloque(self, scraper):
+        """Una página HTML se rechaza sin leer el resto del cuerpo."""
+        leidos = []
+
+        def bloques(chunk_size=1):
+            for b in [b"<html>", b"x" * 1000, b"y" * 1000]:
+                leidos.append(b)
+                yield b
+
+        html = respuesta()
+        html.iter_content.side_effect = bloques
+        scraper.session.get.side_effect = listado_y_pdfs(html, respuesta(content=PDF_FALSO))
+
+        pdfs = scraper.descargar_pdfs_recientes()
+
+        assert [p["tipo"] for p in pdfs] == ["PROVISIONAL"]
+        assert leidos == [b"<html>"]
+        html.close.assert_called()
+        assert not list((scraper.cache_dir / "pdfs").glob("*.part"))
+
+    def test_cabecera_partida_entre_bloques(self, scraper):
+        """La firma %PDF se valida aunque llegue repartida en varios bloques."""
+        pdf = respuesta()
+        pdf.iter_content.side_effect = lambda chunk_size=1: iter([b"%P", b"DF-1.4\n", b"resto"])
+        scraper.session.get.side_effect = listado_y_pdfs(pdf, respuesta(content=b"nope"))
+
+        pdfs = scraper.descargar_pdfs_recientes()
+
+        assert len(pdfs) == 1
+        assert pdfs[0]["path"].read_bytes() == b"%PDF-1.4\nresto"
+
+    def test_limite_de_tamano(self, scraper, monkeypatch):
+        """Un PDF por encima de MAX_TAMANO_PDF se descarta y no deja temporales."""
+        import scraper_baloncesto
+
+        monkeypatch.setattr(scraper_baloncesto, "MAX_TAMANO_PDF", 10)
+        scraper.session.get.side_effect = listado_y_pdfs(
+            respuesta(content=PDF_FALSO), respuesta(content=b"%PDF")
+        )
+
+        pdfs = scraper.descargar_pdfs_recientes()
+
+        assert [p["tipo"] for p in pdfs] == ["PROVISIONAL"]
+        assert len(list((scraper.cache_dir / "pdfs").iterdir())) == 2  # indice.json + 1 PDF
+
+
+class TestDescargaYExtraccion:
+    def test_extrae_mientras_descarga_y_mantiene_orden(self, scraper):
+        """El PDF rápido se procesa antes de que acabe el lento; el resultado sigue el listado."""
+        import threading
+
+        liberar_j14 = threading.Event()
+        eventos = []
+
+        def get(url, **kwargs):
+            if "download=101" in url:
+                liberar_j14.wait(timeout=5)
+                eventos.append("fin descarga j14")
+                return respuesta(content=PDF_FALSO)
+            if "download=102" in url:
+                return respuesta(content=PDF_FALSO + b"v2")
+            return respuesta(content=HTML_LISTADO)
+
+        def extraer(pdf_path, sha256=None):
+            eventos.append(f"extraer {pdf_path.read_bytes()[-2:]!r}")
+            liberar_j14.set()
+            return [{"local": pdf_path.name}]
+
+        scraper.session.get.side_effect = get
+        scraper.extraer_partidos_pdf = extraer
+
+        resultados = scraper.descargar_y_extraer()
+
+        assert eventos[0] == "extraer b'v2'"
+        assert [info["tipo"] for info, _ in resultados] == ["DEFINITIVA", "PROVISIONAL"]
+        assert all(p["jornada_tipo"] == info["tipo"] for info, ps in resultados for p in ps)
+        assert [p["hoja"] for _, ps in resultados for p in ps] == [
+            "Jornada 14 (05-11 Ene) DEFINITIVA", "Jornada 15 (12-18 Ene) PROVISIONAL"]
+
+
+CABECERA_HOJA = ["HOJA DE JORNADA", "JORNADA 15 (12-18 Ene)", "Nº Part", "Hora", "Categoría", "Local", "Visitante", "Lugar"]
+
+PAGINA_HOJA = CABECERA_HOJA + [
+    "Viernes", "(16/01/26)",
+    "81270", "20:30", "Sen Masc 2ª F G-B",
+    "Vito Valsequillo (35008831)", "Asigna Esbisoni Naranja (35023912)", "Pab Mercadillo Valsequillo",
+    "81271", "19:00", "Junior Fem S-A",
+    "CB Telde (35002857)", "CB Gáldar (35001111)", "Pab Juan Carlos Hernández",
+    "Sábado",
+    "81381", "10:00 Cad Masc S-B",
+    "Ecoener CB Castillo & (35003808)", "Clínica Dental Virmident Valsequillo  (35008840)", "Cdad Dep Vicente del Bosque",
+    "Domingo 18/01/2026",
+    "81390", "11:00", "Inf Masc S-A",
+    "Valsequillo Infantil (35008850)", "CB Agüimes (35000001)", "IES Valsequillo",
+]
+
+
+def crear_hoja_pdf(ruta, paginas):
+    """Crea un PDF con una línea de texto por elemento, como las hojas de la federación."""
+    import fitz
+
+    doc = fitz.open()
+    for lineas in paginas:
+        page = doc.new_page(width=595, height=842)
+        for n, linea in enumerate(lineas):
+            page.insert_text((30, 30 + 11 * n), linea, fontsize=9, fontname="helv")
+    doc.save(ruta)
+    doc.close()
+    return ruta
+
+
+class TestExtraccionPdf:
+    def test_local_visitante_y_fechas(self, tmp_path):
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA])
+
+        partidos = ScraperBaloncesto().extraer_partidos_pdf(pdf)
+
+        assert [(p["dia"], p["hora"], p["local"], p["visitante"]) for p in partidos] == [
+            ("Viernes 16/01/2026", "20:30", "Vito Valsequillo (35008831)", "Asigna Esbisoni Naranja (35023912)"),
+            ("Sábado 17/01/26", "10:00", "Ecoener CB Castillo & (35003808)", "Clínica Dental Virmident Valsequillo  (35008840)"),
+            ("Domingo 18/01/2026", "11:00", "Valsequillo Infantil (35008850)", "CB Agüimes (35000001)"),
+        ]
+        assert partidos[1]["categoria"] == "Cad Masc S-B"
+        assert partidos[2]["lugar"] == "IES Valsequillo"
+        assert partidos[0]["origen"] == "Página 1"
+
+    def test_fecha_calculada_con_rango_entre_meses(self, tmp_path):
+        """Un día sin fecha se calcula a partir del rango '(26 Ene - 01 Feb)' de la cabecera."""
+        from datetime import datetime
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pagina = ["HOJA DE JORNADA", "JORNADA 17 (26 Ene - 01 Feb)", "Domingo",
+                  "91001", "10:30", "Mini", "Rival (35000005)", "Valsequillo Mini (35008898)", "Pab W"]
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [pagina])
+
+        partidos = ScraperBaloncesto().extraer_partidos_pdf(pdf)
+
+        anio = datetime.now().year + (1 if datetime.now().month == 12 else 0)
+        assert partidos[0]["dia"] == f"Domingo 01/02/{anio % 100:02d}"
+        assert partidos[0]["hora"] == "10:30"
+        assert partidos[0]["categoria"] == "Mini"
+
+
+class TestModoLigaCompleta:
+    def test_extrae_todos_los_partidos(self, tmp_path):
+        """Con todos=True aparecen también los partidos sin Valsequillo."""
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA])
+
+        partidos = ScraperBaloncesto().extraer_partidos_pdf(pdf, todos=True)
+
+        assert len(partidos) == 4
+        telde = partidos[1]
+        assert (telde["local"], telde["visitante"]) == ("CB Telde (35002857)", "CB Gáldar (35001111)")
+        assert (telde["dia"], telde["hora"], telde["categoria"]) == ("Viernes 16/01/2026", "19:00", "Junior Fem S-A")
+
+    def test_modo_liga_incluye_los_del_equipo(self, tmp_path):
+        """El modo liga es un superconjunto del modo equipo."""
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA])
+        scraper = ScraperBaloncesto()
+
+        todos = scraper.extraer_partidos_pdf(pdf, todos=True)
+        equipo = scraper.extraer_partidos_pdf(pdf)
+
+        assert all(p in todos for p in equipo)
+
+    def test_tres_lineas_con_codigo_seguidas(self):
+        """La tercera línea con código no se empareja con el visitante del par anterior."""
+        from scraper_baloncesto import _escanear_pagina
+
+        lineas = ["Sábado", "81500", "10:00 Mini Mixto",
+                  "CB Firgas (35000010)", "CB Moya (35000011)", "CB Arucas (35000012)", "Pab Firgas",
+                  "81501", "11:00 Premini",
+                  "CB Telde (35002857)", "CB Gáldar (35001111)", "CB Ingenio (35000013)", "CB Agüimes (35000001)",
+                  "Pab Telde"]
+
+        partidos = _escanear_pagina(lineas, 0, todos=True)
+
+        assert [(p["local"][:8], p["visitante"][:8]) for p in partidos] == [
+            ("CB Firga", "CB Moya "), ("CB Telde", "CB Gálda"), ("CB Ingen", "CB Agüim")]
+
+    def test_indexar_jornadas_por_club(self, tmp_path):
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA])
+
+        indice = ScraperBaloncesto().indexar_jornadas([{"path": pdf, "tipo": "DEFINITIVA"}])
+
+        assert [p["visitante"] for p in indice.de_club("35002857")] == ["CB Gáldar (35001111)"]
+        assert indice.de_club("35008850")[0]["jornada_tipo"] == "DEFINITIVA"
+
+
+class TestMultiplesEquipos:
+    def test_varios_equipos_en_una_pasada(self, tmp_path):
+        """Nombres y códigos federativos se combinan; cada partido se asigna a su equipo."""
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA])
+        scraper = ScraperBaloncesto(equipos=["Valsequillo", "35002857", "Agüimes"])
+
+        por_equipo = scraper.extraer_partidos_por_equipo(pdf)
+
+        assert len(por_equipo["Valsequillo"]) == 3
+        assert [p["visitante"] for p in por_equipo["35002857"]] == ["CB Gáldar (35001111)"]
+        assert [p["local"] for p in por_equipo["Agüimes"]] == ["Valsequillo Infantil (35008850)"]
+
+    def test_equipo_sin_partidos(self, tmp_path):
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA])
+
+        por_equipo = ScraperBaloncesto(equipos=["Arucas"]).extraer_partidos_por_equipo(pdf)
+
+        assert por_equipo == {"Arucas": []}
+
+
+COLUMNAS_TABLA = [30, 75, 115, 260, 450, 640]
+
+FILAS_TABLA = [
+    "HOJA DE JORNADA", "JORNADA 15 (12-18 Ene)",
+    ["Nº Part", "Hora", "Categoría", "Local", "Visitante", "Lugar"],
+    "Viernes (16/01/26)",
+    ["81270", "20:30", "Sen Masc 2ª F G-B", "Vito Valsequillo (35008831)", "Asigna Esbisoni Naranja (35023912)", "Pab Mercadillo Valsequillo"],
+    ["81271", "19:00", "Junior Fem S-A", "CB Telde (35002857)", "CB Gáldar (35001111)", "Pab Juan Carlos Hernández"],
+    "Sábado",
+    ["81381", "10:00", "Cad Masc S-B", "Ecoener CB Castillo & (35003808)", "Clínica Dental Virmident", "Cdad Dep Vicente del Bosque"],
+    ["", "", "", "", "Valsequillo (35008840)", ""],
+]
+
+
+def crear_tabla_pdf(ruta, paginas):
+    """Crea un PDF con la tabla de la hoja de jornada: cada celda en la X de su columna."""
+    import fitz
+
+    doc = fitz.open()
+    for filas in paginas:
+        page = doc.new_page(width=842, height=595)
+        for n, fila in enumerate(filas):
+            y = 30 + 11 * n
+            if isinstance(fila, str):
+                page.insert_text((30, y), fila, fontsize=9, fontname="helv")
+                continue
+            for x, celda in zip(COLUMNAS_TABLA, fila):
+                if celda:
+                    page.insert_text((x, y), celda, fontsize=8, fontname="helv")
+    doc.save(ruta)
+    doc.close()
+    return ruta
+
+
+class TestMotorCoordenadas:
+    def test_lee_la_tabla_por_columnas(self, tmp_path):
+        """El nombre partido en dos líneas se une a su celda en vez de confundirse con otro equipo."""
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_tabla_pdf(tmp_path / "tabla.pdf", [FILAS_TABLA])
+
+        partidos = ScraperBaloncesto(motor="coordenadas").extraer_partidos_pdf(pdf)
+
+        assert [(p["dia"], p["hora"], p["categoria"], p["local"], p["visitante"], p["lugar"]) for p in partidos] == [
+            ("Viernes 16/01/2026", "20:30", "Sen Masc 2ª F G-B", "Vito Valsequillo (35008831)",
+             "Asigna Esbisoni Naranja (35023912)", "Pab Mercadillo Valsequillo"),
+            ("Sábado 17/01/26", "10:00", "Cad Masc S-B", "Ecoener CB Castillo & (35003808)",
+             "Clínica Dental Virmident Valsequillo (35008840)", "Cdad Dep Vicente del Bosque"),
+        ]
+
+    def test_liga_completa_y_columnas_de_la_pagina_anterior(self, tmp_path):
+        """La segunda página no repite la cabecera: se reutilizan las columnas de la primera."""
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pagina_2 = ["Domingo 18/01/2026",
+                    ["81390", "11:00", "Inf Masc S-A", "Valsequillo Infantil (35008850)", "CB Agüimes (35000001)", "IES Valsequillo"]]
+        pdf = crear_tabla_pdf(tmp_path / "tabla.pdf", [FILAS_TABLA, pagina_2])
+
+        partidos = ScraperBaloncesto().extraer_partidos_pdf(pdf, todos=True, motor="coordenadas")
+
+        assert [p["local"] for p in partidos] == [
+            "Vito Valsequillo (35008831)", "CB Telde (35002857)",
+            "Ecoener CB Castillo & (35003808)", "Valsequillo Infantil (35008850)",
+        ]
+        assert partidos[-1]["dia"] == "Domingo 18/01/2026"
+        assert partidos[-1]["origen"] == "Página 2"
+
+    def test_sin_tabla_usa_el_escaner_de_lineas(self, tmp_path):
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA])
+        scraper = ScraperBaloncesto()
+
+        assert scraper.extraer_partidos_pdf(pdf, motor="coordenadas") == scraper.extraer_partidos_pdf(pdf)
+
+    def test_motor_desconocido(self):
+        from scraper_baloncesto import ScraperBaloncesto
+
+        with pytest.raises(ValueError):
+            ScraperBaloncesto(motor="ocr")
+
+
+PAGINA_HOJA_2 = [
+    # Sigue el domingo de la página anterior: sin cabecera de día ni rango de fechas
+    "81391", "12:30", "Cad Fem S-A",
+    "Valsequillo Cadete (35008860)", "CB Arucas (35000002)", "IES Valsequillo",
+    "Lunes",
+    "81400", "19:00", "Sen Fem",
+    "CB Teror (35000003)", "Valsequillo Sen Fem (35008870)", "Pab Teror",
+]
+
+
+class TestContextoEntrePaginas:
+    def test_dia_y_rango_pasan_a_la_pagina_siguiente(self, tmp_path):
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA, PAGINA_HOJA_2])
+
+        partidos = ScraperBaloncesto().extraer_partidos_pdf(pdf)
+
+        assert [(p["dia"], p["origen"]) for p in partidos[-2:]] == [
+            ("Domingo 18/01/2026", "Página 2"),
+            ("Lunes 12/01/26", "Página 2"),
+        ]
+
+
+class TestExtraccionEnProcesos:
+    @pytest.mark.parametrize("motor", ["lineas", "coordenadas"])
+    def test_mismo_resultado_que_en_serie(self, tmp_path, motor):
+        """Páginas y documentos repartidos entre procesos se unen en el mismo orden y con el mismo contexto."""
+        from scraper_baloncesto import ScraperBaloncesto
+
+        hoja = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA, PAGINA_HOJA_2] * 3)
+        pagina_2 = ["Domingo 18/01/2026",
+                    ["81390", "11:00", "Inf Masc S-A", "Valsequillo Infantil (35008850)", "CB Agüimes (35000001)", "IES Valsequillo"]]
+        tabla = crear_tabla_pdf(tmp_path / "tabla.pdf", [FILAS_TABLA, pagina_2])
+        rutas = [hoja, tabla]
+
+        en_serie = [ScraperBaloncesto().extraer_partidos_pdf(r, todos=True, motor=motor) for r in rutas]
+        en_procesos = ScraperBaloncesto(procesos=2).extraer_partidos_pdfs(rutas, todos=True, motor=motor)
+
+        assert en_procesos == en_serie
+        assert all(en_serie)
+
+    def test_pdf_corrupto(self, tmp_path):
+        from scraper_baloncesto import ScraperBaloncesto
+
+        ruta = tmp_path / "roto.pdf"
+        ruta.write_bytes(b"no es un pdf")
+
+        assert ScraperBaloncesto(procesos=2).extraer_partidos_pdfs([ruta]) == [[]]
+
+
+class TestCacheExtraccion:
+    def test_pdf_repetido_no_se_vuelve_a_abrir(self, tmp_path, monkeypatch):
+        import scraper_baloncesto
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA])
+        primera = ScraperBaloncesto().extraer_partidos_pdf(pdf)
+
+        def no_abrir(*args, **kwargs):
+            raise AssertionError("no debería abrir el PDF")
+        monkeypatch.setattr(scraper_baloncesto.fitz, "open", no_abrir)
+        # Otra instancia (otra ejecución): la caché está en disco
+        segunda = ScraperBaloncesto().extraer_partidos_pdf(pdf)
+
+        assert segunda == primera
+        segunda[0]["jornada_tipo"] = "DEFINITIVA"
+        assert "jornada_tipo" not in ScraperBaloncesto().extraer_partidos_pdf(pdf)[0]
+
+    def test_usa_el_hash_de_la_descarga(self, tmp_path, monkeypatch):
+        """Con el sha256 que ya calculó la descarga, un acierto no vuelve a leer el PDF."""
+        import hashlib
+        import pathlib
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA])
+        sha256 = hashlib.sha256(pdf.read_bytes()).hexdigest()
+        primera = ScraperBaloncesto().extraer_partidos_pdf(pdf, sha256=sha256)
+
+        def no_leer(*args, **kwargs):
+            raise AssertionError("no debería volver a leer el PDF")
+        monkeypatch.setattr(pathlib.Path, "read_bytes", no_leer)
+
+        assert ScraperBaloncesto().extraer_partidos_pdf(pdf, sha256=sha256) == primera
+
+    def test_clave_incluye_filtro_y_motor(self, tmp_path):
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA])
+
+        assert len(ScraperBaloncesto().extraer_partidos_pdf(pdf)) == 3
+        assert len(ScraperBaloncesto(equipos=["Telde"]).extraer_partidos_pdf(pdf)) == 1
+        assert len(ScraperBaloncesto().extraer_partidos_pdf(pdf, todos=True)) == 4
+        datos = json.loads((tmp_path / "cache" / "partidos_parseados.json").read_text(encoding="utf-8"))
+        assert len(datos["entradas"]) == 3
+
+    def test_otra_version_del_parser_invalida(self, tmp_path, monkeypatch):
+        import scraper_baloncesto
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA])
+        ScraperBaloncesto().extraer_partidos_pdf(pdf)
+
+        monkeypatch.setattr(scraper_baloncesto, "_VERSION_PARSER", "otra")
+        scraper = ScraperBaloncesto()
+        clave, partidos = scraper._consultar_cache_parseo(pdf, False, "lineas")
+
+        assert partidos is None
+        assert scraper._cache_parseo == {"version": "otra", "entradas": {}}
+
+    def test_procesos_usa_la_cache(self, tmp_path):
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA])
+        en_serie = ScraperBaloncesto().extraer_partidos_pdf(pdf)
+
+        scraper = ScraperBaloncesto(procesos=2)
+        pendiente = scraper._enviar_paginas(None, pdf, False, "lineas")
+
+        assert pendiente["futuros"] is None
+        assert scraper._recoger_paginas(pdf, pendiente, False, "lineas") == en_serie
+
+
+class TestPrefiltroPaginas:
+    PAGINA_SIN_EQUIPO = [
+        "81500", "17:00", "Mini Mixto",
+        "CB Firgas (35000010)", "CB Moya (35000011)", "Pab Firgas",
+        "Sábado",
+        "81501", "09:00", "Premini",
+        "CB Telde (35002857)", "CB Gáldar (35001111)", "Pab Telde",
+    ]
+    PAGINA_SIGUE_SABADO = [
+        "81502", "10:00", "Premini",
+        "Valsequillo Premini (35008899)", "CB Ingenio (35000012)", "IES Valsequillo",
+    ]
+
+    def test_salta_paginas_sin_equipo(self, tmp_path):
+        import fitz
+        from scraper_baloncesto import FILTRO_POR_DEFECTO, _leer_pagina
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA, self.PAGINA_SIN_EQUIPO])
+
+        with fitz.open(pdf) as doc:
+            assert "lineas" in _leer_pagina(doc[0], "lineas", FILTRO_POR_DEFECTO)
+            assert "texto" in _leer_pagina(doc[1], "lineas", FILTRO_POR_DEFECTO)
+            assert "lineas" in _leer_pagina(doc[1], "lineas")
+
+    def test_pagina_saltada_mantiene_dia_y_rango(self, tmp_path):
+        """El sábado empieza en una página saltada y sigue en la siguiente."""
+        from scraper_baloncesto import ScraperBaloncesto
+
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA, self.PAGINA_SIN_EQUIPO, self.PAGINA_SIGUE_SABADO])
+
+        partidos = ScraperBaloncesto().extraer_partidos_pdf(pdf)
+
+        assert (partidos[-1]["dia"], partidos[-1]["origen"]) == ("Sábado 17/01/26", "Página 3")
+        # Mismo resultado que leyendo todas las páginas
+        todos = ScraperBaloncesto().extraer_partidos_pdf(pdf, todos=True)
+        assert partidos == [p for p in todos if "Valsequillo" in p["local"] + p["visitante"]]
+
+
+class TestDetectarCambios:
+    PARTIDO = {
+        "dia": "Sábado 21/03/26", "hora": "18:00", "categoria": "Senior Masc S-A",
+        "local": "CB Valsequillo (35008831)", "visitante": "Gran Canaria B (35004700)",
+        "lugar": "Pab Municipal Valsequillo", "origen": "Página 1", "jornada_tipo": "DEFINITIVA",
+    }
+
+    def test_migra_el_snapshot_json_al_almacen(self, scraper, tmp_path):
+        (tmp_path / "partidos_anteriores.json").write_text(json.dumps([self.PARTIDO]), encoding="utf-8")
+
+        cambios = scraper.detectar_cambios([dict(self.PARTIDO, hora="19:30")])
+
+        assert cambios[0]["cambios"] == ["Hora: 18:00 → 19:30"]
+        assert (tmp_path / "cache" / "partidos.db").exists()
+        exportado = json.loads((tmp_path / "partidos_anteriores.json").read_text(encoding="utf-8"))
+        assert exportado[0]["hora"] == "19:30"
+
+    def test_compara_con_la_ejecucion_anterior(self, scraper):
+        assert scraper.detectar_cambios([self.PARTIDO]) == []
+        assert scraper.detectar_cambios([self.PARTIDO]) == []
+
+        cambios = scraper.detectar_cambios([dict(self.PARTIDO, lugar="Pab Telde")])
+
+        assert cambios[0]["cambios"] == ["Lugar: Pab Municipal Valsequillo → Pab Telde"]
+
+    def test_eventos_por_identidad_estable_y_historial(self, scraper, tmp_path):
+        otro = dict(self.PARTIDO, visitante="CB Telde (35002857)", dia="Domingo 22/03/26")
+        scraper.detectar_cambios([self.PARTIDO, otro])
+
+        scraper.detectar_cambios([dict(self.PARTIDO, local="VITO Valsequillo (35008831)")])
+
+        # El cambio de sufijo del equipo no es una baja más un alta
+        assert [e["tipo"] for e in scraper.eventos_cambios] == ["modificado", "baja"]
+        historial = (tmp_path / "historial_cambios.jsonl").read_text(encoding="utf-8").splitlines()
+        assert len(historial) == 2
+
+    def test_hoja_sin_leer_no_da_de_baja_sus_partidos(self, scraper):
+        """Si la descarga de una hoja falla, sus partidos no se avisan como eliminados."""
+        provisional = dict(self.PARTIDO, visitante="CB Telde (35002857)", dia="Sábado 20/03/2100",
+                           jornada_tipo="PROVISIONAL", hoja="Jornada 26 PROVISIONAL")
+        scraper.detectar_cambios([self.PARTIDO, provisional])
+
+        cambios = scraper.detectar_cambios([self.PARTIDO], hojas_sin_leer=["Jornada 26 PROVISIONAL"])
+
+        assert cambios == [] and scraper.eventos_cambios == []
+        from almacen_partidos import AlmacenPartidos
+        with AlmacenPartidos(scraper.ruta_almacen) as almacen:
+            assert len(almacen.activos()) == 2
+        # Cuando la hoja se lee y el partido ya no está, sí es una baja
+        cambios = scraper.detectar_cambios([self.PARTIDO])
+        assert cambios[0]["cambios"] == ["Partido eliminado de las hojas de jornada"]
+
+
+class TestEjecucionInterrumpida:
+    def test_recupera_y_fuerza_el_procesamiento(self, scraper, tmp_path):
+        from almacen_partidos import AlmacenPartidos
+
+        with AlmacenPartidos(tmp_path / "cache" / "partidos.db") as almacen:
+            almacen.guardar_ejecucion([TestDetectarCambios.PARTIDO])
+        # Lo que deja una ejecución cortada: marca, temporal y JSON truncado
+        (tmp_path / ".ejecucion_en_curso").write_text('{"inicio": "2026-03-21T10:00:00"}')
+        (tmp_path / ".partidos_anteriores.json.5f3e9a01.tmp.json").write_text("[{")
+        (tmp_path / "partidos_anteriores.json").write_text("[{")
+        (tmp_path / "cache" / "listado.json").write_text("{}")
+        scraper.descargar_y_extraer = MagicMock(return_value=[])
+
+        assert scraper.ejecutar() == []
+
+        assert not (tmp_path / ".ejecucion_en_curso").exists()
+        assert not (tmp_path / ".partidos_anteriores.json.5f3e9a01.tmp.json").exists()
+        assert not (tmp_path / "cache" / "listado.json").exists()  # Se fuerza el procesamiento
+        exportado = json.loads((tmp_path / "partidos_anteriores.json").read_text(encoding="utf-8"))
+        assert exportado[0]["hora"] == "18:00"
+
+    def test_ejecucion_normal_borra_la_marca(self, scraper, tmp_path):
+        scraper.descargar_y_extraer = MagicMock(return_value=[])
+
+        scraper.ejecutar()
+
+        assert not (tmp_path / ".ejecucion_en_curso").exists()
+
+
+class TestManifiestoEjecucion:
+    def preparar(self, scraper, tmp_path, partidos):
+        from partido import Partido
+
+        info = {"path": tmp_path / "cache" / "pdfs" / "abc123.pdf", "tipo": "DEFINITIVA",
+                "titulo": "Jornada 25 (16-22 Mar) DEFINITIVA"}
+        scraper.descargar_y_extraer = MagicMock(return_value=[(info, [Partido.desde_dict(p) for p in partidos])])
+
+        def fichero(nombre):
+            ruta = tmp_path / nombre
+            ruta.write_text(nombre)
+            return ruta
+
+        scraper.generar_excel = MagicMock(side_effect=lambda *a: fichero("partidos.xlsx"))
+        scraper.generar_pdf = MagicMock(side_effect=lambda p, tipo: fichero(f"PARTIDOS_{tipo}.pdf"))
+        scraper.generar_calendario = MagicMock(side_effect=lambda p, tipo: fichero(f"PARTIDOS_{tipo}.ics"))
+        scraper.generar_preview_email = MagicMock(side_effect=lambda *a: fichero("email_preview.html"))
+        scraper.sincronizar_google_calendar = MagicMock(return_value=True)
+
+    def test_segunda_ejecucion_identica_no_regenera(self, scraper, tmp_path, monkeypatch):
+        import generar_web
+
+        web = MagicMock(side_effect=lambda *a: (tmp_path / "docs").mkdir(exist_ok=True)
+                        or (tmp_path / "docs" / "index.html").write_text("web"))
+        monkeypatch.setattr(generar_web, "generar_web_publica", web)
+        futuro = dict(TestDetectarCambios.PARTIDO, dia="Sábado 20/03/2100")
+
+        self.preparar(scraper, tmp_path, [futuro])
+        primera = scraper.ejecutar()
+        segunda = scraper.ejecutar()
+
+        assert primera == segunda
+        assert scraper.generar_pdf.call_count == 1
+        assert scraper.generar_calendario.call_count == 1
+        assert scraper.sincronizar_google_calendar.call_count == 1
+        assert web.call_count == 1 and scraper.generar_excel.call_count == 1
+
+        # Un partido cambia de hora: se regenera lo que depende de él
+        self.preparar(scraper, tmp_path, [dict(futuro, hora="20:00")])
+        scraper.ejecutar()
+        assert scraper.generar_pdf.call_count == 1 and scraper.sincronizar_google_calendar.call_count == 1
+        assert web.call_count == 2
+
+    def test_sin_jornadas_nuevas_se_regenera_lo_que_depende_del_dia(self, scraper, tmp_path, monkeypatch):
+        """Sin cambios en la federación, las etapas siguen corriendo con la fecha de hoy."""
+        from datetime import datetime, timedelta
+        import generar_web
+        import scraper_baloncesto
+
+        web = MagicMock(side_effect=lambda *a: (tmp_path / "docs").mkdir(exist_ok=True)
+                        or (tmp_path / "docs" / "index.html").write_text("web"))
+        monkeypatch.setattr(generar_web, "generar_web_publica", web)
+        self.preparar(scraper, tmp_path, [dict(TestDetectarCambios.PARTIDO, dia="Sábado 20/03/2100")])
+        scraper.ejecutar()
+
+        resultados = scraper.descargar_y_extraer.return_value
+
+        def sin_jornadas_nuevas():
+            scraper.listado_sin_cambios = True
+            return resultados
+        scraper.descargar_y_extraer = MagicMock(side_effect=sin_jornadas_nuevas)
+        scraper.ejecutar()
+        assert scraper.generar_pdf.call_count == 1 and web.call_count == 1
+
+        class Manana(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.now(tz) + timedelta(days=1)
+        monkeypatch.setattr(scraper_baloncesto, "datetime", Manana)
+        generados = scraper.ejecutar()
+
+        assert scraper.generar_pdf.call_count == 2 and web.call_count == 2
+        assert scraper.sincronizar_google_calendar.call_count == 1  # No depende del día
+        assert "PARTIDOS_DEFINITIVA.pdf" in [p.name for p in generados]
+
+    def test_forzar_ignora_el_manifiesto(self, scraper, tmp_path, monkeypatch):
+        import generar_web
+
+        monkeypatch.setattr(generar_web, "generar_web_publica", MagicMock())
+        self.preparar(scraper, tmp_path, [dict(TestDetectarCambios.PARTIDO, dia="Sábado 20/03/2100")])
+        scraper.ejecutar()
+        scraper.ejecutar(forzar=True)
+
+        assert scraper.generar_pdf.call_count == 2
+
+    def test_etapa_fallida_no_para_las_demas(self, scraper, tmp_path, monkeypatch):
+        import generar_web
+
+        web = MagicMock()
+        monkeypatch.setattr(generar_web, "generar_web_publica", web)
+        self.preparar(scraper, tmp_path, [dict(TestDetectarCambios.PARTIDO, dia="Sábado 20/03/2100")])
+        scraper.generar_pdf.side_effect = RuntimeError("reportlab roto")
+        scraper._cache_listado_pendiente = {"etag": "x"}
+
+        generados = scraper.ejecutar()
+
+        assert web.called and scraper.sincronizar_google_calendar.called
+        assert [p.name for p in generados] == ["PARTIDOS_DEFINITIVA.ics", "email_preview.html"]
+        assert set(scraper.tiempos_etapas) >= {"excel", "pdf_definitiva", "web", "google_calendar"}
+        # El listado no se confirma: la siguiente ejecución vuelve a intentarlo
+        assert scraper._cache_listado_pendiente == {"etag": "x"}
+
+    def test_hojas_del_listado_que_no_llegan(self, scraper, tmp_path, monkeypatch):
+        import generar_web
+
+        monkeypatch.setattr(generar_web, "generar_web_publica", MagicMock())
+        self.preparar(scraper, tmp_path, [dict(TestDetectarCambios.PARTIDO, dia="Sábado 20/03/2100")])
+        scraper.hojas_listadas = ["Jornada 25 (16-22 Mar) DEFINITIVA", "Jornada 26 (23-29 Mar) PROVISIONAL"]
+        scraper.detectar_cambios = MagicMock(return_value=[])
+
+        scraper.ejecutar()
+
+        assert scraper.detectar_cambios.call_args.args[1] == ["Jornada 26 (23-29 Mar) PROVISIONAL"]
+
+
+class TestMetricasEjecucion:
+    def test_descargas_por_jornada(self, scraper):
+        scraper.session.get.side_effect = listado_y_pdfs(respuesta(content=PDF_FALSO), respuesta(content=b"<html>"))
+
+        scraper.descargar_pdfs_recientes()
+
+        jornadas = {e["jornada"]: e["estado"] for (n, et) in scraper.metricas.tiempos
+                    if n == "descarga_segundos" for e in [dict(et)]}
+        assert sorted(jornadas.values()) == ["descargado", "descartado"]
+        assert scraper.metricas.total("descarga_bytes") == len(PDF_FALSO)
+
+    def test_paginas_lineas_y_parseo(self, scraper, tmp_path):
+        pdf = crear_hoja_pdf(tmp_path / "hoja.pdf", [PAGINA_HOJA, ["Página sin partidos"]])
+
+        scraper.extraer_partidos_pdf(pdf)
+        scraper.extraer_partidos_pdf(pdf)
+
+        metricas = scraper.metricas
+        assert metricas.valor("paginas", estado="escaneada") == 1
+        assert metricas.valor("paginas", estado="saltada") == 1
+        assert metricas.valor("lineas") == len(PAGINA_HOJA)
+        assert metricas.tiempos[("parseo_segundos", (("pdf", "hoja.pdf"),))][1] == 1
+        assert metricas.valor("cache_parseo", resultado="acierto") == 1
+
+    def test_llamadas_a_calendar_por_verbo(self, scraper):
+        peticion = MagicMock()
+        peticion.execute.side_effect = [{"items": []}, RuntimeError("quota")]
+
+        scraper._llamar_calendar("list", peticion)
+        with pytest.raises(RuntimeError):
+            scraper._llamar_calendar("insert", peticion)
+
+        assert scraper.metricas.valor("calendar_llamadas", verbo="list") == 1
+        assert scraper.metricas.valor("calendar_errores", verbo="insert") == 1
+
+    def test_ejecutar_escribe_el_informe(self, scraper, tmp_path, monkeypatch):
+        import generar_web
+
+        monkeypatch.setattr(generar_web, "generar_web_publica", MagicMock())
+        TestManifiestoEjecucion().preparar(scraper, tmp_path, [dict(TestDetectarCambios.PARTIDO, dia="Sábado 20/03/2100")])
+        scraper.ruta_metricas_prometheus = tmp_path / "scraper.prom"
+
+        scraper.ejecutar()
+        scraper.ejecutar()
+
+        informe = json.loads((tmp_path / "metricas_ejecucion.json").read_text(encoding="utf-8"))
+        etapas = {(c["etiquetas"]["etapa"], c["etiquetas"]["estado"]) for c in informe["contadores"]
+                  if c["nombre"] == "etapas"}
+        assert ("pdf_definitiva", "reutilizada") in etapas  # Solo la segunda ejecución
+        assert ("pdf_definitiva", "ejecutada") not in etapas
+        assert "scraper_baloncesto_etapa_segundos_count" in (tmp_path / "scraper.prom").read_text(encoding="utf-8")
+
+
+class TestSincronizacionCalendar:
+    @pytest.fixture(autouse=True)
+    def sin_esperas(self, scraper, monkeypatch):
+        """Sin limitador de tasa ni esperas entre reintentos: el calendario es falso."""
+        import calendario_google
+
+        scraper.operaciones_por_segundo_calendar = 0
+        monkeypatch.setattr(calendario_google, "ESPERA_BASE", 0)
+
+    def test_inicio_de_temporada_en_lotes(self, scraper):
+        from calendario_falso import CalendarioFalso, generar_partidos
+
+        servicio = CalendarioFalso()
+        assert scraper.sincronizar_google_calendar(generar_partidos(120), service=servicio, calendar_id="c")
+
+        assert len(servicio.eventos()) == 120
+        assert servicio.llamadas == {"list": 1, "batch": 3}
+
+    def test_sin_cambios_no_escribe(self, scraper):
+        from calendario_falso import CalendarioFalso, generar_partidos
+
+        servicio = CalendarioFalso()
+        partidos = generar_partidos(300)
+        scraper.sincronizar_google_calendar(partidos, service=servicio, calendar_id="c")
+        servicio.reiniciar_contadores()
+
+        # La siguiente recibe sus propias escrituras por el syncToken, pero no escribe nada
+        assert scraper.sincronizar_google_calendar(partidos, service=servicio, calendar_id="c")
+        assert "batch" not in servicio.llamadas and not servicio.operaciones
+
+        servicio.reiniciar_contadores()
+        assert scraper.sincronizar_google_calendar(partidos, service=servicio, calendar_id="c")
+        assert servicio.llamadas == {"list": 1}
+
+    def test_cambio_de_lugar_actualiza_solo_ese_evento(self, scraper):
+        from calendario_falso import CalendarioFalso, generar_partidos
+
+        servicio = CalendarioFalso()
+        partidos = generar_partidos(10)
+        scraper.sincronizar_google_calendar(partidos, service=servicio, calendar_id="c")
+        servicio.reiniciar_contadores()
+        partidos[3] = dict(partidos[3], lugar="Pabellón nuevo")
+
+        scraper.sincronizar_google_calendar(partidos, service=servicio, calendar_id="c")
+
+        assert servicio.operaciones == {"update": 1}
+        assert sum(e["location"] == "Pabellón nuevo" for e in servicio.eventos()) == 1
+
+    def test_cambio_de_hora_sustituye_el_evento(self, scraper):
+        from calendario_falso import CalendarioFalso, generar_partidos
+
+        servicio = CalendarioFalso()
+        partidos = generar_partidos(10)
+        scraper.sincronizar_google_calendar(partidos, service=servicio, calendar_id="c")
+        partidos[0] = dict(partidos[0], hora="21:15")
+
+        scraper.sincronizar_google_calendar(partidos, service=servicio, calendar_id="c")
+
+        horas = sorted(e["start"]["dateTime"][11:16] for e in servicio.eventos())
+        assert len(horas) == 10 and "21:15" in horas and horas.count("09:00") == 0
+
+    def test_token_caducado_y_cuota(self, scraper):
+        from calendario_falso import CalendarioFalso, generar_partidos
+
+        servicio = CalendarioFalso()
+        scraper.sincronizar_google_calendar(generar_partidos(5), service=servicio, calendar_id="c")
+        servicio.caducar_tokens()
+        servicio.fallar("insert", veces=2)
+
+        assert scraper.sincronizar_google_calendar(generar_partidos(8), service=servicio, calendar_id="c")
+
+        assert len(servicio.eventos()) == 8
+        assert scraper.metricas.valor("calendar_operaciones", verbo="insert", resultado="ok") == 8
+        assert scraper.metricas.valor("calendar_limitadas") == 2
+
+    def test_operaciones_fallidas_se_reintentan_en_la_siguiente_ejecucion(self, scraper, tmp_path, monkeypatch):
+        from functools import partial
+        import generar_web
+        from calendario_falso import CalendarioFalso, generar_partidos, _error_http
+        from scraper_baloncesto import ScraperBaloncesto
+
+        monkeypatch.setattr(generar_web, "generar_web_publica", MagicMock())
+        TestManifiestoEjecucion().preparar(scraper, tmp_path, generar_partidos(3))
+        servicio = CalendarioFalso()
+        scraper.sincronizar_google_calendar = partial(ScraperBaloncesto.sincronizar_google_calendar, scraper,
+                                                      service=servicio, calendar_id="c")
+        servicio.fallar("insert", _error_http(400, "invalid"))
+        scraper._cache_listado_pendiente = {"etag": "x"}
+
+        scraper.ejecutar()
+
+        assert len(servicio.eventos()) == 2
+        assert scraper.metricas.valor("etapas", etapa="google_calendar", estado="fallida") == 1
+        assert scraper._cache_listado_pendiente == {"etag": "x"}  # El listado no se confirma
+
+        scraper.ejecutar()
+
+        assert len(servicio.eventos()) == 3
+        assert servicio.operaciones == {"insert": 3}
+        assert scraper._cache_listado_pendiente is None
+
+    def test_eventos_legacy_se_borran(self, scraper):
+        from calendario_falso import CalendarioFalso, generar_partidos
+
+        servicio = CalendarioFalso()
+        servicio.events().insert(calendarId="c", body={
+            "summary": "Partido antiguo", "start": {"dateTime": "2100-01-01T10:00:00+00:00"}}).execute()
+
+        scraper.sincronizar_google_calendar(generar_partidos(3), service=servicio, calendar_id="c")
+
+        assert "Partido antiguo" not in [e["summary"] for e in servicio.eventos()]